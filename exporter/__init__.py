@@ -71,6 +71,7 @@ from bpy.props import (StringProperty,
                        BoolProperty,
                        EnumProperty,
                        IntProperty,
+                       FloatProperty,
                        CollectionProperty)
 from bpy.types import Operator
 from bpy_extras.io_utils import ImportHelper, ExportHelper
@@ -124,6 +125,30 @@ class ExportExtendedGLTF2_Base:
         default=""
     )
 
+    export_json_validation: EnumProperty(
+        name='JSON Validation',
+        items=(('VALIDATED', 'Validated',
+                'Check every glTF property while it is written'),
+               ('TRUSTED', 'Trusted',
+                'Write the glTF properties without checking them. Much faster on large scenes'),
+               ('DEBUG', 'Debug',
+                'Write without checking, then check the whole glTF once and report the invalid properties')),
+        description='Validation of the glTF properties while the JSON is written',
+        default='VALIDATED'
+    )
+
+    export_cache_report: EnumProperty(
+        name='Cache Report',
+        items=(('NONE', 'None',
+                'Do not report the use of the gather caches'),
+               ('CONSOLE', 'Console',
+                'Print the hits, misses, size and time of each gather cache at the end of the export'),
+               ('JSON', 'Console and JSON',
+                'Also write the report as JSON next to the exported file')),
+        description='Report on the gather caches, to find out which of them are worth keeping',
+        default='NONE'
+    )
+
     export_image_format: EnumProperty(
         name='Images',
         items=(('AUTO', 'Automatic',
@@ -154,6 +179,21 @@ class ExportExtendedGLTF2_Base:
         default=False
     )
 
+    export_generate_lods: BoolProperty(
+        name='Generate LODs',
+        description='Generate the lower LODs that have no collection from the X00 collection, by mesh simplification. '
+                    'The .blend file is not modified. UV seams and hard edges are kept, so meshes split everywhere, '
+                    'such as flat shaded ones, simplify little. It takes roughly two seconds per hundred thousand '
+                    'triangles of X00, for each generated LOD',
+        default=False
+    )
+
+    export_lod_ratios: StringProperty(
+        name='LOD Ratios',
+        description='Comma separated triangle ratios of the generated LODs, relative to X00',
+        default='0.5, 0.25, 0.125'
+    )
+
     export_xml: BoolProperty(
         name='Generate/Append XML file',
         description='Automatically generate an XML file for the model',
@@ -186,6 +226,13 @@ class ExportExtendedGLTF2_Base:
         default=True
     )
 
+    export_mesh_quantization: BoolProperty(
+        name='Mesh quantization',
+        description='Store vertex attributes as normalized integers (KHR_mesh_quantization). '
+                    'Alternative to Draco compression, which takes precedence when both are enabled',
+        default=False
+    )
+
     export_draco_mesh_compression_enable: BoolProperty(
         name='Draco mesh compression',
         description='Compress mesh using Draco',
@@ -232,6 +279,55 @@ class ExportExtendedGLTF2_Base:
         max=30
     )
 
+    export_extract_engine: EnumProperty(
+        name='Extraction',
+        items=(('NUMPY', 'NumPy',
+                'Read mesh data in bulk into NumPy arrays. Much faster on large meshes'),
+               ('LEGACY', 'Legacy',
+                'Walk every polygon and loop in Python. Slow, kept as a reference')),
+        description='Engine used to extract vertex data and triangles from meshes',
+        default='NUMPY'
+    )
+
+    export_weld_epsilon: FloatProperty(
+        name='Weld Distance',
+        description='Vertices whose attributes all differ by less than this value are merged '
+                    '(0 = only merge identical vertices). Only used by the NumPy extraction engine',
+        default=0.0,
+        min=0.0,
+        max=0.1,
+        precision=6,
+        step=0.01
+    )
+
+    export_optimize_vertex_cache: BoolProperty(
+        name='Optimize Vertex Cache',
+        description='Reorder triangles and vertices of meshes for GPU vertex cache and vertex fetch locality',
+        default=False
+    )
+
+    export_primitive_cache: BoolProperty(
+        name='Primitive Cache',
+        description='Keep the primitives extracted from meshes on disk, and load them instead of extracting them '
+                    'again as long as the mesh and the export settings do not change',
+        default=False
+    )
+
+    export_primitive_cache_dir: StringProperty(
+        name='Cache Directory',
+        description='Directory of the primitive cache. Leave empty for a .gltf_primitive_cache folder next to '
+                    'the .blend file',
+        default='',
+        subtype='DIR_PATH'
+    )
+
+    export_primitive_cache_size: IntProperty(
+        name='Cache Size (MB)',
+        description='The least recently used primitives are removed from the cache when it grows larger',
+        default=1024,
+        min=1
+    )
+
     export_tangents: BoolProperty(
         name='Tangents',
         description='Export vertex tangents with meshes',
@@ -461,6 +557,7 @@ class ExportExtendedGLTF2_Base:
         import datetime
         from .exp import gltf2_blender_export
         from .exp import gltf2_blender_batch_export
+        from .exp import gltf2_blender_primitive_cache
 
         if self.will_save_settings:
             self.save_settings(context)
@@ -485,6 +582,9 @@ class ExportExtendedGLTF2_Base:
         #############################################
         # Special MSFS functionality:
         export_settings['gltf_msfs_lods'] = self.export_lods
+        export_settings['gltf_msfs_generate_lods'] = self.export_lods and self.export_generate_lods
+        export_settings['gltf_msfs_lod_ratios'] = self.export_lod_ratios
+        export_settings['gltf_lod_ratio'] = 1.0
         export_settings['gltf_msfs_xml'] = self.export_xml
         export_settings['gltf_msfs_xml_file'] = self.export_xml_file
         export_settings['gltf_msfs_generate_guid'] = self.export_xml and self.export_generate_guid
@@ -493,9 +593,20 @@ class ExportExtendedGLTF2_Base:
         export_settings['gltf_format'] = self.export_format
         export_settings['gltf_image_format'] = self.export_image_format
         export_settings['gltf_copyright'] = self.export_copyright
+        export_settings['gltf_json_validation'] = self.export_json_validation
+        export_settings['gltf_cache_report'] = self.export_cache_report
         export_settings['gltf_texcoords'] = self.export_texcoords
         export_settings['gltf_normals'] = self.export_normals
         export_settings['gltf_tangents'] = self.export_tangents and self.export_normals
+        export_settings['gltf_extract_engine'] = self.export_extract_engine
+        export_settings['gltf_weld_epsilon'] = self.export_weld_epsilon
+        export_settings['gltf_optimize_vertex_cache'] = self.export_optimize_vertex_cache
+        if self.export_primitive_cache:
+            export_settings['gltf_primitive_cache'] = gltf2_blender_primitive_cache.cache_directory(
+                self.export_primitive_cache_dir)
+        else:
+            export_settings['gltf_primitive_cache'] = None
+        export_settings['gltf_primitive_cache_size'] = self.export_primitive_cache_size * 1024 * 1024
 
         if self.is_draco_available:
             export_settings['gltf_draco_mesh_compression'] = self.export_draco_mesh_compression_enable
@@ -506,6 +617,8 @@ class ExportExtendedGLTF2_Base:
             export_settings['gltf_draco_generic_quantization'] = self.export_draco_generic_quantization
         else:
             export_settings['gltf_draco_mesh_compression'] = False
+        export_settings['gltf_mesh_quantization'] = self.export_mesh_quantization \
+            and not export_settings['gltf_draco_mesh_compression']
 
         export_settings['gltf_materials'] = self.export_materials
         export_settings['gltf_colors'] = self.export_colors
@@ -627,6 +740,8 @@ class GLTF_PT_export_main_ext_gltf(bpy.types.Panel):
         if operator.export_format == 'GLTF_SEPARATE':
             layout.prop(operator, 'export_texture_dir', icon='FILE_FOLDER')
         layout.prop(operator, 'export_copyright')
+        layout.prop(operator, 'export_json_validation')
+        layout.prop(operator, 'export_cache_report')
         layout.prop(operator, 'will_save_settings')
 
 
@@ -657,6 +772,10 @@ class GLTF_PT_export_special_msfs(bpy.types.Panel):
         col = layout.column(align=True)#heading = "Limit to", align = True)
         #Special functions for MSFS export:
         layout.prop(operator, 'export_lods')
+        if operator.export_lods == True:
+            layout.prop(operator, 'export_generate_lods')
+            if operator.export_generate_lods == True:
+                layout.prop(operator, 'export_lod_ratios')
         layout.prop(operator, 'export_xml')
         if operator.export_xml == True:
             layout.prop(operator, 'export_xml_file', icon='FILE')
@@ -745,6 +864,19 @@ class GLTF_PT_export_geometry_ext_gltf(bpy.types.Panel):
         operator = sfile.active_operator
 
         layout.prop(operator, 'export_apply')
+        layout.prop(operator, 'export_extract_engine')
+        col = layout.column()
+        col.active = operator.export_extract_engine == 'NUMPY'
+        col.prop(operator, 'export_weld_epsilon')
+        layout.prop(operator, 'export_optimize_vertex_cache')
+        layout.prop(operator, 'export_primitive_cache')
+        col = layout.column()
+        col.active = operator.export_primitive_cache
+        col.prop(operator, 'export_primitive_cache_dir')
+        col.prop(operator, 'export_primitive_cache_size')
+        op = col.operator(PrunePrimitiveCache.bl_idname)
+        op.directory = operator.export_primitive_cache_dir
+        op.max_size = operator.export_primitive_cache_size
         layout.prop(operator, 'export_texcoords')
         layout.prop(operator, 'export_normals')
         col = layout.column()
@@ -798,6 +930,39 @@ class GLTF_PT_export_geometry_compression_ext_gltf(bpy.types.Panel):
         col.prop(operator, 'export_draco_generic_quantization', text="Generic")
 
 
+class GLTF_PT_export_geometry_quantization_ext_gltf(bpy.types.Panel):
+    bl_space_type = 'FILE_BROWSER'
+    bl_region_type = 'TOOL_PROPS'
+    bl_label = "Quantization"
+    bl_parent_id = "GLTF_PT_export_geometry"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    @classmethod
+    def poll(cls, context):
+        sfile = context.space_data
+        operator = sfile.active_operator
+
+        return operator.bl_idname == "EXPORT_SCENE_OT_ext_gltf"
+
+    def draw_header(self, context):
+        sfile = context.space_data
+        operator = sfile.active_operator
+        self.layout.prop(operator, "export_mesh_quantization", text="")
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False  # No animation.
+
+        sfile = context.space_data
+        operator = sfile.active_operator
+
+        layout.active = operator.export_mesh_quantization and not (
+            operator.is_draco_available and operator.export_draco_mesh_compression_enable)
+        layout.label(text="Positions: 16 bit, normals and tangents: 8 bit")
+        layout.label(text="Tex coords: 16 bit, colors: 8 bit")
+
+
 class GLTF_PT_export_animation_ext_gltf(bpy.types.Panel):
     bl_space_type = 'FILE_BROWSER'
     bl_region_type = 'TOOL_PROPS'
@@ -958,6 +1123,41 @@ class ExportExtendedGLTF2(bpy.types.Operator, ExportExtendedGLTF2_Base, ExportHe
     filter_glob: StringProperty(default='*.glb;*.gltf', options={'HIDDEN'})
 
 
+class PrunePrimitiveCache(bpy.types.Operator):
+    """Remove the least recently used primitives from the primitive cache, down to the given size"""
+    bl_idname = 'export_scene.ext_gltf_prune_primitive_cache'
+    bl_label = 'Prune Primitive Cache'
+
+    # Can also be run from the command line, for example:
+    # blender --background project.blend --python-expr \
+    #     "import bpy; bpy.ops.export_scene.ext_gltf_prune_primitive_cache(max_size=0)"
+
+    directory: StringProperty(
+        name='Cache Directory',
+        description='Directory of the primitive cache. Leave empty for the .gltf_primitive_cache folder next to '
+                    'the .blend file',
+        default='',
+        subtype='DIR_PATH'
+    )
+
+    max_size: IntProperty(
+        name='Size (MB)',
+        description='Size the cache is pruned to. 0 empties the cache',
+        default=0,
+        min=0
+    )
+
+    def execute(self, context):
+        from .exp import gltf2_blender_primitive_cache
+        from .exp import gltf2_io_primitive_cache
+
+        directory = gltf2_blender_primitive_cache.cache_directory(self.directory)
+        removed_count, removed_bytes = gltf2_io_primitive_cache.prune(directory, self.max_size * 1024 * 1024)
+        self.report({'INFO'}, 'Removed {} primitive cache entries ({} bytes) from {}'.format(
+            removed_count, removed_bytes, directory))
+        return {'FINISHED'}
+
+
 def menu_func_export(self, context):
     # split to get the real addon name
     name = __name__.split(".")[0]
@@ -973,12 +1173,14 @@ def menu_func_export(self, context):
 
 classes = (
     ExportExtendedGLTF2,
+    PrunePrimitiveCache,
     GLTF_PT_export_main_ext_gltf,
     GLTF_PT_export_special_msfs,
     GLTF_PT_export_include_ext_gltf,
     GLTF_PT_export_transform_ext_gltf,
     GLTF_PT_export_geometry_ext_gltf,
     GLTF_PT_export_geometry_compression_ext_gltf,
+    GLTF_PT_export_geometry_quantization_ext_gltf,
     GLTF_PT_export_animation_ext_gltf,
     GLTF_PT_export_animation_export_ext_gltf,
     GLTF_PT_export_animation_shapekeys_ext_gltf,
@@ -16,8 +16,6 @@
 # command used:
 # quicktype --src glTF.schema.json --src-lang schema -t gltf --lang python --python-version 3.5
 
-# TODO: add __slots__ to all classes by extending the generator
-
 # TODO: REMOVE traceback import
 
 # NOTE: this file is modified for addonExtension use. See
@@ -117,6 +115,8 @@ class AccessorSparseIndices:
     Indices of those attributes that deviate from their initialization value.
     """
 
+    __slots__ = ('buffer_view', 'byte_offset', 'component_type', 'extensions', 'extras')
+
     def __init__(self, buffer_view, byte_offset, component_type, extensions, extras):
         self.buffer_view = buffer_view
         self.byte_offset = byte_offset
@@ -155,6 +155,8 @@ class AccessorSparseValues:
     accessor attributes pointed by `accessor.sparse.indices`.
     """
 
+    __slots__ = ('buffer_view', 'byte_offset', 'extensions', 'extras')
+
     def __init__(self, buffer_view, byte_offset, extensions, extras):
         self.buffer_view = buffer_view
         self.byte_offset = byte_offset
@@ -184,6 +186,8 @@ class AccessorSparseValues:
 class AccessorSparse:
     """Sparse storage of attributes that deviate from their initialization value."""
 
+    __slots__ = ('count', 'extensions', 'extras', 'indices', 'values')
+
     def __init__(self, count, extensions, extras, indices, values):
         self.count = count
         self.extensions = extensions
@@ -219,6 +223,9 @@ class Accessor:
     WebGL's `vertexAttribPointer()` defines an attribute in a buffer.
     """
 
+    __slots__ = ('buffer_view', 'byte_offset', 'component_type', 'count', 'extensions', 'extras', 'max', 'min', 'name',
+                 'normalized', 'sparse', 'type')
+
     def __init__(self, buffer_view, byte_offset, component_type, count, extensions, extras, max, min, name, normalized,
                  sparse, type):
         self.buffer_view = buffer_view
@@ -277,6 +284,8 @@ class AnimationChannelTarget:
     The index of the node and TRS property that an animation channel targets.
     """
 
+    __slots__ = ('extensions', 'extras', 'node', 'path')
+
     def __init__(self, extensions, extras, node, path):
         self.extensions = extensions
         self.extras = extras
@@ -306,6 +315,8 @@ class AnimationChannelTarget:
 class AnimationChannel:
     """Targets an animation's sampler at a node's property."""
 
+    __slots__ = ('extensions', 'extras', 'sampler', 'target')
+
     def __init__(self, extensions, extras, sampler, target):
         self.extensions = extensions
         self.extras = extras
@@ -337,6 +348,8 @@ class AnimationSampler:
     graph (but not its target).
     """
 
+    __slots__ = ('extensions', 'extras', 'input', 'interpolation', 'output')
+
     def __init__(self, extensions, extras, input, interpolation, output):
         self.extensions = extensions
         self.extras = extras
@@ -369,6 +382,8 @@ class AnimationSampler:
 class Animation:
     """A keyframe animation."""
 
+    __slots__ = ('channels', 'extensions', 'extras', 'name', 'samplers')
+
     def __init__(self, channels, extensions, extras, name, samplers):
         self.channels = channels
         self.extensions = extensions
@@ -401,6 +416,8 @@ class Animation:
 class Asset:
     """Metadata about the glTF asset."""
 
+    __slots__ = ('copyright', 'extensions', 'extras', 'generator', 'min_version', 'version')
+
     def __init__(self, copyright, extensions, extras, generator, min_version, version):
         self.copyright = copyright
         self.extensions = extensions
@@ -436,6 +453,8 @@ class Asset:
 class BufferView:
     """A view into a buffer generally representing a subset of the buffer."""
 
+    __slots__ = ('buffer', 'byte_length', 'byte_offset', 'byte_stride', 'extensions', 'extras', 'name', 'target')
+
     def __init__(self, buffer, byte_length, byte_offset, byte_stride, extensions, extras, name, target):
         self.buffer = buffer
         self.byte_length = byte_length
@@ -477,6 +496,8 @@ class BufferView:
 class Buffer:
     """A buffer points to binary geometry, animation, or skins."""
 
+    __slots__ = ('byte_length', 'extensions', 'extras', 'name', 'uri')
+
     def __init__(self, byte_length, extensions, extras, name, uri):
         self.byte_length = byte_length
         self.extensions = extensions
@@ -509,6 +530,8 @@ class Buffer:
 class CameraOrthographic:
     """An orthographic camera containing properties to create an orthographic projection matrix."""
 
+    __slots__ = ('extensions', 'extras', 'xmag', 'ymag', 'zfar', 'znear')
+
     def __init__(self, extensions, extras, xmag, ymag, zfar, znear):
         self.extensions = extensions
         self.extras = extras
@@ -544,6 +567,8 @@ class CameraOrthographic:
 class CameraPerspective:
     """A perspective camera containing properties to create a perspective projection matrix."""
 
+    __slots__ = ('aspect_ratio', 'extensions', 'extras', 'yfov', 'zfar', 'znear')
+
     def __init__(self, aspect_ratio, extensions, extras, yfov, zfar, znear):
         self.aspect_ratio = aspect_ratio
         self.extensions = extensions
@@ -581,6 +606,8 @@ class Camera:
     camera in the scene.
     """
 
+    __slots__ = ('extensions', 'extras', 'name', 'orthographic', 'perspective', 'type')
+
     def __init__(self, extensions, extras, name, orthographic, perspective, type):
         self.extensions = extensions
         self.extras = extras
@@ -618,6 +645,8 @@ class Image:
     index. `mimeType` is required in the latter case.
     """
 
+    __slots__ = ('buffer_view', 'extensions', 'extras', 'mime_type', 'name', 'uri')
+
     def __init__(self, buffer_view, extensions, extras, mime_type, name, uri):
         self.buffer_view = buffer_view
         self.extensions = extensions
@@ -660,6 +689,8 @@ class TextureInfo:
     Reference to a texture.
     """
 
+    __slots__ = ('extensions', 'extras', 'index', 'tex_coord')
+
     def __init__(self, extensions, extras, index, tex_coord):
         self.extensions = extensions
         self.extras = extras
@@ -692,6 +723,8 @@ class MaterialNormalTextureInfoClass:
     Reference to a texture.
     """
 
+    __slots__ = ('extensions', 'extras', 'index', 'scale', 'tex_coord')
+
     def __init__(self, extensions, extras, index, scale, tex_coord):
         self.extensions = extensions
         self.extras = extras
@@ -727,6 +760,8 @@ class MaterialOcclusionTextureInfoClass:
     Reference to a texture.
     """
 
+    __slots__ = ('extensions', 'extras', 'index', 'strength', 'tex_coord')
+
     def __init__(self, extensions, extras, index, strength, tex_coord):
         self.extensions = extensions
         self.extras = extras
@@ -765,6 +800,9 @@ class MaterialPBRMetallicRoughness:
     from Physically-Based Rendering (PBR) methodology.
     """
 
+    __slots__ = ('base_color_factor', 'base_color_texture', 'extensions', 'extras', 'metallic_factor',
+                 'metallic_roughness_texture', 'roughness_factor')
+
     def __init__(self, base_color_factor, base_color_texture, extensions, extras, metallic_factor,
                  metallic_roughness_texture, roughness_factor):
         self.base_color_factor = base_color_factor
@@ -807,6 +845,9 @@ class MaterialPBRMetallicRoughness:
 class Material:
     """The material appearance of a primitive."""
 
+    __slots__ = ('alpha_cutoff', 'alpha_mode', 'double_sided', 'emissive_factor', 'emissive_texture', 'extensions',
+                 'extras', 'name', 'normal_texture', 'occlusion_texture', 'pbr_metallic_roughness')
+
     def __init__(self, alpha_cutoff, alpha_mode, double_sided, emissive_factor, emissive_texture, extensions, extras,
                  name, normal_texture, occlusion_texture, pbr_metallic_roughness):
         self.alpha_cutoff = alpha_cutoff
@@ -864,6 +905,8 @@ class Material:
 class MeshPrimitive:
     """Geometry to be rendered with the given material."""
 
+    __slots__ = ('attributes', 'extensions', 'extras', 'indices', 'material', 'mode', 'targets')
+
     def __init__(self, attributes, extensions, extras, indices, material, mode, targets):
         self.attributes = attributes
         self.extensions = extensions
@@ -905,6 +948,8 @@ class Mesh:
     places the mesh in the scene.
     """
 
+    __slots__ = ('extensions', 'extras', 'name', 'primitives', 'weights')
+
     def __init__(self, extensions, extras, name, primitives, weights):
         self.extensions = extensions
         self.extras = extras
@@ -945,6 +990,9 @@ class Node:
     may be present; `matrix` will not be present.
     """
 
+    __slots__ = ('camera', 'children', 'extensions', 'extras', 'matrix', 'mesh', 'name', 'rotation', 'scale', 'skin',
+                 'translation', 'weights')
+
     def __init__(self, camera, children, extensions, extras, matrix, mesh, name, rotation, scale, skin, translation,
                  weights):
         self.camera = camera
@@ -1000,6 +1048,8 @@ class Node:
 class Sampler:
     """Texture sampler properties for filtering and wrapping modes."""
 
+    __slots__ = ('extensions', 'extras', 'mag_filter', 'min_filter', 'name', 'wrap_s', 'wrap_t')
+
     def __init__(self, extensions, extras, mag_filter, min_filter, name, wrap_s, wrap_t):
         self.extensions = extensions
         self.extras = extras
@@ -1038,6 +1088,8 @@ class Sampler:
 class Scene:
     """The root nodes of a scene."""
 
+    __slots__ = ('extensions', 'extras', 'name', 'nodes')
+
     def __init__(self, extensions, extras, name, nodes):
         self.extensions = extensions
         self.extras = extras
@@ -1067,6 +1119,8 @@ class Scene:
 class Skin:
     """Joints and matrices defining a skin."""
 
+    __slots__ = ('extensions', 'extras', 'inverse_bind_matrices', 'joints', 'name', 'skeleton')
+
     def __init__(self, extensions, extras, inverse_bind_matrices, joints, name, skeleton):
         self.extensions = extensions
         self.extras = extras
@@ -1102,6 +1156,8 @@ class Skin:
 class Texture:
     """A texture and its sampler."""
 
+    __slots__ = ('extensions', 'extras', 'name', 'sampler', 'source')
+
     def __init__(self, extensions, extras, name, sampler, source):
         self.extensions = extensions
         self.extras = extras
@@ -1134,6 +1190,10 @@ class Texture:
 class Gltf:
     """The root object for a glTF asset."""
 
+    __slots__ = ('accessors', 'animations', 'asset', 'buffers', 'buffer_views', 'cameras', 'extensions',
+                 'extensions_required', 'extensions_used', 'extras', 'images', 'materials', 'meshes', 'nodes',
+                 'samplers', 'scene', 'scenes', 'skins', 'textures')
+
     def __init__(self, accessors, animations, asset, buffers, buffer_views, cameras, extensions, extensions_required,
                  extensions_used, extras, images, materials, meshes, nodes, samplers, scene, scenes, skins, textures):
         self.accessors = accessors
@@ -1220,3 +1280,40 @@ def gltf_from_dict(s):
 
 def gltf_to_dict(x):
     return to_class(Gltf, x)
+
+
+# Fields of each property class that can hold other properties, binary data, image data or extensions, as opposed to
+# fields that only ever hold numbers, strings or lists of them. Traversals of the property tree only need to visit
+# these fields.
+CHILD_FIELDS = {
+    AccessorSparseIndices: ('buffer_view', 'extensions', 'extras'),
+    AccessorSparseValues: ('buffer_view', 'extensions', 'extras'),
+    AccessorSparse: ('extensions', 'extras', 'indices', 'values'),
+    Accessor: ('buffer_view', 'extensions', 'extras', 'sparse'),
+    AnimationChannelTarget: ('extensions', 'extras', 'node'),
+    AnimationChannel: ('extensions', 'extras', 'sampler', 'target'),
+    AnimationSampler: ('extensions', 'extras', 'input', 'output'),
+    Animation: ('channels', 'extensions', 'extras', 'samplers'),
+    Asset: ('extensions', 'extras'),
+    BufferView: ('buffer', 'extensions', 'extras'),
+    Buffer: ('extensions', 'extras'),
+    CameraOrthographic: ('extensions', 'extras'),
+    CameraPerspective: ('extensions', 'extras'),
+    Camera: ('extensions', 'extras', 'orthographic', 'perspective'),
+    Image: ('buffer_view', 'extensions', 'extras', 'uri'),
+    TextureInfo: ('extensions', 'extras', 'index'),
+    MaterialNormalTextureInfoClass: ('extensions', 'extras', 'index'),
+    MaterialOcclusionTextureInfoClass: ('extensions', 'extras', 'index'),
+    MaterialPBRMetallicRoughness: ('base_color_texture', 'extensions', 'extras', 'metallic_roughness_texture'),
+    Material: ('emissive_texture', 'extensions', 'extras', 'normal_texture', 'occlusion_texture',
+               'pbr_metallic_roughness'),
+    MeshPrimitive: ('attributes', 'extensions', 'extras', 'indices', 'material', 'targets'),
+    Mesh: ('extensions', 'extras', 'primitives'),
+    Node: ('camera', 'children', 'extensions', 'extras', 'mesh', 'skin'),
+    Sampler: ('extensions', 'extras'),
+    Scene: ('extensions', 'extras', 'nodes'),
+    Skin: ('extensions', 'extras', 'inverse_bind_matrices', 'joints', 'skeleton'),
+    Texture: ('extensions', 'extras', 'sampler', 'source'),
+    Gltf: ('accessors', 'animations', 'asset', 'buffers', 'buffer_views', 'cameras', 'extensions', 'extras', 'images',
+           'materials', 'meshes', 'nodes', 'samplers', 'scenes', 'skins', 'textures')
+}
@@ -28,60 +28,23 @@ import re
 import os
 from ..com.gltf2_io_debug import print_console, print_newline
 from .gltf2_blender_gltf2_exporter import GlTF2Exporter
+from .gltf2_blender_gather_cache import ExportSession
+from . import gltf2_io_async_writer
 from . import gltf2_io_draco_compression_extension
+from . import gltf2_io_mesh_quantization_extension
 from .gltf2_io_user_extensions import export_user_extensions
 
 def save_ext_gltf(context, export_settings):
-    """Go through the collections and find the lods, export them one by one."""
-    
-    from . import gltf2_blender_export
-
-    lods = []
-    lod_pattern = re.compile("^x(\d+)", re.IGNORECASE)
-    filename_base, extension = os.path.splitext(export_settings['gltf_filepath'])
-    filename, extension = os.path.splitext(os.path.basename(export_settings['gltf_filepath']))
-
-    lod_model_export_settings = export_settings.copy()
-    
-    for collection in bpy.data.collections:
-        match = lod_pattern.match(collection.name)
-
-        if match:
-            #save collection name in export settings:
-            lod_model_export_settings['gltf_current_collection'] = collection.name
-
-            lod_id = "_LOD" + match.group(1)
-            lod_filename = filename_base+lod_id+extension
-            lods.append(lod_filename)
-
-            lod_model_export_settings['gltf_filepath'] = lod_filename
-            lod_model_export_settings['gltf_binaryfilename'] = filename+lod_id+'.bin'
-
-            
-            # Begin export process:
-            original_frame = bpy.context.scene.frame_current
-            if not lod_model_export_settings['gltf_current_frame']:
-                bpy.context.scene.frame_set(0)
-
-            gltf2_blender_export.__notify_start_ext_gltf(context)
-            start_time = time.time()
-            pre_export_callbacks = lod_model_export_settings["pre_export_callbacks"]
-            for callback in pre_export_callbacks:
-                callback(lod_model_export_settings)
-
-            json, buffer = __export_ext_gltf(lod_model_export_settings)
+    """
+    Go through the collections and find the lods, export them one by one.
 
-            post_export_callbacks = lod_model_export_settings["post_export_callbacks"]
-            for callback in post_export_callbacks:
-                callback(lod_model_export_settings)
-            gltf2_blender_export.__write_file_ext_gltf(json, buffer, lod_model_export_settings)
+    The files of each lod are written in the background, while the next lod is gathered.
+    """
+    found_lods = __find_lods(export_settings)
+    with gltf2_io_async_writer.AsyncWriter() as writer, \
+            ExportSession(export_settings, across_lods=len(found_lods) > 1):
+        lods = __export_lods(context, export_settings, found_lods, writer)
 
-            end_time = time.time()
-            gltf2_blender_export.__notify_end_ext_gltf(context, end_time - start_time)
-
-            if not lod_model_export_settings['gltf_current_frame']:
-                bpy.context.scene.frame_set(original_frame)
-            
     #save XML file if required:
     if export_settings['gltf_msfs_xml'] == True:
         from .msfs_xml_export import save_xml
@@ -105,16 +68,115 @@ def save_ext_gltf(context, export_settings):
         return{'CANCELLED'}
 
 
-def __export_ext_gltf(export_settings):
+def __find_lods(export_settings):
+    """
+    Find the lods of the collections, and the lods to generate from X00.
+
+    :return: the file name suffix, level, collection name and triangle ratio of each lod, in the order of export
+    """
+    lods = []
+    lod_pattern = re.compile("^x(\d+)", re.IGNORECASE)
+
+    base_collection = None
+    for collection in bpy.data.collections:
+        match = lod_pattern.match(collection.name)
+
+        if match:
+            level = int(match.group(1))
+            lods.append(("_LOD" + match.group(1), level, collection.name, 1.0))
+            if level == 0:
+                base_collection = (collection.name, len(match.group(1)))
+
+    #generate the missing lower lods from X00 by mesh simplification:
+    if export_settings['gltf_msfs_generate_lods'] and base_collection is not None:
+        levels = {level for _, level, _, _ in lods}
+        for level, ratio in enumerate(__parse_lod_ratios(export_settings['gltf_msfs_lod_ratios']), 1):
+            if level in levels:
+                continue
+
+            lods.append(("_LOD" + str(level).zfill(base_collection[1]), level, base_collection[0], ratio))
+
+    return lods
+
+
+def __export_lods(context, export_settings, found_lods, writer):
+    """Export the lods found by __find_lods. Return the file names, sorted by level if lods were generated."""
+    filename_base, extension = os.path.splitext(export_settings['gltf_filepath'])
+    filename, extension = os.path.splitext(os.path.basename(export_settings['gltf_filepath']))
+
+    lod_model_export_settings = export_settings.copy()
+
+    for lod_id, level, collection_name, ratio in found_lods:
+        #save collection name in export settings:
+        lod_model_export_settings['gltf_current_collection'] = collection_name
+        lod_model_export_settings['gltf_filepath'] = filename_base+lod_id+extension
+        lod_model_export_settings['gltf_binaryfilename'] = filename+lod_id+'.bin'
+        lod_model_export_settings['gltf_lod_ratio'] = ratio
+
+        __export_lod(context, lod_model_export_settings, writer)
+
+    if any(ratio < 1.0 for _, _, _, ratio in found_lods):
+        found_lods = sorted(found_lods, key=lambda lod: lod[1])
+
+    return [filename_base+lod_id+extension for lod_id, _, _, _ in found_lods]
+
+
+def __export_lod(context, lod_model_export_settings, writer):
+    from . import gltf2_blender_export
+
+    # Begin export process:
+    original_frame = bpy.context.scene.frame_current
+    if not lod_model_export_settings['gltf_current_frame']:
+        bpy.context.scene.frame_set(0)
+
+    gltf2_blender_export.__notify_start_ext_gltf(context)
+    start_time = time.time()
+    pre_export_callbacks = lod_model_export_settings["pre_export_callbacks"]
+    for callback in pre_export_callbacks:
+        callback(lod_model_export_settings)
+
+    # the lods are gathered with different settings: only results that do not depend on them are kept
+    lod_model_export_settings['gltf_export_session'].new_generation(lod_model_export_settings)
+    gltf, buffer = __export_ext_gltf(lod_model_export_settings, writer)
+
+    post_export_callbacks = lod_model_export_settings["post_export_callbacks"]
+    for callback in post_export_callbacks:
+        callback(lod_model_export_settings)
+    gltf2_blender_export.__write_file_ext_gltf(gltf, buffer, lod_model_export_settings, writer)
+
+    end_time = time.time()
+    gltf2_blender_export.__notify_end_ext_gltf(context, end_time - start_time)
+
+    if not lod_model_export_settings['gltf_current_frame']:
+        bpy.context.scene.frame_set(original_frame)
+
+
+def __parse_lod_ratios(lod_ratios):
+    """Triangle ratios of the generated lods, from a comma separated string."""
+    ratios = []
+    for value in lod_ratios.split(','):
+        try:
+            ratio = float(value)
+        except ValueError:
+            print_console('WARNING', 'Ignoring invalid LOD ratio: ' + value.strip())
+            continue
+        if 0.0 < ratio < 1.0:
+            ratios.append(ratio)
+        else:
+            print_console('WARNING', 'Ignoring LOD ratio outside of (0, 1): ' + value.strip())
+    return ratios
+
+
+def __export_ext_gltf(export_settings, writer):
     from . import gltf2_blender_export
 
     exporter = GlTF2Exporter(export_settings)
     __gather_ext_gltf(exporter, export_settings)
-    buffer = gltf2_blender_export.__create_buffer_ext_gltf(exporter, export_settings)
-    exporter.finalize_images()
-    json = gltf2_blender_export.__fix_json_ext_gltf(exporter.glTF.to_dict())
+    buffer = gltf2_blender_export.__create_buffer_ext_gltf(exporter, export_settings, writer)
+    exporter.finalize_images(writer)
+    gltf = exporter.glTF
 
-    return json, buffer
+    return gltf, buffer
 
 def __gather_ext_gltf(exporter, export_settings):
     from . import gltf2_blender_batch_gather
@@ -129,6 +191,10 @@ def __gather_ext_gltf(exporter, export_settings):
         gltf2_io_draco_compression_extension.compress_scene_primitives(scenes, export_settings)
         exporter.add_draco_extension()
 
+    if export_settings['gltf_mesh_quantization']:
+        gltf2_io_mesh_quantization_extension.quantize_scene_primitives(scenes, animations, export_settings)
+        exporter.add_mesh_quantization_extension()
+
     for idx, scene in enumerate(scenes):
         exporter.add_scene(scene, idx==active_scene_idx)
     for animation in animations:
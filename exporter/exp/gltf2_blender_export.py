@@ -31,11 +31,13 @@ import traceback
 from ..com import gltf2_blender_json
 from . import gltf2_blender_export_keys
 from . import gltf2_blender_gather
+from .gltf2_blender_gather_cache import ExportSession
 #from io_scene_gltf2.blender.exp import gltf2_blender_gather
 from .gltf2_blender_gltf2_exporter import GlTF2Exporter #replacing the original exporter here.
 from ..com.gltf2_io_debug import print_console, print_newline
 from . import gltf2_io_export
 from . import gltf2_io_draco_compression_extension
+from . import gltf2_io_mesh_quantization_extension
 from .gltf2_io_user_extensions import export_user_extensions
 
 
@@ -55,12 +57,13 @@ def save_ext_gltf(context, export_settings):
     for callback in pre_export_callbacks:
         callback(export_settings)
 
-    json, buffer = __export_ext_gltf(export_settings)
+    with ExportSession(export_settings):
+        gltf, buffer = __export_ext_gltf(export_settings)
 
     post_export_callbacks = export_settings["post_export_callbacks"]
     for callback in post_export_callbacks:
         callback(export_settings)
-    __write_file_ext_gltf(json, buffer, export_settings)
+    __write_file_ext_gltf(gltf, buffer, export_settings)
 
     end_time = time.time()
     __notify_end_ext_gltf(context, end_time - start_time)
@@ -81,9 +84,9 @@ def __export_ext_gltf(export_settings):
     __gather_ext_gltf(exporter, export_settings)
     buffer = __create_buffer_ext_gltf(exporter, export_settings)
     exporter.finalize_images()
-    json = __fix_json_ext_gltf(exporter.glTF.to_dict())
+    gltf = exporter.glTF
 
-    return json, buffer
+    return gltf, buffer
 
 
 def __gather_ext_gltf(exporter, export_settings):
@@ -97,14 +100,18 @@ def __gather_ext_gltf(exporter, export_settings):
         gltf2_io_draco_compression_extension.compress_scene_primitives(scenes, export_settings)
         exporter.add_draco_extension()
 
+    if export_settings['gltf_mesh_quantization']:
+        gltf2_io_mesh_quantization_extension.quantize_scene_primitives(scenes, animations, export_settings)
+        exporter.add_mesh_quantization_extension()
+
     for idx, scene in enumerate(scenes):
         exporter.add_scene(scene, idx==active_scene_idx)
     for animation in animations:
         exporter.add_animation(animation)
 
 
-def __create_buffer_ext_gltf(exporter, export_settings):
-    buffer = bytes()
+def __create_buffer_ext_gltf(exporter, export_settings, writer=None):
+    buffer = None
     if export_settings[gltf2_blender_export_keys.FORMAT] == 'GLB':
         buffer = exporter.finalize_buffer(export_settings[gltf2_blender_export_keys.FILE_DIRECTORY], is_glb=True)
     else:
@@ -112,52 +119,19 @@ def __create_buffer_ext_gltf(exporter, export_settings):
             exporter.finalize_buffer(export_settings[gltf2_blender_export_keys.FILE_DIRECTORY])
         else:
             exporter.finalize_buffer(export_settings[gltf2_blender_export_keys.FILE_DIRECTORY],
-                                     export_settings[gltf2_blender_export_keys.BINARY_FILENAME])
+                                     export_settings[gltf2_blender_export_keys.BINARY_FILENAME], writer=writer)
 
     return buffer
 
 
-def __fix_json_ext_gltf(obj):
-    # TODO: move to custom JSON encoder
-    fixed = obj
-    if isinstance(obj, dict):
-        fixed = {}
-        for key, value in obj.items():
-            if not __should_include_json_value_ext_gltf(key, value):
-                continue
-            fixed[key] = __fix_json_ext_gltf(value)
-    elif isinstance(obj, list):
-        fixed = []
-        for value in obj:
-            fixed.append(__fix_json_ext_gltf(value))
-    elif isinstance(obj, float):
-        # force floats to int, if they are integers (prevent INTEGER_WRITTEN_AS_FLOAT validator warnings)
-        if int(obj) == obj:
-            return int(obj)
-    return fixed
-
-
-def __should_include_json_value_ext_gltf(key, value):
-    allowed_empty_collections = ["KHR_materials_unlit"]
-
-    if value is None:
-        return False
-    elif __is_empty_collection_ext_gltf(value) and key not in allowed_empty_collections:
-        return False
-    return True
-
-
-def __is_empty_collection_ext_gltf(value):
-    return (isinstance(value, dict) or isinstance(value, list)) and len(value) == 0
-
-
-def __write_file_ext_gltf(json, buffer, export_settings):
+def __write_file_ext_gltf(gltf, buffer, export_settings, writer=None):
     try:
         gltf2_io_export.save_gltf(
-            json,
+            gltf,
             export_settings,
             gltf2_blender_json.BlenderJSONEncoder,
-            buffer)
+            buffer,
+            writer)
     except AssertionError as e:
         _, _, tb = sys.exc_info()
         traceback.print_tb(tb)  # Fixed format
@@ -37,6 +37,7 @@ FRAME_STEP = 'gltf_frame_step'
 JOINT_CACHE = 'gltf_joint_cache'
 COPYRIGHT = 'gltf_copyright'
 FORMAT = 'gltf_format'
+FILE_PATH = 'gltf_filepath'
 FILE_DIRECTORY = 'gltf_filedirectory'
 TEXTURE_DIRECTORY = 'gltf_texturedirectory'
 BINARY_FILENAME = 'gltf_binaryfilename'
@@ -57,6 +58,15 @@ EMBED_IMAGES = 'gltf_embed_images'
 BINARY = 'gltf_binary'
 EMBED_BUFFERS = 'gltf_embed_buffers'
 USE_NO_COLOR = 'gltf_use_no_color'
+EXTRACT_ENGINE = 'gltf_extract_engine'
+WELD_EPSILON = 'gltf_weld_epsilon'
+OPTIMIZE_VERTEX_CACHE = 'gltf_optimize_vertex_cache'
+LOD_RATIO = 'gltf_lod_ratio'
+JSON_VALIDATION = 'gltf_json_validation'
+EXPORT_SESSION = 'gltf_export_session'
+CACHE_REPORT = 'gltf_cache_report'
+PRIMITIVE_CACHE = 'gltf_primitive_cache'
+PRIMITIVE_CACHE_SIZE = 'gltf_primitive_cache_size'
 
 METALLIC_ROUGHNESS_IMAGE = "metallic_roughness_image"
 GROUP_INDEX = 'group_index'
@@ -152,7 +152,7 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
     """
     Extract primitives from a mesh. Polygons are triangulated and sorted by material.
 
-    Furthermore, primitives are split up, if the indices range is exceeded.
+    Primitives exceeding the UNSIGNED_SHORT indices range are split up afterwards, by partition_primitives.
     Finally, triangles are also split up/duplicated, if face normals are used instead of vertex normals.
     """
     print_console('INFO', 'Extracting primitive: ' + blender_mesh.name)
@@ -467,6 +467,13 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
                 joints.append([0, 0, 0, 0])
                 weights.append([0.0, 0.0, 0.0, 0.0])
 
+            # normalize first 4 weights, when not exporting all influences
+            if bone_max > 0 and not export_settings['gltf_all_vertex_influences']:
+                total = sum(weights[0])
+                if total > 0:
+                    factor = 1.0 / total
+                    weights[0] = [w * factor for w in weights[0]]
+
             #
 
             if morph_max > 0 and export_settings[gltf2_blender_export_keys.MORPH]:
@@ -0,0 +1,563 @@
+# Copyright 2018-2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import numpy as np
+
+from . import gltf2_blender_export_keys
+from . import gltf2_blender_gather_skins
+from .gltf2_blender_extract import (INDICES_ID, MATERIAL_ID, ATTRIBUTES_ID, COLOR_PREFIX, MORPH_TANGENT_PREFIX,
+                                    MORPH_NORMAL_PREFIX, MORPH_POSITION_PREFIX, TEXCOORD_PREFIX, WEIGHTS_PREFIX,
+                                    JOINTS_PREFIX, TANGENT_ATTRIBUTE, NORMAL_ATTRIBUTE, POSITION_ATTRIBUTE,
+                                    GLTF_MAX_COLORS)
+from ..com.gltf2_io_debug import print_console
+
+
+#
+# Classes
+#
+
+class MeshTransform:
+    """
+    Conversion of mesh data from Blender coordinate system to glTF coordinate system.
+
+    The matrices, including the armature transforms of skinned meshes and the Y-up swizzle, are computed
+    once per mesh, and then applied to whole arrays of vectors.
+    """
+
+    def __init__(self, armature, blender_object, export_settings):
+        if export_settings[gltf2_blender_export_keys.YUP]:
+            swizzle = np.array(((1.0, 0.0, 0.0), (0.0, 0.0, 1.0), (0.0, -1.0, 0.0)))
+        else:
+            swizzle = np.identity(3)
+
+        self.skinned = bool(armature) and bool(blender_object)
+        if self.skinned:
+            # Mesh is skinned, we have to apply armature transforms on data.
+            apply_matrix = armature.matrix_world.inverted() @ blender_object.matrix_world
+            location_matrix = np.array(armature.matrix_world @ apply_matrix, dtype=np.float64)
+            normal_matrix = np.array(armature.matrix_world.to_3x3() @ apply_matrix.to_3x3().inverted().transposed(),
+                                     dtype=np.float64)
+            tangent_matrix = np.array(apply_matrix.to_quaternion().to_matrix(), dtype=np.float64)
+        else:
+            location_matrix = np.identity(4)
+            normal_matrix = np.identity(3)
+            tangent_matrix = np.identity(3)
+
+        # Row vectors are multiplied from the left, so the matrices are stored transposed.
+        self.location_matrix = (swizzle @ location_matrix[:3, :3]).T
+        self.location_offset = swizzle @ location_matrix[:3, 3]
+        self.normal_matrix = (swizzle @ normal_matrix).T
+        self.tangent_matrix = (swizzle @ tangent_matrix).T
+
+    def locations(self, locations):
+        """Convert an array of locations."""
+        return (np.asarray(locations) @ self.location_matrix + self.location_offset).astype(np.float32)
+
+    def normals(self, normals):
+        """Convert an array of normals. Normals of skinned meshes are normalized after the transform."""
+        normals = np.asarray(normals) @ self.normal_matrix
+        if self.skinned:
+            lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+            normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths != 0.0)
+        return normals.astype(np.float32)
+
+    def directions(self, directions):
+        """Convert an array of directions, like tangents and bitangents, rotating them only."""
+        return (np.asarray(directions) @ self.tangent_matrix).astype(np.float32)
+
+    def tangents(self, tangents):
+        """Convert an array of tangents, with w set to 1."""
+        zero_tangents = np.count_nonzero(np.all(tangents == 0.0, axis=1))
+        if zero_tangents > 0:
+            print_console('WARNING', '{} tangents have zero length.'.format(zero_tangents))
+
+        result = np.ones((len(tangents), 4), dtype=np.float32)
+        result[:, :3] = self.directions(tangents)
+        return result
+
+
+#
+# Functions
+#
+
+def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vertex_groups, modifiers, export_settings):
+    """
+    Extract primitives from a mesh, reading the mesh data in bulk into NumPy arrays.
+
+    This is a drop-in replacement for gltf2_blender_extract.extract_primitives and returns primitives
+    in the same format, with flat NumPy arrays in place of lists. The later stages keep them as arrays, up to the
+    buffer views. Only attributes that are actually exported are extracted.
+    """
+    print_console('INFO', 'Extracting primitive: ' + blender_mesh.name)
+
+    if blender_mesh.has_custom_normals:
+        # Custom normals are all (0, 0, 0) until calling calc_normals_split() or calc_tangents().
+        blender_mesh.calc_normals_split()
+
+    use_tangents = False
+    blender_tangents = False
+    if export_settings[gltf2_blender_export_keys.TANGENTS] \
+            and blender_mesh.uv_layers.active and len(blender_mesh.uv_layers) > 0:
+        use_tangents = True
+        try:
+            blender_mesh.calc_tangents()
+            blender_tangents = True
+        except Exception:
+            # calc_tangents() only supports triangles and quads, compute them on the triangulated mesh instead.
+            print_console('INFO', 'Computing tangents from the triangulated mesh: ' + blender_mesh.name)
+
+    armature = __get_armature(modifiers)
+    transform = MeshTransform(armature, blender_object, export_settings)
+
+    #
+    # Bulk read of the mesh data.
+    #
+
+    vertex_co = __foreach_get(blender_mesh.vertices, 'co', np.float32, 3)
+    loop_vertex_index = __foreach_get(blender_mesh.loops, 'vertex_index', np.int32)
+    polygon_loop_start = __foreach_get(blender_mesh.polygons, 'loop_start', np.int32)
+    polygon_loop_total = __foreach_get(blender_mesh.polygons, 'loop_total', np.int32)
+    polygon_material_index = __foreach_get(blender_mesh.polygons, 'material_index', np.int32)
+
+    # Polygon owning each loop. Loops of a polygon are stored contiguously, in polygon order.
+    loop_polygon = np.repeat(np.arange(len(polygon_loop_start), dtype=np.int32), polygon_loop_total)
+
+    #
+    # Triangulation and assignment of triangles to materials.
+    #
+
+    triangle_loops, triangle_polygons = __triangulate(blender_mesh)
+
+    material_max = max(len(blender_mesh.materials), 1)
+    if export_settings['gltf_materials'] is False:
+        triangle_materials = np.zeros(len(triangle_polygons), dtype=np.int32)
+    else:
+        triangle_materials = polygon_material_index[triangle_polygons]
+        triangle_materials[triangle_materials >= material_max] = 0
+
+    corner_loops = triangle_loops.reshape(-1)
+    corner_polygons = np.repeat(triangle_polygons, 3)
+    corner_vertices = loop_vertex_index[corner_loops]
+    corner_materials = np.repeat(triangle_materials, 3)
+
+    #
+    # Per corner attributes, in glTF coordinate system.
+    #
+
+    attributes = []
+
+    positions = transform.locations(vertex_co)
+    attributes.append((POSITION_ATTRIBUTE, positions[corner_vertices]))
+
+    loop_normals = __get_loop_normals(blender_mesh, vertex_co, loop_vertex_index, loop_polygon)
+    normals = transform.normals(loop_normals[corner_loops])
+    attributes.append((NORMAL_ATTRIBUTE, normals))
+
+    tangents = None
+    if use_tangents:
+        if blender_tangents:
+            loop_tangents = __foreach_get(blender_mesh.loops, 'tangent', np.float32, 3)
+            loop_bitangents = __foreach_get(blender_mesh.loops, 'bitangent', np.float32, 3)
+        else:
+            loop_tangents, loop_bitangents = __compute_loop_tangents(blender_mesh, triangle_loops, vertex_co,
+                                                                     loop_vertex_index, loop_normals)
+        loop_tangents, loop_bitangents = __get_loop_tangents(blender_mesh, loop_tangents, loop_bitangents,
+                                                             loop_polygon, polygon_loop_start)
+        tangents = transform.tangents(loop_tangents[corner_loops])
+        bitangents = transform.directions(loop_bitangents[corner_loops])
+        flipped = np.einsum('ij,ij->i', np.cross(normals, tangents[:, :3]), bitangents) < 0.0
+        tangents[flipped, 3] = -1.0
+        attributes.append((TANGENT_ATTRIBUTE, tangents))
+
+    if export_settings[gltf2_blender_export_keys.TEX_COORDS] and blender_mesh.uv_layers.active:
+        for tex_coord_index, uv_layer in enumerate(blender_mesh.uv_layers):
+            uvs = __foreach_get(uv_layer.data, 'uv', np.float32, 2)[corner_loops]
+            uvs[:, 1] = 1.0 - uvs[:, 1]
+            attributes.append((TEXCOORD_PREFIX + str(tex_coord_index), uvs))
+
+    if export_settings[gltf2_blender_export_keys.COLORS]:
+        for color_index, vertex_color in enumerate(blender_mesh.vertex_colors):
+            if color_index >= GLTF_MAX_COLORS:
+                break
+            colors = __foreach_get(vertex_color.data, 'color', np.float32, 4)[corner_loops]
+            colors[:, :3] = __color_srgb_to_scene_linear(colors[:, :3])
+            attributes.append((COLOR_PREFIX + str(color_index), colors))
+
+    if export_settings[gltf2_blender_export_keys.SKINS]:
+        joints, weights = __get_vertex_skin_data(blender_mesh, blender_vertex_groups, armature, export_settings)
+        for bone_index in range(joints.shape[1] // 4):
+            attributes.append((JOINTS_PREFIX + str(bone_index),
+                               joints[corner_vertices, bone_index * 4:bone_index * 4 + 4]))
+            attributes.append((WEIGHTS_PREFIX + str(bone_index),
+                               weights[corner_vertices, bone_index * 4:bone_index * 4 + 4]))
+
+    if export_settings[gltf2_blender_export_keys.MORPH]:
+        attributes.extend(__get_morph_attributes(blender_mesh, positions, normals, tangents, corner_vertices,
+                                                 corner_polygons, transform))
+
+    #
+    # Split by material and eliminate duplicate vertices.
+    #
+
+    result_primitives = []
+    for material_idx in range(material_max):
+        material_corners = np.flatnonzero(corner_materials == material_idx)
+        if len(material_corners) == 0:
+            continue
+
+        indices, vertex_attributes = weld_vertices(corner_vertices[material_corners],
+                                                   [(name, values[material_corners]) for name, values in attributes],
+                                                   export_settings[gltf2_blender_export_keys.WELD_EPSILON])
+        result_primitives.append({
+            MATERIAL_ID: material_idx,
+            INDICES_ID: indices,
+            ATTRIBUTES_ID: {name: values.reshape(-1) for name, values in vertex_attributes}
+        })
+
+    print_console('INFO', 'Primitives created: ' + str(len(result_primitives)))
+
+    return result_primitives
+
+
+def __foreach_get(collection, attribute, dtype, components=1):
+    """Read an attribute of all items of a Blender collection into a NumPy array."""
+    array = np.empty(len(collection) * components, dtype=dtype)
+    collection.foreach_get(attribute, array)
+    if components > 1:
+        array = array.reshape(-1, components)
+    return array
+
+
+def __get_armature(modifiers):
+    if modifiers is not None:
+        modifiers_dict = {m.type: m for m in modifiers}
+        if "ARMATURE" in modifiers_dict:
+            return modifiers_dict["ARMATURE"].object
+    return None
+
+
+def __triangulate(blender_mesh):
+    """
+    Triangulate all polygons, using the loop triangles Blender keeps for the mesh.
+
+    :return: the loop indices of each triangle (Tx3) and the polygon each triangle belongs to (T)
+    """
+    blender_mesh.calc_loop_triangles()
+
+    triangle_loops = __foreach_get(blender_mesh.loop_triangles, 'loops', np.int32, 3)
+    triangle_polygons = __foreach_get(blender_mesh.loop_triangles, 'polygon_index', np.int32)
+
+    # Keep the polygon order of the mesh.
+    order = np.argsort(triangle_polygons, kind='stable')
+    return triangle_loops[order], triangle_polygons[order]
+
+
+def __get_loop_normals(blender_mesh, vertex_co, loop_vertex_index, loop_polygon):
+    """Normals of all loops, in Blender coordinate system."""
+    polygon_normals = __foreach_get(blender_mesh.polygons, 'normal', np.float32, 3)
+    polygon_smooth = __foreach_get(blender_mesh.polygons, 'use_smooth', np.bool_)
+
+    if blender_mesh.has_custom_normals:
+        smooth_normals = __foreach_get(blender_mesh.loops, 'normal', np.float32, 3)
+    else:
+        smooth_normals = __foreach_get(blender_mesh.vertices, 'normal', np.float32, 3)[loop_vertex_index]
+
+    if blender_mesh.use_auto_smooth:
+        return smooth_normals
+
+    loop_smooth = polygon_smooth[loop_polygon]
+    return np.where(loop_smooth[:, np.newaxis], smooth_normals, polygon_normals[loop_polygon])
+
+
+def __get_loop_tangents(blender_mesh, loop_tangents, loop_bitangents, loop_polygon, polygon_loop_start):
+    """Tangents and bitangents of all loops, in Blender coordinate system. Flat faces use the face average."""
+    if blender_mesh.use_auto_smooth:
+        return loop_tangents, loop_bitangents
+
+    polygon_smooth = __foreach_get(blender_mesh.polygons, 'use_smooth', np.bool_)
+    if np.all(polygon_smooth):
+        return loop_tangents, loop_bitangents
+
+    face_tangents = __normalize(np.add.reduceat(loop_tangents.astype(np.float64), polygon_loop_start))
+    face_bitangents = __normalize(np.add.reduceat(loop_bitangents.astype(np.float64), polygon_loop_start))
+
+    loop_smooth = polygon_smooth[loop_polygon][:, np.newaxis]
+    return (np.where(loop_smooth, loop_tangents, face_tangents[loop_polygon]),
+            np.where(loop_smooth, loop_bitangents, face_bitangents[loop_polygon]))
+
+
+def __compute_loop_tangents(blender_mesh, triangle_loops, vertex_co, loop_vertex_index, loop_normals):
+    """
+    Tangents and bitangents of all loops, in Blender coordinate system, computed from the triangulated mesh.
+
+    Used when calc_tangents() fails, which it does on polygons with more than four vertices. Like MikkTSpace,
+    the triangle tangents are summed over all corners sharing position, normal and UV of the active UV map,
+    then orthogonalized against the normal.
+    """
+    loop_uvs = __foreach_get(blender_mesh.uv_layers.active.data, 'uv', np.float32, 2)
+
+    positions = vertex_co.astype(np.float64)[loop_vertex_index[triangle_loops]]
+    uvs = loop_uvs.astype(np.float64)[triangle_loops]
+
+    edge1 = positions[:, 1] - positions[:, 0]
+    edge2 = positions[:, 2] - positions[:, 0]
+    delta1 = uvs[:, 1] - uvs[:, 0]
+    delta2 = uvs[:, 2] - uvs[:, 0]
+
+    determinant = delta1[:, 0] * delta2[:, 1] - delta2[:, 0] * delta1[:, 1]
+    scale = np.divide(1.0, determinant, out=np.zeros_like(determinant), where=determinant != 0.0)[:, np.newaxis]
+    triangle_tangents = (edge1 * delta2[:, 1:2] - edge2 * delta1[:, 1:2]) * scale
+    triangle_bitangents = (edge2 * delta1[:, 0:1] - edge1 * delta2[:, 0:1]) * scale
+
+    # Group the loops by position, normal and UV, and sum the tangents of their triangles.
+    group_key = np.empty(len(loop_vertex_index), dtype=[('vertex', np.int32), ('normal', np.float32, 3),
+                                                        ('uv', np.float32, 2)])
+    group_key['vertex'] = loop_vertex_index
+    group_key['normal'] = loop_normals + 0.0
+    group_key['uv'] = loop_uvs + 0.0
+    _, loop_groups = np.unique(group_key.view(np.dtype((np.void, group_key.dtype.itemsize))),
+                               return_inverse=True)
+    loop_groups = loop_groups.reshape(-1)
+
+    group_tangents = np.zeros((loop_groups.max(initial=-1) + 1, 3))
+    group_bitangents = np.zeros_like(group_tangents)
+    corner_groups = loop_groups[triangle_loops.reshape(-1)]
+    np.add.at(group_tangents, corner_groups, np.repeat(triangle_tangents, 3, axis=0))
+    np.add.at(group_bitangents, corner_groups, np.repeat(triangle_bitangents, 3, axis=0))
+
+    normals = loop_normals.astype(np.float64)
+    tangents = group_tangents[loop_groups]
+    tangents = __normalize(tangents - normals * np.einsum('ij,ij->i', normals, tangents)[:, np.newaxis])
+
+    # Blender defines the bitangent as sign * cross(normal, tangent).
+    bitangents = np.cross(normals, tangents)
+    flipped = np.einsum('ij,ij->i', bitangents, group_bitangents[loop_groups]) < 0.0
+    bitangents[flipped] = -bitangents[flipped]
+
+    return tangents.astype(np.float32), bitangents.astype(np.float32)
+
+
+def __normalize(vectors):
+    """Normalize rows, leaving zero length rows untouched."""
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths != 0.0)
+
+
+def __color_srgb_to_scene_linear(colors):
+    """Vectorized version of gltf2_io_color_management.color_srgb_to_scene_linear."""
+    colors = colors.astype(np.float64)
+    linear = np.where(colors < 0.0, 0.0, colors * (1.0 / 12.92))
+    curve = ((np.maximum(colors, 0.04045) + 0.055) * (1.0 / 1.055)) ** 2.4
+    return np.where(colors < 0.04045, linear, curve)
+
+
+def get_vertex_group_elements(blender_mesh):
+    """
+    Read the vertex group elements of all vertices, in one pass over the vertices.
+
+    :return: the vertex index, group index and weight of each element, as arrays
+    """
+    element_counts = []
+    element_groups = []
+    element_weights = []
+    for vertex in blender_mesh.vertices:
+        vertex_groups = vertex.groups
+        element_counts.append(len(vertex_groups))
+        for element in vertex_groups:
+            element_groups.append(element.group)
+            element_weights.append(element.weight)
+
+    element_vertices = np.repeat(np.arange(len(element_counts), dtype=np.int64),
+                                 np.array(element_counts, dtype=np.int64))
+    return element_vertices, np.array(element_groups, dtype=np.int64), np.array(element_weights, dtype=np.float32)
+
+
+def __get_vertex_skin_data(blender_mesh, blender_vertex_groups, armature, export_settings):
+    """
+    Joints and weights of all vertices.
+
+    The vertex group weights are gathered into a sparse vertex x group matrix, mapped to joints through a
+    table built once per skin, and the influences of each vertex are selected with array operations: the 4 with
+    the highest weight, normalized, or all of them in their original order for gltf_all_vertex_influences.
+
+    :return: two arrays of shape (vertex count, 4 * number of joint sets)
+    """
+    vertex_count = len(blender_mesh.vertices)
+
+    # Sparse matrix in coordinate format, one entry per vertex group element.
+    element_vertices, element_groups, element_weights = get_vertex_group_elements(blender_mesh)
+    if blender_vertex_groups is None or len(element_vertices) == 0:
+        return np.zeros((vertex_count, 0), dtype=np.uint16), np.zeros((vertex_count, 0), dtype=np.float32)
+
+    # Vertex group to joint table, -1 for groups that are not joints of the skin.
+    group_joints = np.full(len(blender_vertex_groups), -1, dtype=np.int64)
+    if armature:
+        skin_joints = gltf2_blender_gather_skins.gather_skin(armature, export_settings).joints
+        joint_indices = {}
+        for joint_index, joint in enumerate(skin_joints):
+            joint_indices.setdefault(joint.name, joint_index)
+        for group_index, vertex_group in enumerate(blender_vertex_groups):
+            group_joints[group_index] = joint_indices.get(vertex_group.name, -1)
+
+    valid = (element_weights > 0.0) & (element_groups >= 0) & (element_groups < len(blender_vertex_groups))
+    valid[valid] = group_joints[element_groups[valid]] >= 0
+    element_vertices = element_vertices[valid]
+    element_joints = group_joints[element_groups[valid]]
+    element_weights = element_weights[valid]
+
+    all_influences = export_settings['gltf_all_vertex_influences']
+    if not all_influences:
+        # Sort by weight descending within each vertex, keeping the group order for equal weights.
+        order = np.lexsort((-element_weights, element_vertices))
+        element_vertices = element_vertices[order]
+        element_joints = element_joints[order]
+        element_weights = element_weights[order]
+
+    # Rank of each influence within its vertex.
+    vertex_starts = np.searchsorted(element_vertices, np.arange(vertex_count))
+    element_ranks = np.arange(len(element_vertices)) - vertex_starts[element_vertices]
+
+    influence_max = int(element_ranks.max(initial=-1)) + 1
+    if all_influences:
+        bone_max = max((influence_max + 3) // 4, 1)
+    else:
+        if influence_max > 4:
+            print_console('WARNING', 'There are more than 4 joint vertex influences. '
+                                     'The 4 with highest weight will be used (and normalized).')
+        bone_max = 1
+        selected = element_ranks < 4
+        element_vertices = element_vertices[selected]
+        element_joints = element_joints[selected]
+        element_weights = element_weights[selected]
+        element_ranks = element_ranks[selected]
+
+    joints = np.zeros((vertex_count, bone_max * 4), dtype=np.uint16)
+    weights = np.zeros((vertex_count, bone_max * 4), dtype=np.float32)
+    joints[element_vertices, element_ranks] = element_joints
+    weights[element_vertices, element_ranks] = element_weights
+
+    if not all_influences:
+        totals = weights.sum(axis=1, keepdims=True)
+        weights = np.divide(weights, totals, out=weights, where=totals > 0.0)
+
+    return joints, weights
+
+
+def __get_morph_attributes(blender_mesh, positions, normals, tangents, corner_vertices, corner_polygons, transform):
+    """Morph target position and normal deltas, and morphed tangents, of all corners."""
+    attributes = []
+
+    if blender_mesh.shape_keys is None:
+        return attributes
+
+    blender_shape_keys = [
+        blender_shape_key for blender_shape_key in blender_mesh.shape_keys.key_blocks
+        if blender_shape_key != blender_shape_key.relative_key and blender_shape_key.mute is False
+    ]
+
+    corner_smooth = __foreach_get(blender_mesh.polygons, 'use_smooth', np.bool_)[corner_polygons]
+
+    for morph_index, blender_shape_key in enumerate(blender_shape_keys):
+        shape_key_co = __foreach_get(blender_shape_key.data, 'co', np.float32, 3)
+        target_positions = transform.locations(shape_key_co) - positions
+        attributes.append((MORPH_POSITION_PREFIX + str(morph_index), target_positions[corner_vertices]))
+
+        vertex_normals = np.array(blender_shape_key.normals_vertex_get(), dtype=np.float32).reshape(-1, 3)
+        polygon_normals = np.array(blender_shape_key.normals_polygon_get(), dtype=np.float32).reshape(-1, 3)
+        target_normals = np.where(corner_smooth[:, np.newaxis],
+                                  vertex_normals[corner_vertices],
+                                  polygon_normals[corner_polygons])
+        target_normals = transform.normals(target_normals) - normals
+        attributes.append((MORPH_NORMAL_PREFIX + str(morph_index), target_normals))
+
+        if tangents is not None:
+            target_tangents = __rotate_between(tangents[:, :3], target_normals, normals)
+            attributes.append((MORPH_TANGENT_PREFIX + str(morph_index), target_tangents))
+
+    return attributes
+
+
+def __rotate_between(vectors, from_directions, to_directions):
+    """
+    Rotate each vector by the shortest arc rotation from from_directions to to_directions.
+
+    Rows where a direction has zero length are left unrotated, like mathutils.Vector.rotation_difference.
+    """
+    a = __normalize(from_directions.astype(np.float64))
+    b = __normalize(to_directions.astype(np.float64))
+    v = vectors.astype(np.float64)
+
+    axis = np.cross(a, b)
+    cos_angle = np.einsum('ij,ij->i', a, b)[:, np.newaxis]
+    sin_angle_sq = np.einsum('ij,ij->i', axis, axis)[:, np.newaxis]
+
+    # Rodrigues' rotation formula with an unnormalized axis: |axis| = sin(angle).
+    factor = np.divide(1.0 - cos_angle, sin_angle_sq, out=np.zeros_like(cos_angle), where=sin_angle_sq > 1e-12)
+    rotated = v * cos_angle + np.cross(axis, v) + axis * np.einsum('ij,ij->i', axis, v)[:, np.newaxis] * factor
+
+    # Parallel or degenerate directions: no rotation.
+    unrotated = (sin_angle_sq <= 1e-12)[:, 0] & (cos_angle[:, 0] >= 0.0)
+    unrotated |= ~np.any(a, axis=1) | ~np.any(b, axis=1)
+    rotated[unrotated] = v[unrotated]
+    return rotated.astype(np.float32)
+
+
+def weld_vertices(vertex_indices, attributes, epsilon=0.0):
+    """
+    Weld the corners of a primitive into unique vertices.
+
+    Each corner is packed into a structured record of its vertex index and all its attribute values, and
+    duplicate records are found in a single sort. Float values closer than epsilon (on a grid of that size)
+    are considered equal; with an epsilon of 0, values must match exactly. Unique vertices are numbered in
+    the order of their first corner, and take the attribute values of that corner.
+
+    :param vertex_indices: the Blender vertex index of each corner
+    :param attributes: list of (name, array) tuples with one row of values per corner
+    :param epsilon: the welding tolerance for float attributes
+    :return: the remap table from corners to unique vertices, and the list of (name, array) tuples of the
+             unique vertex buffer
+    """
+    record_fields = [('vertex_index', np.int32)]
+    for field_index, (_, values) in enumerate(attributes):
+        values = values.reshape(len(values), -1)
+        key_type = np.int64 if epsilon > 0.0 and values.dtype.kind == 'f' else values.dtype
+        record_fields.append(('f' + str(field_index), key_type, (values.shape[1],)))
+
+    records = np.empty(len(vertex_indices), dtype=record_fields)
+    records['vertex_index'] = vertex_indices
+    for field_index, (_, values) in enumerate(attributes):
+        values = values.reshape(len(values), -1)
+        if values.dtype.kind != 'f':
+            records['f' + str(field_index)] = values
+        elif epsilon > 0.0:
+            records['f' + str(field_index)] = np.floor(values / epsilon + 0.5)
+        else:
+            # Adding zero turns -0.0 into 0.0, which compare equal.
+            records['f' + str(field_index)] = values + 0.0
+
+    keys = records.view(np.dtype((np.void, records.dtype.itemsize)))
+    _, first_corners, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    # np.unique numbers vertices in sorted order; renumber them in order of first occurrence.
+    order = np.argsort(first_corners, kind='stable')
+    new_index = np.empty(len(order), dtype=np.uint32)
+    new_index[order] = np.arange(len(order), dtype=np.uint32)
+    remap = new_index[inverse.reshape(-1)]
+    unique_corners = first_corners[order]
+
+    return remap, [(name, values[unique_corners]) for name, values in attributes]
@@ -89,7 +89,7 @@ def __gather_node(channels: typing.Tuple[bpy.types.FCurve],
                 obj = blender_object.proxy if blender_object.proxy else blender_object
                 return gltf2_blender_gather_joints.gather_joint(obj, blender_bone, export_settings)
             else:
-                bones, _, _ = gltf2_blender_gather_skins.get_bone_tree(None, blender_object)
+                bones, _, _ = gltf2_blender_gather_skins.get_bone_tree(None, blender_object, export_settings)
                 if blender_bone.name in [b.name for b in bones]:
                     obj = blender_object.proxy if blender_object.proxy else blender_object
                     return gltf2_blender_gather_joints.gather_joint(obj, blender_bone, export_settings)
@@ -19,9 +19,9 @@ from ..com.gltf2_blender_data_path import get_target_object_path, get_target_pro
 from ..com import gltf2_io
 from ..com import gltf2_io_debug
 from .gltf2_blender_gather_cache import cached
+from .gltf2_blender_export_keys import EXPORT_SESSION
 from . import gltf2_blender_gather_animation_samplers
 from . import gltf2_blender_gather_animation_channel_target
-from . import gltf2_blender_gather_animation_sampler_keyframes
 from . import gltf2_blender_get
 from . import gltf2_blender_gather_skins
 from . import gltf2_blender_gather_drivers
@@ -66,7 +66,7 @@ def gather_animation_channels(blender_action: bpy.types.Action,
         if export_settings["gltf_def_bones"] is False:
             bones_to_be_animated = blender_object.data.bones
         else:
-            bones_to_be_animated, _, _ = gltf2_blender_gather_skins.get_bone_tree(None, blender_object)
+            bones_to_be_animated, _, _ = gltf2_blender_gather_skins.get_bone_tree(None, blender_object, export_settings)
             bones_to_be_animated = [blender_object.pose.bones[b.name] for b in bones_to_be_animated]
 
         for bone in bones_to_be_animated:
@@ -98,7 +98,7 @@ def gather_animation_channels(blender_action: bpy.types.Action,
 
         # Retrieve channels for drivers, if needed
         obj_driver = blender_object.proxy if blender_object.proxy else blender_object
-        drivers_to_manage = gltf2_blender_gather_drivers.get_sk_drivers(obj_driver)
+        drivers_to_manage = gltf2_blender_gather_drivers.get_sk_drivers(obj_driver, export_settings)
         for obj, fcurves in drivers_to_manage:
             channel = __gather_animation_channel(
                 fcurves,
@@ -124,10 +124,9 @@ def gather_animation_channels(blender_action: bpy.types.Action,
 
 
     # resetting driver caches
-    gltf2_blender_gather_drivers.get_sk_driver_values.reset_cache()
-    gltf2_blender_gather_drivers.get_sk_drivers.reset_cache()
-    # resetting bone caches
-    gltf2_blender_gather_animation_sampler_keyframes.get_bone_matrix.reset_cache()
+    export_settings[EXPORT_SESSION].drop_cache(gltf2_blender_gather_drivers.get_sk_driver_values)
+    export_settings[EXPORT_SESSION].drop_cache(gltf2_blender_gather_drivers.get_sk_drivers)
+    # the baked bones are kept for the channels of other actions, until the generation of the export session ends
 
     return channels
 
@@ -14,6 +14,7 @@
 
 import bpy
 import mathutils
+import numpy as np
 import typing
 
 from .gltf2_blender_gather_cache import cached, bonecache
@@ -131,6 +132,26 @@ class Keyframe:
 
 
 
+class BakedBones:
+    """The matrices of all pose bones of an armature, baked for a range of frames, in one float32 array."""
+
+    def __init__(self, frames, bone_names):
+        self.__frame_indices = {frame: index for index, frame in enumerate(frames)}
+        self.__bone_indices = {bone_name: index for index, bone_name in enumerate(bone_names)}
+        # Blender stores matrices as float32, so nothing is lost
+        self.matrices = np.empty((len(frames), len(bone_names), 4, 4), dtype=np.float32)
+
+    @property
+    def nbytes(self):
+        return self.matrices.nbytes
+
+    def set_matrix(self, frame, bone_name, matrix: mathutils.Matrix):
+        self.matrices[self.__frame_indices[frame], self.__bone_indices[bone_name]] = matrix
+
+    def matrix(self, frame, bone_name) -> mathutils.Matrix:
+        return mathutils.Matrix(self.matrices[self.__frame_indices[frame], self.__bone_indices[bone_name]].tolist())
+
+
 @bonecache
 def get_bone_matrix(blender_object_if_armature: typing.Optional[bpy.types.Object],
                      channels: typing.Tuple[bpy.types.FCurve],
@@ -140,39 +161,41 @@ def get_bone_matrix(blender_object_if_armature: typing.Optional[bpy.types.Object
                      bake_range_end,
                      action_name: str,
                      current_frame: int,
-                     step: int
+                     step: int,
+                     export_settings
                      ):
 
-    data = {}
-
     # Always using bake_range, because some bones may need to be baked,
     # even if user didn't request it
 
     start_frame = bake_range_start
     end_frame = bake_range_end
 
-
+    frames = []
     frame = start_frame
     while frame <= end_frame:
-        data[frame] = {}
+        frames.append(frame)
+        frame += step
+
+    data = BakedBones(frames, [pbone.name for pbone in blender_object_if_armature.pose.bones])
+
+    for frame in frames:
         # we need to bake in the constraints
         bpy.context.scene.frame_set(frame)
         for pbone in blender_object_if_armature.pose.bones:
             if bake_bone is None:
-                matrix = pbone.matrix_basis.copy()
+                matrix = pbone.matrix_basis
             else:
                 matrix = pbone.matrix
                 matrix = blender_object_if_armature.convert_space(pose_bone=pbone, matrix=matrix, from_space='POSE', to_space='LOCAL')
-            data[frame][pbone.name] = matrix
+            data.set_matrix(frame, pbone.name, matrix)
 
 
         # If some drivers must be evaluated, do it here, to avoid to have to change frame by frame later
         obj_driver = blender_object_if_armature.proxy if blender_object_if_armature.proxy else blender_object_if_armature
-        drivers_to_manage = get_sk_drivers(obj_driver)
+        drivers_to_manage = get_sk_drivers(obj_driver, export_settings)
         for dr_obj, dr_fcurves in drivers_to_manage:
-            vals = get_sk_driver_values(dr_obj, frame, dr_fcurves)
-
-        frame += step
+            vals = get_sk_driver_values(dr_obj, frame, dr_fcurves, export_settings)
 
     return data
 
@@ -231,7 +254,8 @@ def gather_keyframes(blender_object_if_armature: typing.Optional[bpy.types.Objec
                     bake_range_end,
                     action_name,
                     frame,
-                    step
+                    step,
+                    export_settings
                 )
                 trans, rot, scale = mat.decompose()
 
@@ -252,7 +276,7 @@ def gather_keyframes(blender_object_if_armature: typing.Optional[bpy.types.Objec
                     key.value = [c.evaluate(frame) for c in channels if c is not None]
                     complete_key(key, non_keyed_values)
                 else:
-                    key.value = get_sk_driver_values(driver_obj, frame, channels)
+                    key.value = get_sk_driver_values(driver_obj, frame, channels, export_settings)
                     complete_key(key, non_keyed_values)
             keyframes.append(key)
             frame += step
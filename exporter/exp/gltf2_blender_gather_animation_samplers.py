@@ -20,7 +20,7 @@ import mathutils
 from ..com import gltf2_blender_math
 from ..com.gltf2_blender_data_path import get_target_property_name, get_target_object_path
 from . import gltf2_blender_gather_animation_sampler_keyframes
-from .gltf2_blender_gather_cache import cached
+from .gltf2_blender_gather_cache import cached, cached_across_lods
 from . import gltf2_blender_gather_accessors
 from . import gltf2_blender_get
 from ..com import gltf2_io
@@ -30,7 +30,7 @@ from . import gltf2_blender_export_keys
 from .gltf2_io_user_extensions import export_user_extensions
 
 
-@cached
+@cached_across_lods
 def gather_animation_sampler(channels: typing.Tuple[bpy.types.FCurve],
                              blender_object: bpy.types.Object,
                              bake_bone: typing.Union[str, None],
@@ -239,13 +239,16 @@ def __gather_input(channels: typing.Tuple[bpy.types.FCurve],
                                                                                   driver_obj,
                                                                                   export_settings)
     times = [k.seconds for k in keyframes]
+    binary_data = gltf2_io_binary_data.BinaryData.from_list(times, gltf2_io_constants.ComponentType.Float,
+                                                            gltf2_io_constants.DataType.Scalar)
+    times_min, times_max = binary_data.min_max()
 
     return gltf2_blender_gather_accessors.gather_accessor(
-        gltf2_io_binary_data.BinaryData.from_list(times, gltf2_io_constants.ComponentType.Float),
+        binary_data,
         gltf2_io_constants.ComponentType.Float,
         len(times),
-        tuple([max(times)]),
-        tuple([min(times)]),
+        times_max,
+        times_min,
         gltf2_io_constants.DataType.Scalar,
         export_settings
     )
@@ -397,7 +400,7 @@ def __gather_output(channels: typing.Tuple[bpy.types.FCurve],
         data_type = gltf2_io_constants.DataType.vec_type_from_num(len(keyframes[0].value))
 
     return gltf2_io.Accessor(
-        buffer_view=gltf2_io_binary_data.BinaryData.from_list(values, component_type),
+        buffer_view=gltf2_io_binary_data.BinaryData.from_list(values, component_type, data_type),
         byte_offset=None,
         component_type=component_type,
         count=len(values) // gltf2_io_constants.DataType.num_elements(data_type),
@@ -196,19 +196,16 @@ def __link_samplers(animation: gltf2_io.Animation, export_settings):
     :param export_settings:
     :return:
     """
-    # TODO: move this to some util module and update gltf2 exporter also
-    T = typing.TypeVar('T')
-
-    def __append_unique_and_get_index(l: typing.List[T], item: T):
-        if item in l:
-            return l.index(item)
-        else:
-            index = len(l)
-            l.append(item)
-            return index
+    # samplers are compared by identity, so index them by id instead of searching the list for each channel
+    sampler_indices = {id(sampler): index for index, sampler in enumerate(animation.samplers)}
 
     for i, channel in enumerate(animation.channels):
-        animation.channels[i].sampler = __append_unique_and_get_index(animation.samplers, channel.sampler)
+        index = sampler_indices.get(id(channel.sampler))
+        if index is None:
+            index = len(animation.samplers)
+            animation.samplers.append(channel.sampler)
+            sampler_indices[id(channel.sampler)] = index
+        animation.channels[i].sampler = index
 
 
 def __get_blender_actions(blender_object: bpy.types.Object,
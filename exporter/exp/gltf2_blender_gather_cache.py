@@ -12,69 +12,363 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import functools
+import json
+import os
+import sys
+import time
 import bpy
+import numpy as np
 from . import gltf2_blender_get
+from . import gltf2_io_primitive_cache
+from .gltf2_blender_export_keys import EXPORT_SESSION, CACHE_REPORT, FILE_PATH, PRIMITIVE_CACHE, \
+    PRIMITIVE_CACHE_SIZE
+from ..com.gltf2_io_debug import print_console
+
+# Blender types that are cached by name, since their Python objects are not stable.
+__BY_NAME = frozenset([bpy.types.Object, bpy.types.Scene, bpy.types.Material, bpy.types.Action, bpy.types.Mesh,
+                       bpy.types.PoseBone])
+
+# Bytes of baked bone matrices kept by bonecache, over all armatures and actions.
+BONE_CACHE_SIZE = 256 * 1024 * 1024
+
+# Settings that differ between the lods of a batch export. Results of functions cached across lods do not depend on
+# them.
+LOD_SETTINGS = frozenset(['gltf_current_collection', 'gltf_filepath', 'gltf_binaryfilename', 'gltf_lod_ratio'])
+
+# Objects of classes from these modules are followed when the size of a cache is estimated. Other objects, such as
+# Blender data, are counted by their own size only.
+__SIZED_MODULES = __package__.rsplit('.', 1)[0] + '.'
+
+
+class CacheStatistics:
+    """
+    Use of the cache of a gather function over an export: hits, misses, the time spent computing the misses, and
+    the largest number of entries and estimated bytes the cache held. Hits of results gathered for a previous lod
+    are included in the hits, and also counted as lod hits.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.measure_sizes = False
+        self.clear()
+
+    def clear(self):
+        self.hits = 0
+        self.lod_hits = 0
+        self.misses = 0
+        self.miss_time = 0.0
+        self.entries = 0
+        self.retained_bytes = 0
+
+    def record_cache(self, entries, cache):
+        """Record the size of a cache, before it is dropped."""
+        self.entries = max(self.entries, entries)
+        if self.measure_sizes:
+            self.retained_bytes = max(self.retained_bytes, estimate_size(cache))
+
+    @property
+    def time_saved(self):
+        """Estimated time the hits saved, if each one had cost as much as an average miss."""
+        return self.hits * self.miss_time / self.misses if self.misses > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'hits': self.hits,
+            'lodHits': self.lod_hits,
+            'misses': self.misses,
+            'entries': self.entries,
+            'retainedBytes': self.retained_bytes,
+            'missTime': self.miss_time,
+            'timeSaved': self.time_saved
+        }
+
+
+class ExportSession:
+    """
+    Owner of the gather caches of an export.
+
+    The session is stored in the export settings, where the cached functions find it, and holds one cache per
+    function, the caches of the decorators of bone matrices and shape key drivers included. Nothing is cached outside
+    of a session, so nothing is kept from one export to the next.
+
+    Each generation of the session has its own caches. A new generation is started when the export settings change,
+    such as for each lod of a batch export. The caches of the previous generation are dropped at once, instead of
+    the export settings being compared on every call.
+
+    In a batch export of several lods, results of functions cached across lods are also kept over generations, as
+    long as only the settings of the lods change. Since the traversal of the glTF replaces the properties referenced
+    by a result with indices, a result is kept as a snapshot taken when it is gathered, and each generation gets a
+    copy of the snapshot. The snapshots, and the copies within a generation, are made with one memo each, so that
+    properties referenced by several results stay shared between them. A copy made in the current generation is
+    snapshotted as the snapshot it was copied from: a skin gathered after its joints references their snapshots,
+    without the nodes parented to the bones since.
+
+    The session also keeps the statistics of its caches, which are reported when it is closed, depending on the
+    cache report setting. Closing the session also trims the persistent primitive cache to its size limit.
+    """
+
+    def __init__(self, export_settings, across_lods=False):
+        self.__export_settings = export_settings
+        self.__report = export_settings[CACHE_REPORT]
+        self.__caches = {}
+        self.__statistics = {}
+        self.across_lods = across_lods
+        self.__invariant_settings = self.__lod_invariant_settings(export_settings)
+        self.__snapshots = {}
+        self.__snapshot_memo = {}
+        self.__copy_memo = {}
+        self.__entered_copies = 0
+
+    def cache(self, func):
+        """Return the cache of a function in the current generation."""
+        cache = self.__caches.get(func)
+        if cache is None:
+            cache = self.__caches[func] = {}
+        return cache
+
+    def snapshots(self, func):
+        """Return the snapshots of the results of a function cached across lods."""
+        snapshots = self.__snapshots.get(func)
+        if snapshots is None:
+            snapshots = self.__snapshots[func] = {}
+        return snapshots
+
+    def take_snapshot(self, result):
+        """Take a snapshot of a result, before it is changed by the traversal."""
+        return copy.deepcopy(result, self.__snapshot_memo)
+
+    def copy_snapshot(self, snapshot):
+        """Copy a snapshot for the current generation."""
+        result = copy.deepcopy(snapshot, self.__copy_memo)
+        # Later snapshots of the copies, as parts of other results, are the snapshots they were copied from. deepcopy
+        # keeps the objects it copied in a list in its memo, under the id of the memo.
+        originals = self.__copy_memo.get(id(self.__copy_memo), [])
+        for original in originals[self.__entered_copies:]:
+            self.__snapshot_memo[id(self.__copy_memo[id(original)])] = original
+        self.__entered_copies = len(originals)
+        return result
+
+    def drop_cache(self, func):
+        """
+        Drop the cache of a function in the current generation, when its results are not valid anymore.
+
+        The function can also be given decorated, the way other modules import it.
+        """
+        func = getattr(func, '__wrapped__', func)
+        cache = self.__caches.pop(func, None)
+        if cache is not None:
+            self.statistics(func).record_cache(len(cache), cache)
+
+    def statistics(self, func):
+        """Return the statistics of the cache of a function, over all generations."""
+        statistics = self.__statistics.get(func)
+        if statistics is None:
+            statistics = self.__statistics[func] = CacheStatistics(cache_name(func))
+            statistics.measure_sizes = self.__report != 'NONE'
+        return statistics
+
+    def new_generation(self, export_settings=None):
+        """
+        Drop the caches, starting a new generation of the session.
+
+        The results cached across lods are kept if the export settings of the new generation differ from those the
+        session was created with only in the settings of the lods.
+        """
+        self.__record_caches()
+        self.__caches = {}
+        self.__drop_copies()
+        invariant_settings = self.__lod_invariant_settings(export_settings) if export_settings is not None else None
+        if invariant_settings is None or invariant_settings != self.__invariant_settings:
+            self.__snapshots = {}
+            self.__snapshot_memo = {}
+            self.__invariant_settings = invariant_settings
+
+    def close(self):
+        self.__record_caches()
+        self.__caches = {}
+        self.__drop_copies()
+        self.__snapshots = {}
+        self.__snapshot_memo = {}
+        if self.__report != 'NONE':
+            self.report()
+        if self.__export_settings[PRIMITIVE_CACHE] is not None:
+            gltf2_io_primitive_cache.prune(self.__export_settings[PRIMITIVE_CACHE],
+                                           self.__export_settings[PRIMITIVE_CACHE_SIZE])
+        if self.__export_settings.get(EXPORT_SESSION) is self:
+            del self.__export_settings[EXPORT_SESSION]
+
+    def report(self):
+        """Print the statistics of all caches, and write them as JSON next to the output if requested."""
+        statistics = [statistics for statistics in self.__statistics.values()
+                      if statistics.hits > 0 or statistics.misses > 0 or statistics.entries > 0]
+        statistics.sort(key=lambda statistics: statistics.miss_time, reverse=True)
+
+        print_console('INFO', 'Gather cache statistics:')
+        for s in statistics:
+            print_console('INFO', '{}: {} hits ({} across lods), {} misses, {} entries, ~{} bytes, '
+                                  '{:.3f} s computing misses, ~{:.3f} s saved'.format(
+                                      s.name, s.hits, s.lod_hits, s.misses, s.entries, s.retained_bytes, s.miss_time,
+                                      s.time_saved))
+
+        if self.__report == 'JSON':
+            path = os.path.splitext(self.__export_settings[FILE_PATH])[0] + '_cache_statistics.json'
+            with open(path, 'w') as f:
+                json.dump([s.to_dict() for s in statistics], f, indent=4)
+            print_console('INFO', 'Cache statistics written to ' + path)
+
+    @staticmethod
+    def __lod_invariant_settings(export_settings):
+        return {key: value for key, value in export_settings.items()
+                if key not in LOD_SETTINGS and key != EXPORT_SESSION}
+
+    def __drop_copies(self):
+        for original in self.__copy_memo.get(id(self.__copy_memo), []):
+            self.__snapshot_memo.pop(id(self.__copy_memo[id(original)]), None)
+        self.__copy_memo = {}
+        self.__entered_copies = 0
+
+    def __record_caches(self):
+        for func, cache in self.__caches.items():
+            self.statistics(func).record_cache(len(cache), cache)
+
+    def __enter__(self):
+        self.__export_settings[EXPORT_SESSION] = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+def estimate_size(obj):
+    """
+    Estimate the bytes held by an object and the objects it references, each counted once.
+
+    Containers, objects of the classes of the exporter, and the data of NumPy arrays and memory views are followed.
+    """
+    seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        size += sys.getsizeof(obj)
+
+        # arrays that own their data include it in their size, views are followed to the object holding the data
+        if isinstance(obj, np.ndarray):
+            if obj.base is not None:
+                stack.append(obj.base)
+        elif isinstance(obj, memoryview):
+            stack.append(obj.obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif type(obj).__module__.startswith(__SIZED_MODULES):
+            for slot in getattr(type(obj), '__slots__', ()):
+                stack.append(getattr(obj, slot, None))
+            stack.extend(getattr(obj, '__dict__', {}).values())
+    return size
+
+
+def cache_name(func):
+    return func.__module__.rsplit('.', 1)[-1] + '.' + func.__name__
+
+
+def __cache_key(args, kwargs):
+    """Return the export settings and the cache key of the arguments of a cached function."""
+    assert len(args) >= 2 and 0 <= len(kwargs) <= 1, "Wrong signature for cached function"
+    # 'export_settings' is not part of the key
+    if "export_settings" in kwargs:
+        export_settings = kwargs["export_settings"]
+        key_args = args
+    else:
+        export_settings = args[-1]
+        key_args = args[:-1] + tuple(kwargs.values())
+
+    # we make a tuple from the function arguments so that they can be used as a key to the cache
+    return export_settings, tuple([arg.name if type(arg) in __BY_NAME else arg for arg in key_args])
 
 
 def cached(func):
     """
     Decorate the cache gather functions results.
 
-    The gather function is only executed if its result isn't in the cache yet
-    :param func: the function to be decorated. It will have a static __cache member afterwards
+    The gather function is only executed if its result isn't in the cache of the export session yet
+    :param func: the function to be decorated
     :return:
     """
     @functools.wraps(func)
     def wrapper_cached(*args, **kwargs):
-        assert len(args) >= 2 and 0 <= len(kwargs) <= 1, "Wrong signature for cached function"
-        cache_key_args = args
-        # make a shallow copy of the keyword arguments so that 'export_settings' can be removed
-        cache_key_kwargs = dict(kwargs)
-        if kwargs.get("export_settings"):
-            export_settings = kwargs["export_settings"]
-            # 'export_settings' should not be cached
-            del cache_key_kwargs["export_settings"]
-        else:
-            export_settings = args[-1]
-            cache_key_args = args[:-1]
-
-        __by_name = [bpy.types.Object, bpy.types.Scene, bpy.types.Material, bpy.types.Action, bpy.types.Mesh, bpy.types.PoseBone]
-
-        # we make a tuple from the function arguments so that they can be used as a key to the cache
-        cache_key = ()
-        for i in cache_key_args:
-            if type(i) in __by_name:
-                cache_key += (i.name,)
-            else:
-                cache_key += (i,)
-        for i in cache_key_kwargs.values():
-            if type(i) in __by_name:
-                cache_key += (i.name,)
-            else:
-                cache_key += (i,)
-
-        # invalidate cache if export settings have changed
-        if not hasattr(func, "__export_settings") or export_settings != func.__export_settings:
-            func.__cache = {}
-            func.__export_settings = export_settings
+        export_settings, cache_key = __cache_key(args, kwargs)
+
         # use or fill cache
-        if cache_key in func.__cache:
-            return func.__cache[cache_key]
+        session = export_settings[EXPORT_SESSION]
+        cache = session.cache(func)
+        statistics = session.statistics(func)
+        if cache_key in cache:
+            statistics.hits += 1
+            return cache[cache_key]
         else:
-            result = func(*args)
-            func.__cache[cache_key] = result
+            start_time = time.perf_counter()
+            result = func(*args, **kwargs)
+            statistics.miss_time += time.perf_counter() - start_time
+            statistics.misses += 1
+            cache[cache_key] = result
             return result
     return wrapper_cached
 
-def bonecache(func):
+def cached_across_lods(func):
+    """
+    Decorate gather functions whose results are the same for all lods of a batch export, such as materials.
 
-    def reset_cache_bonecache():
-        func.__current_action_name = None
-        func.__current_armature_name = None
-        func.__bonecache = {}
+    Within a generation, the results are cached like those of cached functions. If the export session is for
+    several lods, results gathered in a previous generation are copied from their snapshots, if the session kept
+    them.
+    :param func: the function to be decorated
+    :return:
+    """
+    @functools.wraps(func)
+    def wrapper_cached_across_lods(*args, **kwargs):
+        export_settings, cache_key = __cache_key(args, kwargs)
+
+        session = export_settings[EXPORT_SESSION]
+        cache = session.cache(func)
+        statistics = session.statistics(func)
+        if cache_key in cache:
+            statistics.hits += 1
+            return cache[cache_key]
+
+        snapshots = session.snapshots(func) if session.across_lods else None
+        if snapshots is not None and cache_key in snapshots:
+            statistics.hits += 1
+            statistics.lod_hits += 1
+            result = session.copy_snapshot(snapshots[cache_key])
+        else:
+            start_time = time.perf_counter()
+            result = func(*args, **kwargs)
+            statistics.miss_time += time.perf_counter() - start_time
+            statistics.misses += 1
+            if snapshots is not None:
+                snapshots[cache_key] = session.take_snapshot(result)
+        cache[cache_key] = result
+        return result
+    return wrapper_cached_across_lods
 
-    func.reset_cache = reset_cache_bonecache
+def bonecache(func):
+    """
+    Decorate get_bone_matrix, which bakes the matrices of all bones of an armature for all frames of a range.
+
+    The baked bones of several armatures, actions, ranges and steps are kept in the cache of the export session, up
+    to BONE_CACHE_SIZE bytes in total, so that channels of different armatures or actions do not bake the frames
+    again when they are gathered alternately. The least recently used baked bones are dropped first.
+    """
 
     @functools.wraps(func)
     def wrapper_bonecache(*args, **kwargs):
@@ -84,16 +378,30 @@ def bonecache(func):
         else:
             pose_bone_if_armature = args[0].pose.bones[args[2]]
 
-        if not hasattr(func, "__current_action_name"):
-            func.reset_cache()
-        if args[6] != func.__current_action_name or args[0] != func.__current_armature_name:
-            result = func(*args)
-            func.__bonecache = result
-            func.__current_action_name = args[6]
-            func.__current_armature_name = args[0]
-            return result[args[7]][pose_bone_if_armature.name]
+        session = args[-1][EXPORT_SESSION]
+        cache = session.cache(func)
+        statistics = session.statistics(func)
+
+        # armature, action, bake range, step, and whether the basis or the local matrices are baked
+        cache_key = (args[0].name, args[6], args[4], args[5], args[8], args[2] is None)
+        baked_bones = cache.pop(cache_key, None)
+        if baked_bones is not None:
+            statistics.hits += 1
+            # dictionaries keep the order of insertion: once inserted again, the baked bones are the most recently used
+            cache[cache_key] = baked_bones
         else:
-            return func.__bonecache[args[7]][pose_bone_if_armature.name]
+            start_time = time.perf_counter()
+            baked_bones = func(*args)
+            statistics.miss_time += time.perf_counter() - start_time
+            statistics.misses += 1
+
+            cache[cache_key] = baked_bones
+            statistics.record_cache(len(cache), cache)
+            # the baked bones just added are kept, even if they alone are larger than the cache
+            cache_bytes = sum(cached_bones.nbytes for cached_bones in cache.values())
+            while cache_bytes > BONE_CACHE_SIZE and len(cache) > 1:
+                cache_bytes -= cache.pop(next(iter(cache))).nbytes
+        return baked_bones.matrix(args[7], pose_bone_if_armature.name)
     return wrapper_bonecache
 
 # TODO: replace "cached" with "unique" in all cases where the caching is functional and not only for performance reasons
@@ -101,45 +409,45 @@ call_or_fetch = cached
 unique = cached
 
 def skdriverdiscovercache(func):
-
-    def reset_cache_skdriverdiscovercache():
-        func.__current_armature_name = None
-        func.__skdriverdiscover = {}
-
-    func.reset_cache = reset_cache_skdriverdiscovercache
+    """Decorate get_sk_drivers, whose results are cached by armature in the cache of the export session."""
 
     @functools.wraps(func)
     def wrapper_skdriverdiscover(*args, **kwargs):
-        if not hasattr(func, "__current_armature_name") or func.__current_armature_name is None:
-            func.reset_cache()
+        session = args[-1][EXPORT_SESSION]
+        cache = session.cache(func)
+        statistics = session.statistics(func)
 
-        if args[0] != func.__current_armature_name:
-            result = func(*args)
-            func.__skdriverdiscover[args[0]] = result
-            func.__current_armature_name = args[0]
-            return result
+        cache_key = args[0].name
+        if cache_key not in cache:
+            start_time = time.perf_counter()
+            cache[cache_key] = func(*args)
+            statistics.miss_time += time.perf_counter() - start_time
+            statistics.misses += 1
         else:
-            return func.__skdriverdiscover[args[0]]
+            statistics.hits += 1
+        return cache[cache_key]
     return wrapper_skdriverdiscover
 
 def skdrivervalues(func):
+    """
+    Decorate get_sk_driver_values, whose results are cached by object and frame in the cache of the export session.
 
-    def reset_cache_skdrivervalues():
-        func.__skdrivervalues = {}
-
-    func.reset_cache = reset_cache_skdrivervalues
+    The values depend on the action being baked, so the cache is dropped after the channels of each action.
+    """
 
     @functools.wraps(func)
     def wrapper_skdrivervalues(*args, **kwargs):
-        if not hasattr(func, "__skdrivervalues") or func.__skdrivervalues is None:
-            func.reset_cache()
-
-        if args[0].name not in func.__skdrivervalues.keys():
-            func.__skdrivervalues[args[0].name] = {}
-        if args[1] not in func.__skdrivervalues[args[0].name]:
-            vals = func(*args)
-            func.__skdrivervalues[args[0].name][args[1]] = vals
-            return vals
+        session = args[-1][EXPORT_SESSION]
+        cache = session.cache(func)
+        statistics = session.statistics(func)
+
+        cache_key = (args[0].name, args[1])
+        if cache_key not in cache:
+            start_time = time.perf_counter()
+            cache[cache_key] = func(*args)
+            statistics.miss_time += time.perf_counter() - start_time
+            statistics.misses += 1
         else:
-            return func.__skdrivervalues[args[0].name][args[1]]
+            statistics.hits += 1
+        return cache[cache_key]
     return wrapper_skdrivervalues
@@ -18,7 +18,7 @@ from ..com.gltf2_blender_data_path import get_target_object_path
 
 
 @skdriverdiscovercache
-def get_sk_drivers(blender_armature):
+def get_sk_drivers(blender_armature, export_settings):
 
     drivers = []
 
@@ -66,7 +66,7 @@ def get_sk_drivers(blender_armature):
     return tuple(drivers)
 
 @skdrivervalues
-def get_sk_driver_values(blender_object, frame, fcurves):
+def get_sk_driver_values(blender_object, frame, fcurves, export_settings):
     sk_values = []
     for f in [f for f in fcurves if f is not None]:
         sk_values.append(blender_object.data.shape_keys.path_resolve(get_target_object_path(f.data_path)).value)
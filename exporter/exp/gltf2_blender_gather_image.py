@@ -23,11 +23,11 @@ from . import gltf2_io_binary_data
 from . import gltf2_io_image_data
 from ..com import gltf2_io_debug
 from .gltf2_blender_image import Channel, ExportImage, FillImage
-from .gltf2_blender_gather_cache import cached
+from .gltf2_blender_gather_cache import cached, cached_across_lods
 from .gltf2_io_user_extensions import export_user_extensions
 
 
-@cached
+@cached_across_lods
 def gather_image(
         blender_shader_sockets_or_texture_slots: typing.Union[typing.Tuple[bpy.types.NodeSocket],
                                                               typing.Tuple[bpy.types.Texture]],
@@ -15,14 +15,14 @@
 import mathutils
 
 from . import gltf2_blender_export_keys
-from .gltf2_blender_gather_cache import cached
+from .gltf2_blender_gather_cache import cached_across_lods
 from ..com import gltf2_io
 from . import gltf2_blender_extract
 from ..com import gltf2_blender_math
 from . import gltf2_blender_gather_skins
 from ..com.gltf2_blender_extras import generate_extras
 
-@cached
+@cached_across_lods
 def gather_joint(blender_object, blender_bone, export_settings):
     """
     Generate a glTF2 node from a blender bone, as joints in glTF2 are simply nodes.
@@ -60,7 +60,7 @@ def gather_joint(blender_object, blender_bone, export_settings):
         for bone in blender_bone.children:
             children.append(gather_joint(blender_object, bone, export_settings))
     else:
-        _, children_, _ = gltf2_blender_gather_skins.get_bone_tree(None, blender_bone.id_data)
+        _, children_, _ = gltf2_blender_gather_skins.get_bone_tree(None, blender_bone.id_data, export_settings)
         if blender_bone.name in children_.keys():
             for bone in children_[blender_bone.name]:
                 children.append(gather_joint(blender_object, blender_bone.id_data.pose.bones[bone], export_settings))
@@ -14,7 +14,7 @@
 
 import bpy
 import typing
-from .gltf2_blender_gather_cache import cached
+from .gltf2_blender_gather_cache import cached_across_lods
 from ..com import gltf2_io
 from . import gltf2_blender_gather_texture
 from . import gltf2_blender_search_node_tree
@@ -23,7 +23,7 @@ from ..com.gltf2_io_extensions import Extension
 from .gltf2_io_user_extensions import export_user_extensions
 
 
-@cached
+@cached_across_lods
 def gather_material_occlusion_texture_info_class(blender_shader_sockets_or_texture_slots: typing.Union[
     typing.Tuple[bpy.types.NodeSocket], typing.Tuple[bpy.types.Texture]],
         export_settings):
@@ -14,7 +14,7 @@
 
 import bpy
 
-from .gltf2_blender_gather_cache import cached
+from .gltf2_blender_gather_cache import cached_across_lods
 from ..com import gltf2_io
 from ..com.gltf2_io_extensions import Extension
 from . import gltf2_blender_gather_texture_info, gltf2_blender_export_keys
@@ -28,7 +28,7 @@ from . import gltf2_blender_get
 from .gltf2_io_user_extensions import export_user_extensions
 
 
-@cached
+@cached_across_lods
 def gather_material(blender_material, mesh_double_sided, export_settings):
     """
     Gather the material used by the blender primitive.
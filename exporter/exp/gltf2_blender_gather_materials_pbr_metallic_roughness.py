@@ -17,12 +17,12 @@ import bpy
 from ..com import gltf2_io
 from . import gltf2_blender_gather_texture_info, gltf2_blender_search_node_tree
 from . import gltf2_blender_get
-from .gltf2_blender_gather_cache import cached
+from .gltf2_blender_gather_cache import cached_across_lods
 from ..com.gltf2_io_debug import print_console
 from .gltf2_io_user_extensions import export_user_extensions
 
 
-@cached
+@cached_across_lods
 def gather_material_pbr_metallic_roughness(blender_material, orm_texture, export_settings):
     if not __filter_pbr_material(blender_material, export_settings):
         return None
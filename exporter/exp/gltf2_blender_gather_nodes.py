@@ -36,16 +36,13 @@ def gather_node(blender_object, library, blender_scene, dupli_object_parent, exp
     # custom cache to avoid cache miss when called from animation
     # with blender_scene=None
 
-    # invalidate cache if export settings have changed
-    if not hasattr(gather_node, "__export_settings") or export_settings != gather_node.__export_settings:
-        gather_node.__cache = {}
-        gather_node.__export_settings = export_settings
+    cache = export_settings[gltf2_blender_export_keys.EXPORT_SESSION].cache(gather_node)
 
-    if blender_scene is None and (blender_object.name, library) in gather_node.__cache:
-        return gather_node.__cache[(blender_object.name, library)]
+    if blender_scene is None and (blender_object.name, library) in cache:
+        return cache[(blender_object.name, library)]
 
     node = __gather_node(blender_object, library, blender_scene, dupli_object_parent, export_settings)
-    gather_node.__cache[(blender_object.name, library)] = node
+    cache[(blender_object.name, library)] = node
     return node
 
 @cached
@@ -167,7 +164,7 @@ def __gather_children(blender_object, blender_scene, export_settings):
         if export_settings["gltf_def_bones"] is False:
             bones = blender_object.pose.bones
         else:
-            bones, _, _ = gltf2_blender_gather_skins.get_bone_tree(None, blender_object)
+            bones, _, _ = gltf2_blender_gather_skins.get_bone_tree(None, blender_object, export_settings)
             bones = [blender_object.pose.bones[b.name] for b in bones]
         for blender_bone in bones:
             if not blender_bone.parent:
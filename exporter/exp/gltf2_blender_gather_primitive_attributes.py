@@ -17,7 +17,6 @@ from ..com import gltf2_io
 from ..com import gltf2_io_constants
 from ..com import gltf2_io_debug
 from . import gltf2_io_binary_data
-from . import gltf2_blender_utils
 
 
 def gather_primitive_attributes(blender_primitive, export_settings):
@@ -39,16 +38,18 @@ def gather_primitive_attributes(blender_primitive, export_settings):
 def __gather_position(blender_primitive, export_settings):
     position = blender_primitive["attributes"]["POSITION"]
     componentType = gltf2_io_constants.ComponentType.Float
+    binary_data = gltf2_io_binary_data.BinaryData.from_array(position, componentType, gltf2_io_constants.DataType.Vec3)
+    position_min, position_max = binary_data.min_max()
     return {
         "POSITION": gltf2_io.Accessor(
-            buffer_view=gltf2_io_binary_data.BinaryData.from_list(position, componentType),
+            buffer_view=binary_data,
             byte_offset=None,
             component_type=componentType,
-            count=len(position) // gltf2_io_constants.DataType.num_elements(gltf2_io_constants.DataType.Vec3),
+            count=binary_data.count,
             extensions=None,
             extras=None,
-            max=gltf2_blender_utils.max_components(position, gltf2_io_constants.DataType.Vec3),
-            min=gltf2_blender_utils.min_components(position, gltf2_io_constants.DataType.Vec3),
+            max=position_max,
+            min=position_min,
             name=None,
             normalized=None,
             sparse=None,
@@ -62,7 +63,8 @@ def __gather_normal(blender_primitive, export_settings):
         normal = blender_primitive["attributes"]['NORMAL']
         return {
             "NORMAL": gltf2_io.Accessor(
-                buffer_view=gltf2_io_binary_data.BinaryData.from_list(normal, gltf2_io_constants.ComponentType.Float),
+                buffer_view=gltf2_io_binary_data.BinaryData.from_array(
+                    normal, gltf2_io_constants.ComponentType.Float, gltf2_io_constants.DataType.Vec3),
                 byte_offset=None,
                 component_type=gltf2_io_constants.ComponentType.Float,
                 count=len(normal) // gltf2_io_constants.DataType.num_elements(gltf2_io_constants.DataType.Vec3),
@@ -85,8 +87,8 @@ def __gather_tangent(blender_primitive, export_settings):
             tangent = blender_primitive["attributes"]['TANGENT']
             return {
                 "TANGENT": gltf2_io.Accessor(
-                    buffer_view=gltf2_io_binary_data.BinaryData.from_list(
-                        tangent, gltf2_io_constants.ComponentType.Float),
+                    buffer_view=gltf2_io_binary_data.BinaryData.from_array(
+                        tangent, gltf2_io_constants.ComponentType.Float, gltf2_io_constants.DataType.Vec4),
                     byte_offset=None,
                     component_type=gltf2_io_constants.ComponentType.Float,
                     count=len(tangent) // gltf2_io_constants.DataType.num_elements(gltf2_io_constants.DataType.Vec4),
@@ -112,8 +114,8 @@ def __gather_texcoord(blender_primitive, export_settings):
         while blender_primitive["attributes"].get(tex_coord_id) is not None:
             tex_coord = blender_primitive["attributes"][tex_coord_id]
             attributes[tex_coord_id] = gltf2_io.Accessor(
-                buffer_view=gltf2_io_binary_data.BinaryData.from_list(
-                    tex_coord, gltf2_io_constants.ComponentType.Float),
+                buffer_view=gltf2_io_binary_data.BinaryData.from_array(
+                    tex_coord, gltf2_io_constants.ComponentType.Float, gltf2_io_constants.DataType.Vec2),
                 byte_offset=None,
                 component_type=gltf2_io_constants.ComponentType.Float,
                 count=len(tex_coord) // gltf2_io_constants.DataType.num_elements(gltf2_io_constants.DataType.Vec2),
@@ -139,8 +141,8 @@ def __gather_colors(blender_primitive, export_settings):
         while blender_primitive["attributes"].get(color_id) is not None:
             internal_color = blender_primitive["attributes"][color_id]
             attributes[color_id] = gltf2_io.Accessor(
-                buffer_view=gltf2_io_binary_data.BinaryData.from_list(
-                    internal_color, gltf2_io_constants.ComponentType.Float),
+                buffer_view=gltf2_io_binary_data.BinaryData.from_array(
+                    internal_color, gltf2_io_constants.ComponentType.Float, gltf2_io_constants.DataType.Vec4),
                 byte_offset=None,
                 component_type=gltf2_io_constants.ComponentType.Float,
                 count=len(internal_color) // gltf2_io_constants.DataType.num_elements(gltf2_io_constants.DataType.Vec4),
@@ -164,7 +166,8 @@ def __gather_skins(blender_primitive, export_settings):
         bone_set_index = 0
         joint_id = 'JOINTS_' + str(bone_set_index)
         weight_id = 'WEIGHTS_' + str(bone_set_index)
-        while blender_primitive["attributes"].get(joint_id) and blender_primitive["attributes"].get(weight_id):
+        while blender_primitive["attributes"].get(joint_id) is not None and \
+                blender_primitive["attributes"].get(weight_id) is not None:
             if bone_set_index >= 1:
                 if not export_settings['gltf_all_vertex_influences']:
                     gltf2_io_debug.print_console("WARNING", "There are more than 4 joint vertex influences."
@@ -174,8 +177,8 @@ def __gather_skins(blender_primitive, export_settings):
             # joints
             internal_joint = blender_primitive["attributes"][joint_id]
             joint = gltf2_io.Accessor(
-                buffer_view=gltf2_io_binary_data.BinaryData.from_list(
-                    internal_joint, gltf2_io_constants.ComponentType.UnsignedShort),
+                buffer_view=gltf2_io_binary_data.BinaryData.from_array(
+                    internal_joint, gltf2_io_constants.ComponentType.UnsignedShort, gltf2_io_constants.DataType.Vec4),
                 byte_offset=None,
                 component_type=gltf2_io_constants.ComponentType.UnsignedShort,
                 count=len(internal_joint) // gltf2_io_constants.DataType.num_elements(gltf2_io_constants.DataType.Vec4),
@@ -192,18 +195,10 @@ def __gather_skins(blender_primitive, export_settings):
 
             # weights
             internal_weight = blender_primitive["attributes"][weight_id]
-            # normalize first 4 weights, when not exporting all influences
-            if not export_settings['gltf_all_vertex_influences']:
-                for idx in range(0, len(internal_weight), 4):
-                    weight_slice = internal_weight[idx:idx + 4]
-                    total = sum(weight_slice)
-                    if total > 0:
-                        factor = 1.0 / total
-                        internal_weight[idx:idx + 4] = [w * factor for w in weight_slice]
-
+            # the first 4 weights are already normalized by the extraction, when not exporting all influences
             weight = gltf2_io.Accessor(
-                buffer_view=gltf2_io_binary_data.BinaryData.from_list(
-                    internal_weight, gltf2_io_constants.ComponentType.Float),
+                buffer_view=gltf2_io_binary_data.BinaryData.from_array(
+                    internal_weight, gltf2_io_constants.ComponentType.Float, gltf2_io_constants.DataType.Vec4),
                 byte_offset=None,
                 component_type=gltf2_io_constants.ComponentType.Float,
                 count=len(internal_weight) // gltf2_io_constants.DataType.num_elements(
@@ -13,19 +13,26 @@
 # limitations under the License.
 
 import bpy
+import numpy as np
 from typing import List, Optional, Tuple
 
-from .gltf2_blender_export_keys import NORMALS, MORPH_NORMAL, TANGENTS, MORPH_TANGENT, MORPH
+from .gltf2_blender_export_keys import NORMALS, MORPH_NORMAL, TANGENTS, MORPH_TANGENT, MORPH, EXTRACT_ENGINE, \
+    OPTIMIZE_VERTEX_CACHE, LOD_RATIO, PRIMITIVE_CACHE
 
 from .gltf2_blender_gather_cache import cached
 from . import gltf2_blender_extract
+from . import gltf2_blender_extract_numpy
 from . import gltf2_blender_gather_accessors
 from . import gltf2_blender_gather_primitive_attributes
-from . import gltf2_blender_utils
 from . import gltf2_blender_gather_materials
+from . import gltf2_blender_primitive_cache
+from . import gltf2_blender_primitive_partition
+from . import gltf2_blender_simplify
+from . import gltf2_blender_vertex_cache
 
 from ..com import gltf2_io
 from . import gltf2_io_binary_data
+from . import gltf2_io_primitive_cache
 from ..com import gltf2_io_constants
 from ..com.gltf2_io_debug import print_console
 
@@ -92,8 +99,20 @@ def __gather_cache_primitives(
     """
     primitives = []
 
-    blender_primitives = gltf2_blender_extract.extract_primitives(
-        None, blender_mesh, library, blender_object, vertex_groups, modifiers, export_settings)
+    cache_directory = export_settings[PRIMITIVE_CACHE]
+    if cache_directory is not None:
+        cache_key = gltf2_blender_primitive_cache.primitive_cache_key(blender_mesh, blender_object, vertex_groups,
+                                                                      modifiers, export_settings)
+        blender_primitives = gltf2_io_primitive_cache.load(cache_directory, cache_key)
+        if blender_primitives is not None:
+            print_console('INFO', 'Primitives loaded from the cache: ' + blender_mesh.name)
+        else:
+            blender_primitives = __extract_primitives(blender_mesh, library, blender_object, vertex_groups,
+                                                      modifiers, export_settings)
+            gltf2_io_primitive_cache.store(cache_directory, cache_key, blender_primitives)
+    else:
+        blender_primitives = __extract_primitives(blender_mesh, library, blender_object, vertex_groups, modifiers,
+                                                  export_settings)
 
     for internal_primitive in blender_primitives:
         primitive = {
@@ -106,6 +125,21 @@ def __gather_cache_primitives(
 
     return primitives
 
+def __extract_primitives(blender_mesh, library, blender_object, vertex_groups, modifiers, export_settings):
+    if export_settings[EXTRACT_ENGINE] == 'NUMPY':
+        extract_primitives = gltf2_blender_extract_numpy.extract_primitives
+    else:
+        extract_primitives = gltf2_blender_extract.extract_primitives
+
+    blender_primitives = extract_primitives(
+        None, blender_mesh, library, blender_object, vertex_groups, modifiers, export_settings)
+    if export_settings[LOD_RATIO] < 1.0:
+        blender_primitives = gltf2_blender_simplify.simplify_primitives(blender_primitives, export_settings[LOD_RATIO])
+    blender_primitives = gltf2_blender_primitive_partition.partition_primitives(blender_primitives)
+    if export_settings[OPTIMIZE_VERTEX_CACHE]:
+        gltf2_blender_vertex_cache.optimize_primitives(blender_primitives)
+    return blender_primitives
+
 def __gather_indices(blender_primitive, blender_mesh, modifiers, export_settings):
     indices = blender_primitive['indices']
 
@@ -115,17 +149,13 @@ def __gather_indices(blender_primitive, blender_mesh, modifiers, export_settings
     # https://github.com/KhronosGroup/glTF/pull/1476/files
     # Also, UINT8 mode is not supported:
     # https://github.com/KhronosGroup/glTF/issues/1471
-    max_index = max(indices)
-    if max_index < 65535:
-        component_type = gltf2_io_constants.ComponentType.UnsignedShort
-    elif max_index < 4294967295:
-        component_type = gltf2_io_constants.ComponentType.UnsignedInt
-    else:
-        print_console('ERROR', 'A mesh contains too many vertices (' + str(max_index) + ') and needs to be split before export.')
-        return None
+    # Primitives are partitioned to at most 65535 vertices, so their indices are below 65535.
+    assert len(indices) == 0 or np.max(indices) < gltf2_blender_primitive_partition.MAX_UNSIGNED_SHORT_VERTICES, \
+        "Primitive not partitioned before export"
+    component_type = gltf2_io_constants.ComponentType.UnsignedShort
 
     element_type = gltf2_io_constants.DataType.Scalar
-    binary_data = gltf2_io_binary_data.BinaryData.from_list(indices, component_type)
+    binary_data = gltf2_io_binary_data.BinaryData.from_array(indices, component_type, element_type)
     return gltf2_blender_gather_accessors.gather_accessor(
         binary_data,
         component_type,
@@ -157,80 +187,90 @@ def __gather_targets(blender_primitive, blender_mesh, modifiers, export_settings
                 target_normal_id = 'MORPH_NORMAL_' + str(morph_index)
                 target_tangent_id = 'MORPH_TANGENT_' + str(morph_index)
 
-                if blender_primitive["attributes"].get(target_position_id):
+                if blender_primitive["attributes"].get(target_position_id) is not None:
                     target = {}
                     internal_target_position = blender_primitive["attributes"][target_position_id]
-                    binary_data = gltf2_io_binary_data.BinaryData.from_list(
-                        internal_target_position,
-                        gltf2_io_constants.ComponentType.Float
-                    )
-                    target["POSITION"] = gltf2_io.Accessor(
-                        buffer_view=binary_data,
-                        byte_offset=None,
-                        component_type=gltf2_io_constants.ComponentType.Float,
-                        count=len(internal_target_position) // gltf2_io_constants.DataType.num_elements(
-                            gltf2_io_constants.DataType.Vec3),
-                        extensions=None,
-                        extras=None,
-                        max=gltf2_blender_utils.max_components(
-                            internal_target_position, gltf2_io_constants.DataType.Vec3),
-                        min=gltf2_blender_utils.min_components(
-                            internal_target_position, gltf2_io_constants.DataType.Vec3),
-                        name=None,
-                        normalized=None,
-                        sparse=None,
-                        type=gltf2_io_constants.DataType.Vec3
-                    )
+                    target["POSITION"] = __gather_target_accessor(internal_target_position, True)
 
                     if export_settings[NORMALS] \
                             and export_settings[MORPH_NORMAL] \
-                            and blender_primitive["attributes"].get(target_normal_id):
+                            and blender_primitive["attributes"].get(target_normal_id) is not None:
 
                         internal_target_normal = blender_primitive["attributes"][target_normal_id]
-                        binary_data = gltf2_io_binary_data.BinaryData.from_list(
-                            internal_target_normal,
-                            gltf2_io_constants.ComponentType.Float,
-                        )
-                        target['NORMAL'] = gltf2_io.Accessor(
-                            buffer_view=binary_data,
-                            byte_offset=None,
-                            component_type=gltf2_io_constants.ComponentType.Float,
-                            count=len(internal_target_normal) // gltf2_io_constants.DataType.num_elements(
-                                gltf2_io_constants.DataType.Vec3),
-                            extensions=None,
-                            extras=None,
-                            max=None,
-                            min=None,
-                            name=None,
-                            normalized=None,
-                            sparse=None,
-                            type=gltf2_io_constants.DataType.Vec3
-                        )
+                        target['NORMAL'] = __gather_target_accessor(internal_target_normal, False)
 
                     if export_settings[TANGENTS] \
                             and export_settings[MORPH_TANGENT] \
-                            and blender_primitive["attributes"].get(target_tangent_id):
+                            and blender_primitive["attributes"].get(target_tangent_id) is not None:
                         internal_target_tangent = blender_primitive["attributes"][target_tangent_id]
-                        binary_data = gltf2_io_binary_data.BinaryData.from_list(
-                            internal_target_tangent,
-                            gltf2_io_constants.ComponentType.Float,
-                        )
-                        target['TANGENT'] = gltf2_io.Accessor(
-                            buffer_view=binary_data,
-                            byte_offset=None,
-                            component_type=gltf2_io_constants.ComponentType.Float,
-                            count=len(internal_target_tangent) // gltf2_io_constants.DataType.num_elements(
-                                gltf2_io_constants.DataType.Vec3),
-                            extensions=None,
-                            extras=None,
-                            max=None,
-                            min=None,
-                            name=None,
-                            normalized=None,
-                            sparse=None,
-                            type=gltf2_io_constants.DataType.Vec3
-                        )
+                        target['TANGENT'] = __gather_target_accessor(internal_target_tangent, False)
                     targets.append(target)
                     morph_index += 1
         return targets
     return None
+
+
+def __gather_target_accessor(internal_target, with_min_max):
+    """
+    Gather the accessor of a morph target attribute.
+
+    Targets that displace only a small part of the vertices are stored as sparse accessors, holding only the
+    displaced vertices on top of an all zero initialization. The dense layout is used when it is smaller.
+    """
+    data_type = gltf2_io_constants.DataType.Vec3
+    count = len(internal_target) // gltf2_io_constants.DataType.num_elements(data_type)
+
+    values = np.asarray(internal_target, dtype=np.float32).reshape(count, 3)
+    displaced = np.flatnonzero(np.any(values != 0.0, axis=1))
+
+    if count <= 0xff:
+        index_type = gltf2_io_constants.ComponentType.UnsignedByte
+    elif count <= 0xffff:
+        index_type = gltf2_io_constants.ComponentType.UnsignedShort
+    else:
+        index_type = gltf2_io_constants.ComponentType.UnsignedInt
+    value_size = gltf2_io_constants.ComponentType.get_size(gltf2_io_constants.ComponentType.Float) * 3
+    sparse_byte_length = len(displaced) * (gltf2_io_constants.ComponentType.get_size(index_type) + value_size)
+
+    buffer_view = None
+    sparse = None
+    if sparse_byte_length >= count * value_size:
+        buffer_view = gltf2_io_binary_data.BinaryData.from_array(values, gltf2_io_constants.ComponentType.Float,
+                                                                 data_type)
+    elif len(displaced) > 0:
+        # Without any displaced vertex, neither buffer view nor sparse storage is needed: the target is all zero.
+        sparse = gltf2_io.AccessorSparse(
+            count=len(displaced),
+            extensions=None,
+            extras=None,
+            indices=gltf2_io.AccessorSparseIndices(
+                buffer_view=gltf2_io_binary_data.BinaryData.from_array(
+                    displaced, index_type, gltf2_io_constants.DataType.Scalar),
+                byte_offset=None,
+                component_type=index_type,
+                extensions=None,
+                extras=None
+            ),
+            values=gltf2_io.AccessorSparseValues(
+                buffer_view=gltf2_io_binary_data.BinaryData.from_array(
+                    values[displaced], gltf2_io_constants.ComponentType.Float, data_type),
+                byte_offset=None,
+                extensions=None,
+                extras=None
+            )
+        )
+
+    return gltf2_io.Accessor(
+        buffer_view=buffer_view,
+        byte_offset=None,
+        component_type=gltf2_io_constants.ComponentType.Float,
+        count=count,
+        extensions=None,
+        extras=None,
+        max=values.max(axis=0).tolist() if with_min_max and count > 0 else None,
+        min=values.min(axis=0).tolist() if with_min_max and count > 0 else None,
+        name=None,
+        normalized=None,
+        sparse=sparse,
+        type=data_type
+    )
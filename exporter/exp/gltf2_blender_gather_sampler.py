@@ -14,11 +14,11 @@
 
 import bpy
 from ..com import gltf2_io
-from .gltf2_blender_gather_cache import cached
+from .gltf2_blender_gather_cache import cached_across_lods
 from .gltf2_io_user_extensions import export_user_extensions
 
 
-@cached
+@cached_across_lods
 def gather_sampler(blender_shader_node: bpy.types.Node, export_settings):
     if not __filter_sampler(blender_shader_node, export_settings):
         return None
@@ -80,7 +80,7 @@ def __gather_wrap_t(blender_shader_node, export_settings):
     return None
 
 
-@cached
+@cached_across_lods
 def gather_sampler_from_texture_slot(blender_texture: bpy.types.TextureSlot, export_settings):
     magFilter = 9729
     wrap = 10497
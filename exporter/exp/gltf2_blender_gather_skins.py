@@ -14,7 +14,7 @@
 
 import mathutils
 from . import gltf2_blender_export_keys
-from .gltf2_blender_gather_cache import cached
+from .gltf2_blender_gather_cache import cached, cached_across_lods
 from ..com import gltf2_io
 from . import gltf2_io_binary_data
 from ..com import gltf2_io_constants
@@ -24,7 +24,7 @@ from ..com import gltf2_blender_math
 from .gltf2_io_user_extensions import export_user_extensions
 
 
-@cached
+@cached_across_lods
 def gather_skin(blender_object, export_settings):
     """
     Gather armatures, bones etc into a glTF2 skin object.
@@ -79,7 +79,7 @@ def __gather_inverse_bind_matrices(blender_object, export_settings):
             if not blender_bone.parent:
                 root_bones.append(blender_bone)
     else:
-        _, children_, root_bones = get_bone_tree(None, blender_object)
+        _, children_, root_bones = get_bone_tree(None, blender_object, export_settings)
 
     matrices = []
 
@@ -113,7 +113,8 @@ def __gather_inverse_bind_matrices(blender_object, export_settings):
             for row in range(0, 4):
                 inverse_matrices.append(matrix[row][column])
 
-    binary_data = gltf2_io_binary_data.BinaryData.from_list(inverse_matrices, gltf2_io_constants.ComponentType.Float)
+    binary_data = gltf2_io_binary_data.BinaryData.from_list(inverse_matrices, gltf2_io_constants.ComponentType.Float,
+                                                            gltf2_io_constants.DataType.Mat4)
     return gltf2_blender_gather_accessors.gather_accessor(
         binary_data,
         gltf2_io_constants.ComponentType.Float,
@@ -133,7 +134,7 @@ def __gather_joints(blender_object, export_settings):
             if not blender_bone.parent:
                 root_joints.append(gltf2_blender_gather_joints.gather_joint(blender_object, blender_bone, export_settings))
     else:
-        _, children_, root_joints = get_bone_tree(None, blender_object)
+        _, children_, root_joints = get_bone_tree(None, blender_object, export_settings)
         root_joints = [gltf2_blender_gather_joints.gather_joint(blender_object, i, export_settings) for i in root_joints]
 
     # joints is a flat list containing all nodes belonging to the skin
@@ -164,7 +165,7 @@ def __gather_skeleton(blender_object, export_settings):
     return None  # gltf2_blender_gather_nodes.gather_node(blender_object, blender_scene, export_settings)
 
 @cached
-def get_bone_tree(blender_dummy, blender_object):
+def get_bone_tree(blender_dummy, blender_object, export_settings):
 
     bones = []
     children = {}
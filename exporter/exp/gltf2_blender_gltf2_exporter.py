@@ -30,6 +30,8 @@ from typing import List
 from ... import get_version_string
 from ..com import gltf2_io
 from ..com import gltf2_io_extensions
+from ..com.gltf2_io_debug import print_console
+from . import gltf2_io_async_writer
 from . import gltf2_io_binary_data
 from . import gltf2_io_buffer
 from . import gltf2_io_image_data
@@ -83,6 +85,10 @@ class GlTF2Exporter:
         self.__buffer = gltf2_io_buffer.Buffer()
         self.__images = {}
 
+        # indices of accessors by their content, to reference identical accessors only once
+        self.__accessor_indices = {}
+        self.__reused_accessors = set()
+
         # mapping of all glTFChildOfRootProperty types to their corresponding root level arrays
         self.__childOfRootPropertyTypeLookup = {
             gltf2_io.Accessor: self.__gltf.accessors,
@@ -100,6 +106,10 @@ class GlTF2Exporter:
             gltf2_io.Texture: self.__gltf.textures
         }
 
+        # indices of the objects in the root level arrays, by object identity, since properties are compared by
+        # identity anyway and a search through the arrays is linear
+        self.__childOfRootIndices = {id(gltf_list): {} for gltf_list in self.__childOfRootPropertyTypeLookup.values()}
+
         self.__propertyTypeLookup = [
             gltf2_io.AccessorSparseIndices,
             gltf2_io.AccessorSparse,
@@ -117,6 +127,12 @@ class GlTF2Exporter:
             gltf2_io.MaterialOcclusionTextureInfoClass
         ]
 
+        # functions traversing the fields of each property type that can hold child properties
+        self.__propertyVisitors = {
+            property_type: self.__make_property_visitor(gltf2_io.CHILD_FIELDS[property_type])
+            for property_type in list(self.__childOfRootPropertyTypeLookup.keys()) + self.__propertyTypeLookup
+        }
+
         self.__traverse(asset)
 
     @property
@@ -125,8 +141,13 @@ class GlTF2Exporter:
             raise RuntimeError("glTF requested, but buffers are not finalized yet")
         return self.__gltf
 
-    def finalize_buffer(self, output_path=None, buffer_name=None, is_glb=False):
-        """Finalize the glTF and write buffers."""
+    def finalize_buffer(self, output_path=None, buffer_name=None, is_glb=False, writer=None):
+        """
+        Finalize the glTF and write buffers.
+
+        For GLB, the buffer is returned instead, so that it can be written into the BIN chunk.
+        If an AsyncWriter is given, the buffer file is written in the background.
+        """
         if self.__finalized:
             raise RuntimeError("Tried to finalize buffers for finalized glTF file")
 
@@ -134,8 +155,7 @@ class GlTF2Exporter:
             if is_glb:
                 uri = None
             elif output_path and buffer_name:
-                with open(output_path + buffer_name, 'wb') as f:
-                    f.write(self.__buffer.to_bytes())
+                gltf2_io_async_writer.write_file(output_path + buffer_name, self.__buffer.write_to, writer)
                 uri = buffer_name
             else:
                 uri = self.__buffer.to_embed_string()
@@ -151,8 +171,12 @@ class GlTF2Exporter:
 
         self.__finalized = True
 
+        if self.__buffer.reused_view_count > 0 or self.__reused_accessors:
+            print_console('INFO', 'Reused {} buffer views and {} accessors with identical data, {} bytes saved.'.format(
+                self.__buffer.reused_view_count, len(self.__reused_accessors), self.__buffer.saved_byte_length))
+
         if is_glb:
-            return self.__buffer.to_bytes()
+            return self.__buffer
 
     def add_draco_extension(self):
         """
@@ -163,9 +187,20 @@ class GlTF2Exporter:
         self.__gltf.extensions_required.append('KHR_draco_mesh_compression')
         self.__gltf.extensions_used.append('KHR_draco_mesh_compression')
 
-    def finalize_images(self):
+    def add_mesh_quantization_extension(self):
+        """
+        Register mesh quantization extension as *used* and *required*.
+
+        :return:
+        """
+        self.__gltf.extensions_required.append('KHR_mesh_quantization')
+        self.__gltf.extensions_used.append('KHR_mesh_quantization')
+
+    def finalize_images(self, writer=None):
         """
         Write all images.
+
+        If an AsyncWriter is given, the images are written in the background.
         """
         output_path = self.export_settings[gltf2_blender_export_keys.TEXTURE_DIRECTORY]
 
@@ -174,8 +209,7 @@ class GlTF2Exporter:
 
         for name, image in self.__images.items():
             dst_path = output_path + "/" + name + image.file_extension
-            with open(dst_path, 'wb') as f:
-                f.write(image.data)
+            gltf2_io_async_writer.write_file(dst_path, lambda f, data=image.data: f.write(data), writer)
 
     def add_scene(self, scene: gltf2_io.Scene, active: bool = False):
         """
@@ -220,7 +254,52 @@ class GlTF2Exporter:
             # The object is not of a child of root --> don't convert to reference
             return property
 
-        return self.__append_unique_and_get_index(gltf_list, property)
+        indices = self.__childOfRootIndices[id(gltf_list)]
+        index = indices.get(id(property))
+        if index is None:
+            index = len(gltf_list)
+            gltf_list.append(property)
+            indices[id(property)] = index
+        return index
+
+    def __to_accessor_reference(self, accessor: gltf2_io.Accessor):
+        """
+        Append an accessor to the accessors and return a reference, or a reference to an identical accessor.
+
+        The accessor must be traversed already, so that its buffer views are references.
+        """
+        key = self.__accessor_key(accessor)
+        if key is None:
+            return self.__to_reference(accessor)
+
+        idx = self.__accessor_indices.get(key)
+        if idx is None:
+            idx = self.__to_reference(accessor)
+            self.__accessor_indices[key] = idx
+        elif self.__gltf.accessors[idx] is not accessor:
+            self.__reused_accessors.add(id(accessor))
+        return idx
+
+    @staticmethod
+    def __accessor_key(accessor: gltf2_io.Accessor):
+        """Key of everything that is exported of an accessor, or None if it cannot be compared."""
+        if accessor.extensions is not None or accessor.extras is not None:
+            return None
+
+        sparse = accessor.sparse
+        if sparse is not None:
+            if sparse.extensions is not None or sparse.extras is not None \
+                    or sparse.indices.extensions is not None or sparse.indices.extras is not None \
+                    or sparse.values.extensions is not None or sparse.values.extras is not None:
+                return None
+            sparse = (sparse.count,
+                      sparse.indices.buffer_view, sparse.indices.byte_offset, sparse.indices.component_type,
+                      sparse.values.buffer_view, sparse.values.byte_offset)
+
+        return (accessor.buffer_view, accessor.byte_offset, accessor.component_type, accessor.count,
+                tuple(accessor.max) if accessor.max is not None else None,
+                tuple(accessor.min) if accessor.min is not None else None,
+                accessor.name, accessor.normalized, sparse, accessor.type)
 
     @staticmethod
     def __append_unique_and_get_index(target: list, obj):
@@ -271,6 +350,19 @@ class GlTF2Exporter:
         d[key] = d_key
         return cls.__get_key_path(d[key], keypath, default)
 
+    def __make_property_visitor(self, fields):
+        """Create a function that traverses the given fields of a property, skipping empty ones."""
+        traverse = self.__traverse
+
+        def visit(node):
+            for field in fields:
+                value = getattr(node, field)
+                if value is not None:
+                    setattr(node, field, traverse(value))
+            return node
+
+        return visit
+
     def __traverse(self, node):
         """
         Recursively traverse a scene graph consisting of gltf compatible elements.
@@ -278,24 +370,24 @@ class GlTF2Exporter:
         The tree is traversed downwards until a primitive is reached. Then any ChildOfRoot property
         is stored in the according list in the glTF and replaced with a index reference in the upper level.
         """
-        def __traverse_property(node):
-            for member_name in [a for a in dir(node) if not a.startswith('__') and not callable(getattr(node, a))]:
-                new_value = self.__traverse(getattr(node, member_name))
-                setattr(node, member_name, new_value)  # usually this is the same as before
-
-                # # TODO: maybe with extensions hooks we can find a more elegant solution
-                # if member_name == "extensions" and new_value is not None:
-                #     for extension_name in new_value.keys():
-                #         self.__append_unique_and_get_index(self.__gltf.extensions_used, extension_name)
-                #         self.__append_unique_and_get_index(self.__gltf.extensions_required, extension_name)
-            return node
-
-        # traverse nodes of a child of root property type and add them to the glTF root
-        if type(node) in self.__childOfRootPropertyTypeLookup:
-            node = __traverse_property(node)
-            idx = self.__to_reference(node)
+        node_type = type(node)
+        visit = self.__propertyVisitors.get(node_type)
+        if visit is not None:
+            gltf_list = self.__childOfRootPropertyTypeLookup.get(node_type)
+            if gltf_list is None:
+                # traverse into any other property
+                return visit(node)
+
+            # traverse nodes of a child of root property type and add them to the glTF root,
+            # unless they have been added already
+            idx = self.__childOfRootIndices[id(gltf_list)].get(id(node))
+            if idx is not None:
+                return idx
+            node = visit(node)
+            if node_type is gltf2_io.Accessor:
+                return self.__to_accessor_reference(node)
             # child of root properties are only present at root level --> replace with index in upper level
-            return idx
+            return self.__to_reference(node)
 
         # traverse lists, such as children and replace them with indices
         if isinstance(node, list):
@@ -308,10 +400,6 @@ class GlTF2Exporter:
                 node[key] = self.__traverse(node[key])
             return node
 
-        # traverse into any other property
-        if type(node) in self.__propertyTypeLookup:
-            return __traverse_property(node)
-
         # binary data needs to be moved to a buffer and referenced with a buffer view
         if isinstance(node, gltf2_io_binary_data.BinaryData):
             buffer_view = self.__buffer.add_and_get_view(node)
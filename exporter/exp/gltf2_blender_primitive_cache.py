@@ -0,0 +1,140 @@
+# Copyright 2018-2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import hashlib
+import os
+
+import bpy
+import numpy as np
+
+from . import gltf2_blender_export_keys
+from . import gltf2_blender_extract_numpy
+from . import gltf2_blender_gather_skins
+from . import gltf2_io_primitive_cache
+from ... import get_version_string
+
+#
+# Globals
+#
+
+# Settings the extracted primitives depend on. Other settings only change what is done with the primitives.
+PRIMITIVE_SETTINGS = (
+    gltf2_blender_export_keys.YUP,
+    gltf2_blender_export_keys.TANGENTS,
+    gltf2_blender_export_keys.TEX_COORDS,
+    gltf2_blender_export_keys.COLORS,
+    gltf2_blender_export_keys.MATERIALS,
+    gltf2_blender_export_keys.SKINS,
+    'gltf_all_vertex_influences',
+    'gltf_def_bones',
+    gltf2_blender_export_keys.MORPH,
+    gltf2_blender_export_keys.EXTRACT_ENGINE,
+    gltf2_blender_export_keys.WELD_EPSILON,
+    gltf2_blender_export_keys.OPTIMIZE_VERTEX_CACHE,
+    gltf2_blender_export_keys.LOD_RATIO,
+)
+
+
+#
+# Functions
+#
+
+def cache_directory(directory):
+    """
+    Resolve the directory of the primitive cache.
+
+    An empty directory stands for the default one next to the .blend file, or in the temporary directory for a
+    .blend file that was never saved.
+    """
+    if directory:
+        return bpy.path.abspath(directory)
+    if bpy.data.filepath:
+        return os.path.join(os.path.dirname(bpy.data.filepath), gltf2_io_primitive_cache.DIRECTORY_NAME)
+    return os.path.join(bpy.app.tempdir, gltf2_io_primitive_cache.DIRECTORY_NAME)
+
+
+def primitive_cache_key(blender_mesh, blender_object, vertex_groups, modifiers, export_settings):
+    """
+    Hash everything the extraction of the primitives of a mesh reads.
+
+    These are the mesh arrays, the vertex groups and the transforms of skinned meshes, the settings of the
+    extraction and the version of the exporter. The arrays are read in bulk, which is much faster than the
+    extraction itself, and are hashed as they are.
+    """
+    key = hashlib.blake2b(digest_size=20)
+
+    key.update(repr((get_version_string(), gltf2_io_primitive_cache.FORMAT_VERSION,
+                     [export_settings[name] for name in PRIMITIVE_SETTINGS])).encode())
+
+    if blender_mesh.has_custom_normals:
+        # Custom normals are all (0, 0, 0) until calling calc_normals_split().
+        blender_mesh.calc_normals_split()
+    key.update(repr((len(blender_mesh.vertices), len(blender_mesh.loops), len(blender_mesh.polygons),
+                     len(blender_mesh.materials), blender_mesh.has_custom_normals, blender_mesh.use_auto_smooth,
+                     blender_mesh.auto_smooth_angle)).encode())
+    __update(key, blender_mesh.vertices, 'co', np.float32, 3)
+    __update(key, blender_mesh.loops, 'vertex_index', np.int32)
+    __update(key, blender_mesh.polygons, 'loop_start', np.int32)
+    __update(key, blender_mesh.polygons, 'loop_total', np.int32)
+    __update(key, blender_mesh.polygons, 'material_index', np.int32)
+    __update(key, blender_mesh.polygons, 'use_smooth', np.bool_)
+    if blender_mesh.has_custom_normals or blender_mesh.use_auto_smooth:
+        __update(key, blender_mesh.loops, 'normal', np.float32, 3)
+
+    key.update(repr((blender_mesh.uv_layers.active_index, len(blender_mesh.uv_layers),
+                     len(blender_mesh.vertex_colors))).encode())
+    for uv_layer in blender_mesh.uv_layers:
+        __update(key, uv_layer.data, 'uv', np.float32, 2)
+    for vertex_color in blender_mesh.vertex_colors:
+        __update(key, vertex_color.data, 'color', np.float32, 4)
+
+    if blender_mesh.shape_keys is not None:
+        for blender_shape_key in blender_mesh.shape_keys.key_blocks:
+            key.update(repr((blender_shape_key.name, blender_shape_key.relative_key.name,
+                             blender_shape_key.mute)).encode())
+            __update(key, blender_shape_key.data, 'co', np.float32, 3)
+
+    armature = __get_armature(modifiers)
+    if export_settings[gltf2_blender_export_keys.SKINS] and vertex_groups is not None:
+        key.update(repr([vertex_group.name for vertex_group in vertex_groups]).encode())
+        for array in gltf2_blender_extract_numpy.get_vertex_group_elements(blender_mesh):
+            key.update(array)
+        if armature is not None:
+            skin_joints = gltf2_blender_gather_skins.gather_skin(armature, export_settings).joints
+            key.update(repr([joint.name for joint in skin_joints]).encode())
+    if armature is not None:
+        # the vertices of skinned meshes are transformed into the space of the armature
+        key.update(np.array(armature.matrix_world, dtype=np.float64).tobytes())
+        if blender_object is not None:
+            key.update(np.array(blender_object.matrix_world, dtype=np.float64).tobytes())
+
+    return key.hexdigest()
+
+
+def __update(key, collection, attribute, dtype, components=1):
+    array = np.empty(len(collection) * components, dtype=dtype)
+    collection.foreach_get(attribute, array)
+    key.update(array)
+
+
+def __get_armature(modifiers):
+    if modifiers is not None:
+        modifiers_dict = {m.type: m for m in modifiers}
+        if "ARMATURE" in modifiers_dict:
+            return modifiers_dict["ARMATURE"].object
+    return None
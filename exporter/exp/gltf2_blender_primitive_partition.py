@@ -0,0 +1,134 @@
+# Copyright 2018-2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import numpy as np
+
+from .gltf2_blender_extract import INDICES_ID, MATERIAL_ID, ATTRIBUTES_ID, POSITION_ATTRIBUTE
+from ..com.gltf2_io_debug import print_console
+
+#
+# Globals
+#
+
+# 65535 is the primitive restart value of UNSIGNED_SHORT indices, so the highest usable index is 65534.
+MAX_UNSIGNED_SHORT_VERTICES = 65535
+
+
+#
+# Functions
+#
+
+def partition_primitives(blender_primitives, max_vertices=MAX_UNSIGNED_SHORT_VERTICES):
+    """
+    Split primitives with more than max_vertices vertices, so that all of them can use UNSIGNED_SHORT indices.
+
+    The triangles of a primitive that is too large are sorted along a Morton curve through their centroids, and
+    cut into consecutive chunks of at most max_vertices unique vertices, so the chunks stay spatially coherent.
+    Primitives are in the format returned by extract_primitives.
+    """
+    result_primitives = []
+
+    for blender_primitive in blender_primitives:
+        positions = blender_primitive[ATTRIBUTES_ID][POSITION_ATTRIBUTE]
+        if len(positions) // 3 <= max_vertices:
+            result_primitives.append(blender_primitive)
+            continue
+
+        chunks = __partition(blender_primitive, max_vertices)
+        print_console('INFO', 'Primitive with {} vertices split into {} primitives.'.format(
+            len(positions) // 3, len(chunks)))
+        result_primitives.extend(chunks)
+
+    return result_primitives
+
+
+def __partition(blender_primitive, max_vertices):
+    """Split one primitive into chunks of at most max_vertices vertices."""
+    triangles = np.asarray(blender_primitive[INDICES_ID], dtype=np.int64).reshape(-1, 3)
+    attributes = blender_primitive[ATTRIBUTES_ID]
+    vertex_count = len(attributes[POSITION_ATTRIBUTE]) // 3
+
+    vertex_attributes = []
+    for name, values in attributes.items():
+        values = np.asarray(values)
+        vertex_attributes.append((name, values.reshape(vertex_count, -1)))
+
+    positions = np.asarray(attributes[POSITION_ATTRIBUTE], dtype=np.float64).reshape(-1, 3)
+    triangles = triangles[np.argsort(__morton_codes(positions[triangles].mean(axis=1)), kind='stable')]
+
+    chunks = []
+    start = 0
+    while start < len(triangles):
+        end = __chunk_end(triangles, start, max_vertices)
+        chunk_vertices, chunk_indices = np.unique(triangles[start:end], return_inverse=True)
+        chunks.append({
+            MATERIAL_ID: blender_primitive[MATERIAL_ID],
+            INDICES_ID: chunk_indices.reshape(-1).astype(np.uint32),
+            ATTRIBUTES_ID: {name: values[chunk_vertices].reshape(-1) for name, values in vertex_attributes}
+        })
+        start = end
+
+    return chunks
+
+
+def __chunk_end(triangles, start, max_vertices):
+    """
+    End of the chunk of triangles beginning at start: the longest run using at most max_vertices unique vertices.
+
+    The run is searched in a window, doubled as long as the whole window fits, so that only the triangles near
+    the cut are examined.
+    """
+    window = 2 * max_vertices
+    while True:
+        end = min(start + window, len(triangles))
+        corners = triangles[start:end].reshape(-1)
+
+        # Number of unique vertices used up to and including each corner.
+        _, first_corners = np.unique(corners, return_index=True)
+        new_vertices = np.zeros(len(corners), dtype=np.int64)
+        new_vertices[first_corners] = 1
+        triangle_vertex_counts = np.cumsum(new_vertices)[2::3]
+
+        fitting = int(np.searchsorted(triangle_vertex_counts, max_vertices, side='right'))
+        if fitting < end - start or end == len(triangles):
+            return start + max(fitting, 1)
+        window *= 2
+
+
+def __morton_codes(points):
+    """Morton codes of points, quantized to 21 bits per axis inside their bounding box."""
+    low = points.min(axis=0)
+    extent = points.max(axis=0) - low
+    extent[extent == 0.0] = 1.0
+    quantized = ((points - low) / extent * 0x1fffff).astype(np.uint64)
+
+    codes = np.zeros(len(points), dtype=np.uint64)
+    for axis in range(3):
+        codes |= __spread_bits(quantized[:, axis]) << np.uint64(axis)
+    return codes
+
+
+def __spread_bits(values):
+    """Insert two zero bits between each of the lower 21 bits of the values."""
+    values = values & np.uint64(0x1fffff)
+    values = (values | values << np.uint64(32)) & np.uint64(0x1f00000000ffff)
+    values = (values | values << np.uint64(16)) & np.uint64(0x1f0000ff0000ff)
+    values = (values | values << np.uint64(8)) & np.uint64(0x100f00f00f00f00f)
+    values = (values | values << np.uint64(4)) & np.uint64(0x10c30c30c30c30c3)
+    values = (values | values << np.uint64(2)) & np.uint64(0x1249249249249249)
+    return values
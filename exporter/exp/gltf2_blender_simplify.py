@@ -0,0 +1,366 @@
+# Copyright 2018-2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import numpy as np
+
+from ..com.gltf2_io_debug import print_console
+
+#
+# Globals
+#
+
+# Number of classes of collapse costs, in which independent collapses are chosen in random order.
+COST_CLASSES = 8
+
+# Rows and columns of the coefficients of symmetric 4x4 quadrics that are stored.
+QUADRIC_TERMS = [(row, column) for row in range(4) for column in range(row, 4)]
+
+
+#
+# Functions
+#
+
+def simplify_primitives(blender_primitives, ratio):
+    """
+    Simplify primitives to ratio of their triangles, using quadric error metrics.
+
+    Primitives are in the format returned by extract_primitives. Every primitive holds a single material, and
+    its vertices are split wherever UVs, normals or other attributes are discontinuous. The split vertices are
+    welded by position for the simplification, so that all copies of a vertex are collapsed together. Vertices on
+    the boundary edges of the welded primitive, which are those on open borders and material boundaries, are locked.
+
+    Edges are collapsed onto one of their vertices, whose copies replace those of the collapsed vertex in its
+    triangles, so that no attribute is changed or interpolated. A vertex on a UV seam or a hard edge only collapses
+    along the seam, onto a vertex with a copy on each side: a collapse across it would stretch the attributes of one
+    side over the other. Meshes split everywhere, such as flat shaded curved surfaces, therefore simplify little.
+
+    The collapses are done in passes, in NumPy. Each pass chooses the cheapest collapse of every vertex, and does
+    those that are the cheapest in their neighborhood, which are independent of each other.
+    """
+    result_primitives = []
+
+    for blender_primitive in blender_primitives:
+        triangle_count = len(blender_primitive['indices']) // 3
+        target_count = max(int(round(triangle_count * ratio)), 1)
+        if target_count >= triangle_count:
+            result_primitives.append(blender_primitive)
+            continue
+
+        simplified_primitive = simplify_primitive(blender_primitive, target_count)
+        simplified_count = len(simplified_primitive['indices']) // 3
+        print_console('INFO', 'Primitive simplified from {} to {} triangles.'.format(triangle_count, simplified_count))
+        if simplified_count > target_count:
+            print_console('WARNING', 'Primitive could only be simplified to a ratio of {:.3f} instead of {:.3f}: the '
+                                     'remaining vertices are on open borders or seams, or their collapses would fold '
+                                     'the surface.'.format(simplified_count / triangle_count, ratio))
+        result_primitives.append(simplified_primitive)
+
+    return result_primitives
+
+
+def simplify_primitive(blender_primitive, target_count):
+    """Simplify one primitive to at most target_count triangles, or as close as the locked vertices allow."""
+    attributes = blender_primitive['attributes']
+    positions = np.asarray(attributes['POSITION'], dtype=np.float64).reshape(-1, 3)
+    vertex_count = len(positions)
+
+    # The collapses work on the vertices welded by position, and the triangles keep the split vertices. These are
+    # numbered by position while simplifying, so that the copies of each welded vertex are consecutive.
+    vertex_order = np.lexsort(positions.T[::-1])
+    sorted_positions = positions[vertex_order]
+    first_copies = np.concatenate(([True], np.any(sorted_positions[1:] != sorted_positions[:-1], axis=1)))
+    vertex_welded = np.cumsum(first_copies) - 1
+    welded_positions = sorted_positions[first_copies]
+    welded_count = len(welded_positions)
+    vertex_numbers = np.empty(vertex_count, dtype=np.int64)
+    vertex_numbers[vertex_order] = np.arange(vertex_count)
+    triangles = vertex_numbers[np.asarray(blender_primitive['indices'], dtype=np.int64).reshape(-1, 3)]
+
+    quadrics = __vertex_quadrics(welded_positions, vertex_welded[triangles])
+    monomials = __monomials(welded_positions)
+    locked = __boundary_vertices(vertex_welded[triangles], welded_count)
+    # Keys of the collapses that failed the topology or flip checks, which are not tried again.
+    rejected = np.empty(0, dtype=np.int64)
+
+    while len(triangles) > target_count:
+        welded_triangles = vertex_welded[triangles]
+        edges = __directed_edges(welded_triangles, welded_count)
+        sources, destinations, shared_counts, edge_keys = edges
+        copy_pairs = __copy_pairs(triangles, vertex_welded, welded_count)
+
+        # Candidate collapses source -> destination, with an unlocked source, along seams only.
+        candidates = ~locked[sources] & __along_seams(edge_keys, copy_pairs, triangles, vertex_welded, welded_count)
+        found, rejected_edges = __find_keys(edge_keys, rejected)
+        candidates[rejected_edges[found]] = False
+        candidates = np.flatnonzero(candidates)
+        if len(candidates) == 0:
+            break
+
+        costs = __collapse_costs(quadrics, monomials, sources[candidates], destinations[candidates])
+        chosen = candidates[__independent_collapses(costs, sources[candidates], edges, welded_count)]
+
+        failed = ~__keeps_topology(chosen, edges, welded_count) \
+            | __flips_triangles(chosen, edges, welded_triangles, welded_positions, welded_count)
+        rejected = np.union1d(rejected, edge_keys[chosen[failed]])
+        chosen = chosen[~failed]
+
+        # The collapses are in the order of their cost: stop at those that reach the target.
+        removed = np.cumsum(shared_counts[chosen])
+        chosen = chosen[removed - shared_counts[chosen] < len(triangles) - target_count]
+        if len(chosen) == 0:
+            continue
+
+        triangles = __collapse(triangles, sources[chosen], destinations[chosen], copy_pairs, vertex_welded,
+                               welded_count)
+        quadrics[:, destinations[chosen]] += quadrics[:, sources[chosen]]
+
+    # Drop removed vertices, keeping the original order of the rest.
+    used = np.zeros(vertex_count, dtype=np.bool_)
+    used[vertex_order[triangles]] = True
+    used_vertices = np.flatnonzero(used)
+    output_numbers = np.cumsum(used) - 1
+    indices = output_numbers[vertex_order[triangles]]
+
+    return {
+        'material': blender_primitive['material'],
+        'indices': indices.reshape(-1).astype(np.uint32),
+        'attributes': {
+            name: np.asarray(values).reshape(vertex_count, -1)[used_vertices].reshape(-1)
+            for name, values in attributes.items()
+        }
+    }
+
+
+def __vertex_quadrics(positions, triangles):
+    """
+    Sum of the area weighted plane quadrics of the triangles around each vertex.
+
+    :return: the ten coefficients of the upper triangle of the symmetric 4x4 quadrics, one row per coefficient
+    """
+    corners = positions[triangles]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    double_areas = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, double_areas, out=np.zeros_like(normals), where=double_areas != 0.0)
+    planes = np.concatenate((normals, -np.einsum('ij,ij->i', normals, corners[:, 0])[:, np.newaxis]), axis=1)
+
+    quadrics = np.zeros((len(QUADRIC_TERMS), len(positions)))
+    for term, (row, column) in enumerate(QUADRIC_TERMS):
+        triangle_terms = double_areas[:, 0] / 2.0 * planes[:, row] * planes[:, column]
+        for corner in range(3):
+            quadrics[term] += np.bincount(triangles[:, corner], weights=triangle_terms, minlength=len(positions))
+    return quadrics
+
+
+def __monomials(positions):
+    """The products of the homogeneous coordinates of points, which give a quadric error as a sum with its terms."""
+    points = np.concatenate((positions, np.ones((len(positions), 1))), axis=1)
+    return np.stack([points[:, row] * points[:, column] * (1.0 if row == column else 2.0)
+                     for row, column in QUADRIC_TERMS])
+
+
+def __boundary_vertices(triangles, vertex_count):
+    """Vertices on edges that are not shared by exactly two triangles."""
+    edges = np.sort(np.concatenate((triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]])), axis=1)
+    keys, edge_uses = __unique(edges[:, 0] * vertex_count + edges[:, 1])
+
+    locked = np.zeros(vertex_count, dtype=np.bool_)
+    locked[np.concatenate(np.divmod(keys[edge_uses != 2], vertex_count))] = True
+    return locked
+
+
+def __unique(values):
+    """The sorted unique values, and how often each occurs."""
+    values = np.sort(values)
+    starts = np.flatnonzero(np.diff(values, prepend=-1))
+    return values[starts], np.diff(np.append(starts, len(values)))
+
+
+def __find_keys(sorted_keys, keys):
+    """Check which keys are in sorted_keys, and where."""
+    positions = np.minimum(np.searchsorted(sorted_keys, keys), max(len(sorted_keys) - 1, 0))
+    if len(sorted_keys) == 0:
+        return np.zeros(len(keys), dtype=np.bool_), positions
+    return sorted_keys[positions] == keys, positions
+
+
+def __directed_edges(welded_triangles, welded_count):
+    """
+    Both directions of the edges of the welded triangles, sorted by source and destination.
+
+    :return: the sources, destinations, numbers of triangles sharing each edge, and keys of the directed edges
+    """
+    sides = [welded_triangles[:, [corner, (corner + 1) % 3]] for corner in range(3)]
+    keys, shared_counts = __unique(np.concatenate([side[:, 0] * welded_count + side[:, 1] for side in sides]
+                                                  + [side[:, 1] * welded_count + side[:, 0] for side in sides]))
+    sources, destinations = np.divmod(keys, welded_count)
+    return sources, destinations, shared_counts, keys
+
+
+def __copy_pairs(triangles, vertex_welded, welded_count):
+    """
+    The pairs of split vertices in a triangle, sorted by the first vertex and the welded second one.
+
+    :return: the first and second vertices of the pairs, and their keys
+    """
+    vertex_count = len(vertex_welded)
+    pairs, _ = __unique(np.concatenate([triangles[:, corner] * vertex_count + triangles[:, (corner + offset) % 3]
+                                        for corner in range(3) for offset in (1, 2)]))
+    first, second = np.divmod(pairs, vertex_count)
+    # the split vertices are numbered by welded vertex, so the pairs are also sorted by these keys
+    return first, second, first * welded_count + vertex_welded[second]
+
+
+def __along_seams(edge_keys, copy_pairs, triangles, vertex_welded, welded_count):
+    """
+    Check for each directed edge that every copy of its source has one copy of its destination in its triangles.
+
+    Then each copy of the source is replaced by a copy of the destination with the same attributes, which does not
+    hold for a collapse across a seam.
+    """
+    # the number of copies of the destination in the triangles of each copy of the source
+    copy_keys, reached_counts = __unique(copy_pairs[2])
+    edges = np.searchsorted(edge_keys, vertex_welded[copy_keys // welded_count] * welded_count
+                            + copy_keys % welded_count)
+    single = np.bincount(edges, weights=reached_counts == 1, minlength=len(edge_keys))
+    several = np.bincount(edges, weights=reached_counts > 1, minlength=len(edge_keys))
+
+    used = np.zeros(len(vertex_welded), dtype=np.bool_)
+    used[triangles] = True
+    copy_counts = np.bincount(vertex_welded[used], minlength=welded_count)
+    return (single == copy_counts[edge_keys // welded_count]) & (several == 0)
+
+
+def __collapse_costs(quadrics, monomials, sources, destinations):
+    """Quadric error of moving each source vertex onto its destination vertex."""
+    costs = np.einsum('ij,ij->j', quadrics, monomials)[destinations]
+    for quadric, monomial in zip(quadrics, monomials):
+        costs += quadric[sources] * monomial[destinations]
+    return costs
+
+
+def __independent_collapses(costs, sources, edges, welded_count):
+    """
+    Choose the cheapest collapse of each vertex, and a set of them whose sources are more than two edges apart.
+
+    Such collapses change disjoint sets of triangles. The sources are taken by the cost of their collapse in a few
+    classes, and in a fixed random order within a class: in cost order only, few sources would be cheaper than all
+    others around them where the costs change smoothly. The collapses are returned in the order of their cost.
+
+    :param sources: the sources of the collapses, in ascending order
+    """
+    # the first of the cheapest collapses of each source
+    starts = np.flatnonzero(np.diff(sources, prepend=-1))
+    groups = np.cumsum(np.diff(sources, prepend=sources[0]) != 0)
+    cheapest = np.flatnonzero(costs == np.minimum.reduceat(costs, starts)[groups])
+    best = cheapest[np.flatnonzero(np.diff(groups[cheapest], prepend=-1))]
+    best_sources = sources[best]
+
+    cost_ranks = np.empty(len(best), dtype=np.int64)
+    cost_ranks[np.argsort(costs[best], kind='stable')] = np.arange(len(best))
+    random_ranks = np.random.default_rng(0).permutation(len(best))
+    no_priority = len(best) * COST_CLASSES
+    priorities = np.full(welded_count, no_priority, dtype=np.int64)
+    priorities[best_sources] = cost_ranks * COST_CLASSES // len(best) * len(best) + random_ranks
+
+    edge_sources, edge_destinations = edges[0], edges[1]
+    edge_starts = np.flatnonzero(np.diff(edge_sources, prepend=-1))
+    around = lambda values, function: __around(values, edge_sources[edge_starts], edge_starts,
+                                               edge_destinations, function)
+
+    chosen = np.zeros(welded_count, dtype=np.bool_)
+    available = priorities < no_priority
+    while available.any():
+        # the sources with the first priority within two edges, then those that are not within two edges of them
+        available_priorities = np.where(available, priorities, no_priority)
+        new = available & (available_priorities == around(around(available_priorities, np.minimum), np.minimum))
+        chosen |= new
+        # the last rounds add few collapses, which are left to the next pass
+        if np.count_nonzero(new) * 16 < np.count_nonzero(chosen):
+            break
+        available &= ~around(around(new, np.maximum), np.maximum)
+
+    chosen = best[chosen[best_sources]]
+    return chosen[np.argsort(costs[chosen], kind='stable')]
+
+
+def __around(values, vertices, starts, neighbors, function):
+    """Apply function to the values of each vertex and its neighbors, which start at starts for each of vertices."""
+    result = values.copy()
+    result[vertices] = function(values[vertices], function.reduceat(values[neighbors], starts))
+    return result
+
+
+def __expand_ranges(starts, counts):
+    """The index of the range of every element of consecutive ranges, and the elements themselves."""
+    owners = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owners, np.repeat(starts, counts) + offsets
+
+
+def __keeps_topology(chosen, edges, welded_count):
+    """Link condition: the only common neighbors of source and destination are opposite them in shared triangles."""
+    sources, destinations, shared_counts, edge_keys = edges
+    starts = np.searchsorted(sources, sources[chosen])
+    counts = np.searchsorted(sources, sources[chosen], side='right') - starts
+    owners, neighbor_edges = __expand_ranges(starts, counts)
+
+    # the neighbors of the source that are also neighbors of the destination
+    common, _ = __find_keys(edge_keys, destinations[chosen][owners] * welded_count + destinations[neighbor_edges])
+    return np.bincount(owners, weights=common, minlength=len(chosen)) == shared_counts[chosen]
+
+
+def __flips_triangles(chosen, edges, welded_triangles, positions, welded_count):
+    """Check whether a triangle around each source turns by more than 60 degrees, or degenerates."""
+    sources, destinations = edges[0][chosen], edges[1][chosen]
+    owner_of = np.full(welded_count, -1, dtype=np.int64)
+    owner_of[sources] = np.arange(len(chosen))
+    corners = np.flatnonzero(owner_of[welded_triangles.reshape(-1)] >= 0)
+    owners = owner_of[welded_triangles.reshape(-1)[corners]]
+
+    # the triangles that are moved, not removed
+    moved = ~np.any(welded_triangles[corners // 3] == destinations[owners][:, np.newaxis], axis=1)
+    owners = owners[moved]
+    corners = corners[moved]
+
+    old_corners = positions[welded_triangles[corners // 3]]
+    new_corners = old_corners.copy()
+    new_corners[np.arange(len(corners)), corners % 3] = positions[destinations[owners]]
+    old_normals = np.cross(old_corners[:, 1] - old_corners[:, 0], old_corners[:, 2] - old_corners[:, 0])
+    new_normals = np.cross(new_corners[:, 1] - new_corners[:, 0], new_corners[:, 2] - new_corners[:, 0])
+    dots = np.einsum('ij,ij->i', old_normals, new_normals)
+    flipped = (dots <= 0.0) | (dots * dots < 0.25 * np.einsum('ij,ij->i', old_normals, old_normals)
+                               * np.einsum('ij,ij->i', new_normals, new_normals))
+    return np.bincount(owners, weights=flipped, minlength=len(chosen)) > 0
+
+
+def __collapse(triangles, sources, destinations, copy_pairs, vertex_welded, welded_count):
+    """Replace every copy of the sources by the copy of the destination in its triangles, and drop those removed."""
+    _, second, keys = copy_pairs
+    destination_of = np.full(welded_count, -1, dtype=np.int64)
+    destination_of[sources] = destinations
+
+    vertices = np.flatnonzero(destination_of[vertex_welded] >= 0)
+    _, pairs = __find_keys(keys, vertices * welded_count + destination_of[vertex_welded[vertices]])
+    remap = np.arange(len(vertex_welded))
+    remap[vertices] = second[pairs]
+
+    triangles = remap[triangles]
+    welded_triangles = vertex_welded[triangles]
+    kept = (welded_triangles[:, 0] != welded_triangles[:, 1]) & (welded_triangles[:, 1] != welded_triangles[:, 2]) \
+        & (welded_triangles[:, 2] != welded_triangles[:, 0])
+    return triangles[kept]
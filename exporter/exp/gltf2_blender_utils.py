@@ -12,7 +12,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import math
 from ..com import gltf2_io_constants
 
 
@@ -32,36 +31,3 @@ def split_list_by_data_type(l: list, data_type: gltf2_io_constants.DataType):
     num_elements = gltf2_io_constants.DataType.num_elements(data_type)
     return [l[i:i + num_elements] for i in range(0, len(l), num_elements)]
 
-
-def max_components(l: list, data_type: gltf2_io_constants.DataType) -> list:
-    """
-    Find the maximum components in a flat list.
-
-    This is required, for example, for the glTF2.0 accessor min and max properties
-    :param l: the flat list of components
-    :param data_type: the data type of the list (determines the length of the result)
-    :return: a list with length num_elements(data_type) containing the maximum per component along the list
-    """
-    components_lists = split_list_by_data_type(l, data_type)
-    result = [-math.inf] * gltf2_io_constants.DataType.num_elements(data_type)
-    for components in components_lists:
-        for i, c in enumerate(components):
-            result[i] = max(result[i], c)
-    return result
-
-
-def min_components(l: list, data_type: gltf2_io_constants.DataType) -> list:
-    """
-    Find the minimum components in a flat list.
-
-    This is required, for example, for the glTF2.0 accessor min and max properties
-    :param l: the flat list of components
-    :param data_type: the data type of the list (determines the length of the result)
-    :return: a list with length num_elements(data_type) containing the minimum per component along the list
-    """
-    components_lists = split_list_by_data_type(l, data_type)
-    result = [math.inf] * gltf2_io_constants.DataType.num_elements(data_type)
-    for components in components_lists:
-        for i, c in enumerate(components):
-            result[i] = min(result[i], c)
-    return result
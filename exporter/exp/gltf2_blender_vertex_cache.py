@@ -0,0 +1,179 @@
+# Copyright 2018-2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import numpy as np
+
+from ..com.gltf2_io_debug import print_console
+
+#
+# Globals
+#
+
+# Size of the simulated post-transform vertex cache.
+CACHE_SIZE = 16
+
+
+#
+# Functions
+#
+
+def optimize_primitives(blender_primitives, cache_size=CACHE_SIZE):
+    """
+    Reorder the triangles and vertices of primitives for GPU vertex cache and vertex fetch locality.
+
+    Primitives are in the format returned by extract_primitives and are modified in place: triangles are
+    reordered with Tipsify, then vertices are renumbered in the order of their first use, and all attributes,
+    morph targets included, are remapped to match. The ACMR that is reported is counted by Tipsify, which simulates
+    the cache while emitting the triangles, instead of simulating it again over the indices.
+    """
+    for blender_primitive in blender_primitives:
+        indices = np.asarray(blender_primitive['indices'], dtype=np.int64)
+        attributes = blender_primitive['attributes']
+        vertex_count = len(attributes['POSITION']) // 3
+        if len(indices) < 3:
+            continue
+
+        indices, cache_misses = __tipsify(indices, vertex_count, cache_size)
+        # renumbering the vertices does not change the cache misses
+        indices, vertex_order = optimize_vertex_fetch(indices, vertex_count)
+
+        blender_primitive['indices'] = indices.astype(np.uint32)
+        for name, values in attributes.items():
+            values = np.asarray(values)
+            attributes[name] = values.reshape(vertex_count, -1)[vertex_order].reshape(-1)
+
+        print_console('INFO', 'Vertex cache ACMR: {:.3f} ({} triangles)'.format(
+            cache_misses / (len(indices) // 3), len(indices) // 3))
+
+    return blender_primitives
+
+
+def tipsify(indices, vertex_count, cache_size=CACHE_SIZE):
+    """
+    Reorder triangles for a vertex cache of cache_size entries.
+
+    Implements Tipsify from Sander, Nehab and Barczak, "Fast Triangle Reordering for Vertex Locality and Reduced
+    Overdraw", 2007: triangles are emitted as fans around a vertex, and the next fanning vertex is chosen among
+    the vertices of the last fan that are still in the cache.
+
+    :return: the reordered indices
+    """
+    return __tipsify(indices, vertex_count, cache_size)[0]
+
+
+def __tipsify(indices, vertex_count, cache_size):
+    """Tipsify, also returning the number of misses of the simulated cache over the reordered indices."""
+    triangles = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    triangle_count = len(triangles)
+
+    # Vertex to triangle adjacency, in compressed sparse row format.
+    corners = triangles.reshape(-1)
+    adjacency = (np.argsort(corners, kind='stable') // 3).tolist()
+    adjacency_start = np.concatenate(([0], np.cumsum(np.bincount(corners, minlength=vertex_count)))).tolist()
+
+    live_triangles = np.bincount(corners, minlength=vertex_count).tolist()
+    cache_time = [0] * vertex_count
+    emitted = [False] * triangle_count
+    triangle_list = triangles.tolist()
+
+    dead_end = []
+    output = []
+    timestamp = cache_size + 1
+    cursor = 0
+    fanning_vertex = int(corners[0])
+
+    while fanning_vertex >= 0:
+        candidates = []
+        for triangle in adjacency[adjacency_start[fanning_vertex]:adjacency_start[fanning_vertex + 1]]:
+            if emitted[triangle]:
+                continue
+            emitted[triangle] = True
+            for vertex in triangle_list[triangle]:
+                output.append(vertex)
+                dead_end.append(vertex)
+                candidates.append(vertex)
+                live_triangles[vertex] -= 1
+                if timestamp - cache_time[vertex] > cache_size:
+                    cache_time[vertex] = timestamp
+                    timestamp += 1
+
+        # Next fanning vertex: the candidate that stays longest in the cache after its fan is emitted.
+        fanning_vertex = -1
+        best_priority = -1
+        for vertex in candidates:
+            if live_triangles[vertex] > 0:
+                priority = 0
+                if timestamp - cache_time[vertex] + 2 * live_triangles[vertex] <= cache_size:
+                    priority = timestamp - cache_time[vertex]
+                if priority > best_priority:
+                    best_priority = priority
+                    fanning_vertex = vertex
+
+        if fanning_vertex == -1:
+            # Dead end: a recently used vertex with remaining triangles, or the next one in input order.
+            while dead_end:
+                vertex = dead_end.pop()
+                if live_triangles[vertex] > 0:
+                    fanning_vertex = vertex
+                    break
+            else:
+                while cursor < vertex_count:
+                    if live_triangles[cursor] > 0:
+                        fanning_vertex = cursor
+                        break
+                    cursor += 1
+
+    return np.array(output, dtype=np.int64), timestamp - cache_size - 1
+
+
+def optimize_vertex_fetch(indices, vertex_count):
+    """
+    Renumber vertices in the order of their first use by the indices. Unused vertices are moved to the end.
+
+    :return: the remapped indices and, for each new vertex, its old vertex index
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    used_vertices, first_uses = np.unique(indices, return_index=True)
+    vertex_order = used_vertices[np.argsort(first_uses)]
+
+    unused = np.ones(vertex_count, dtype=np.bool_)
+    unused[vertex_order] = False
+    vertex_order = np.concatenate((vertex_order, np.flatnonzero(unused)))
+
+    remap = np.empty(vertex_count, dtype=np.int64)
+    remap[vertex_order] = np.arange(vertex_count)
+    return remap[indices], vertex_order
+
+
+def average_cache_miss_ratio(indices, cache_size=CACHE_SIZE):
+    """
+    Average number of vertex cache misses per triangle, for a FIFO cache of cache_size entries.
+
+    This simulates the cache over all indices. optimize_primitives reports the misses counted by Tipsify instead.
+    """
+    triangle_count = len(indices) // 3
+    if triangle_count == 0:
+        return 0.0
+
+    cached_since = {}
+    misses = 0
+    for vertex in np.asarray(indices).tolist():
+        if misses - cached_since.get(vertex, -cache_size - 1) > cache_size:
+            cached_since[vertex] = misses
+            misses += 1
+    return misses / triangle_count
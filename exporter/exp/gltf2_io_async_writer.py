@@ -0,0 +1,109 @@
+# Copyright 2018-2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ..com.gltf2_io_debug import print_console
+
+#
+# Globals
+#
+
+# Threads writing files at the same time.
+WORKER_COUNT = 2
+
+# Writes that may be waiting or running before submitting another one blocks. This bounds the memory held by the
+# payloads that are not written yet.
+MAX_PENDING = 4
+
+
+#
+# Classes
+#
+
+class AsyncWriter:
+    """
+    Write files on background threads, while the export goes on with the next model.
+
+    The payloads must be complete when they are submitted: the writes must not read anything the export changes
+    afterwards, such as the glTF properties, which are modified in place by the traversal of the next model.
+
+    An error of a write is raised again on the exporting thread, by the next submit or when the writer is closed.
+    """
+
+    def __init__(self, worker_count=WORKER_COUNT, max_pending=MAX_PENDING):
+        self.__executor = ThreadPoolExecutor(max_workers=worker_count)
+        self.__pending = threading.BoundedSemaphore(max_pending)
+        self.__futures = []
+
+    def submit(self, path, write):
+        """Open path for writing, as binary file open for update, and call write with the file in the background."""
+        self.__raise_error()
+        self.__pending.acquire()
+        try:
+            future = self.__executor.submit(write_file, path, write)
+        except BaseException:
+            self.__pending.release()
+            raise
+        future.add_done_callback(lambda _: self.__pending.release())
+        self.__futures.append((path, future))
+
+    def close(self):
+        """Wait for all writes, and raise the error of the first one that failed."""
+        self.__executor.shutdown(wait=True)
+        self.__raise_error()
+
+    def __raise_error(self):
+        futures = []
+        for path, future in self.__futures:
+            if not future.done():
+                futures.append((path, future))
+            elif future.exception() is not None:
+                self.__futures = []
+                print_console('ERROR', 'Writing {} failed: {}'.format(path, future.exception()))
+                raise future.exception()
+        self.__futures = futures
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # an error of the export itself takes precedence over errors of the writes
+            self.__executor.shutdown(wait=True)
+
+
+#
+# Functions
+#
+
+def write_file(path, write, writer=None):
+    """
+    Open path as binary file open for update, and call write with the file.
+
+    If a writer is given, this is done in the background.
+    """
+    if writer is not None:
+        writer.submit(path, write)
+        return
+
+    with open(path, 'w+b') as file:
+        write(file)
@@ -13,29 +13,107 @@
 # limitations under the License.
 
 import typing
-import array
+import numpy as np
 from ..com import gltf2_io_constants
 
 
+# Little endian NumPy types of the glTF component types.
+NUMPY_DTYPES = {
+    gltf2_io_constants.ComponentType.Byte: '<i1',
+    gltf2_io_constants.ComponentType.UnsignedByte: '<u1',
+    gltf2_io_constants.ComponentType.Short: '<i2',
+    gltf2_io_constants.ComponentType.UnsignedShort: '<u2',
+    gltf2_io_constants.ComponentType.UnsignedInt: '<u4',
+    gltf2_io_constants.ComponentType.Float: '<f4'
+}
+
+
 class BinaryData:
-    """Store for gltf binary data that can later be stored in a buffer."""
+    """
+    Store for gltf binary data that can later be stored in a buffer.
 
-    def __init__(self, data: bytes):
-        if not isinstance(data, bytes):
-            raise TypeError("Data is not a bytes array")
-        self.data = data
+    The data can be any contiguous object supporting the buffer protocol, such as bytes, a NumPy array or a
+    memoryview. It is referenced, not copied. Data of accessors also knows its component type and data type.
+    """
+
+    def __init__(self, data, byte_stride: typing.Optional[int] = None,
+                 component_type: typing.Optional[gltf2_io_constants.ComponentType] = None,
+                 data_type: typing.Optional[str] = None):
+        try:
+            view = memoryview(data)
+        except TypeError:
+            raise TypeError("Data does not support the buffer protocol")
+        if not view.c_contiguous:
+            raise TypeError("Data is not contiguous")
+        if view.nbytes == 0:
+            view = memoryview(b"")
+        # A flat view on the bytes, whatever the shape and type of the data.
+        self.data = view.cast('B') if view.ndim != 1 or view.format != 'B' else view
+        self.byte_stride = byte_stride
+        self.component_type = component_type
+        self.data_type = data_type
 
     def __eq__(self, other):
-        return self.data == other.data
+        return self.data == other.data and self.byte_stride == other.byte_stride
 
     def __hash__(self):
-        return hash(self.data)
+        return hash(self.to_bytes())
+
+    def __deepcopy__(self, memo):
+        # the data is never modified, so copies of the glTF properties holding it can share it
+        return self
 
     @classmethod
-    def from_list(cls, lst: typing.List[typing.Any], gltf_component_type: gltf2_io_constants.ComponentType):
-        format_char = gltf2_io_constants.ComponentType.to_type_code(gltf_component_type)
-        return BinaryData(array.array(format_char, lst).tobytes())
+    def from_list(cls, lst: typing.List[typing.Any], gltf_component_type: gltf2_io_constants.ComponentType,
+                  data_type: typing.Optional[str] = None):
+        values = np.asarray(lst, dtype=NUMPY_DTYPES[gltf_component_type])
+        return BinaryData(values, component_type=gltf_component_type, data_type=data_type)
+
+    @classmethod
+    def from_array(cls, values, gltf_component_type: gltf2_io_constants.ComponentType,
+                   data_type: typing.Optional[str] = None, byte_stride: typing.Optional[int] = None):
+        """Store a NumPy array, converted to the component type only if it is not stored that way already."""
+        values = np.ascontiguousarray(values, dtype=NUMPY_DTYPES[gltf_component_type])
+        return BinaryData(values, byte_stride, gltf_component_type, data_type)
 
     @property
     def byte_length(self):
         return len(self.data)
+
+    @property
+    def element_byte_length(self):
+        return gltf2_io_constants.ComponentType.get_size(self.component_type) * \
+            gltf2_io_constants.DataType.num_elements(self.data_type)
+
+    @property
+    def count(self):
+        """Number of elements, for data with a component type and data type."""
+        if self.byte_stride is None:
+            return self.byte_length // self.element_byte_length
+        if self.byte_length < self.element_byte_length:
+            return 0
+        return (self.byte_length - self.element_byte_length) // self.byte_stride + 1
+
+    def to_array(self):
+        """Elements as an array view of shape (count, number of components), skipping padding between them."""
+        num_elements = gltf2_io_constants.DataType.num_elements(self.data_type)
+        dtype = np.dtype(NUMPY_DTYPES[self.component_type])
+        return np.ndarray(shape=(self.count, num_elements), dtype=dtype, buffer=self.data,
+                          strides=(self.byte_stride or self.element_byte_length, dtype.itemsize))
+
+    def min_max(self):
+        """
+        Find the minimum and maximum components, in one pass over the data.
+
+        This is required, for example, for the glTF2.0 accessor min and max properties
+        :return: two lists of floats with length num_elements(data_type), or None for empty data
+        """
+        values = self.to_array()
+        if len(values) == 0:
+            return None, None
+        # The accessor min and max are floats, also for integer components, which they represent exactly.
+        return values.min(axis=0).astype(np.float64).tolist(), values.max(axis=0).astype(np.float64).tolist()
+
+    def to_bytes(self):
+        return self.data.tobytes()
+
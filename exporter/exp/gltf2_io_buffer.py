@@ -13,48 +13,137 @@
 # limitations under the License.
 
 import base64
+import hashlib
 
 from ..com import gltf2_io
 from . import gltf2_io_binary_data
+from . import gltf2_io_json_writer
+
+# Byte offsets of buffer views are aligned to this, which suits all component types.
+ALIGNMENT = 4
+
+# Bytes encoded to base64 at once. A multiple of 3, so that the encoded blocks can be concatenated.
+BASE64_BLOCK_SIZE = 3 * (1 << 14)
+
+EMBED_PREFIX = 'data:application/octet-stream;base64,'
 
 
 class Buffer:
-    """Class representing binary data for use in a glTF file as 'buffer' property."""
+    """
+    Class representing binary data for use in a glTF file as 'buffer' property.
+
+    The data is kept as a list of chunks, views on the data of the added BinaryData and padding, which are
+    written out one after another instead of being concatenated.
+
+    Buffer views are indexed by a hash of their content, so that data identical to data added before is not
+    stored again, and the buffer view of the first one is returned instead.
+    """
 
     def __init__(self, buffer_index=0):
-        self.__data = b""
+        self.__chunks = []
+        self.__byte_length = 0
         self.__buffer_index = buffer_index
+        self.__views = {}
+        self.__reused_view_count = 0
+        self.__saved_byte_length = 0
 
     def add_and_get_view(self, binary_data: gltf2_io_binary_data.BinaryData) -> gltf2_io.BufferView:
         """Add binary data to the buffer. Return a glTF BufferView."""
-        offset = len(self.__data)
-        self.__data += binary_data.data
+        key = (hashlib.sha1(binary_data.data).digest(), binary_data.byte_length, binary_data.byte_stride)
+        existing = self.__views.get(key)
+        if existing is not None and existing[0] == binary_data.data:
+            self.__reused_view_count += 1
+            self.__saved_byte_length += binary_data.byte_length
+            return existing[1]
+
+        offset = self.__byte_length
+        self.__chunks.append(memoryview(binary_data.data))
+        self.__byte_length += binary_data.byte_length
 
         # offsets should be a multiple of 4 --> therefore add padding if necessary
-        padding = (4 - (binary_data.byte_length % 4)) % 4
-        self.__data += b"\x00" * padding
+        padding = (ALIGNMENT - (binary_data.byte_length % ALIGNMENT)) % ALIGNMENT
+        if padding > 0:
+            self.__chunks.append(b"\x00" * padding)
+            self.__byte_length += padding
 
         buffer_view = gltf2_io.BufferView(
             buffer=self.__buffer_index,
             byte_length=binary_data.byte_length,
             byte_offset=offset,
-            byte_stride=None,
+            byte_stride=binary_data.byte_stride,
             extensions=None,
             extras=None,
             name=None,
             target=None
         )
+        self.__views[key] = (binary_data.data, buffer_view)
         return buffer_view
 
     @property
     def byte_length(self):
-        return len(self.__data)
+        return self.__byte_length
+
+    @property
+    def reused_view_count(self):
+        """Number of buffer views returned again for identical data."""
+        return self.__reused_view_count
+
+    @property
+    def saved_byte_length(self):
+        """Number of bytes not stored, because identical data was stored before."""
+        return self.__saved_byte_length
+
+    @property
+    def chunks(self):
+        return self.__chunks
+
+    def write_to(self, file):
+        """Write the buffer to a binary file object, chunk by chunk."""
+        file.writelines(self.__chunks)
 
     def to_bytes(self):
-        return self.__data
+        return b"".join(self.__chunks)
 
     def to_embed_string(self):
-        return 'data:application/octet-stream;base64,' + base64.b64encode(self.__data).decode('ascii')
+        """
+        Return the buffer as a data URI, which is base64 encoded in blocks while the JSON is written.
+
+        The chunks are encoded where they are, so neither the joined data nor the whole encoded string is built.
+        The string keeps the chunks, so it can also be written after the buffer is cleared.
+
+        The returned StreamedString is not a str, and only JSONWriter writes it. Code that needs the URI elsewhere,
+        such as a user extension, must encode to_bytes() itself.
+        """
+        chunks = self.__chunks
+        return gltf2_io_json_writer.StreamedString(EMBED_PREFIX, lambda: iter_base64(chunks))
 
     def clear(self):
-        self.__data = b""
+        self.__chunks = []
+        self.__byte_length = 0
+        self.__views = {}
+        self.__reused_view_count = 0
+        self.__saved_byte_length = 0
+
+
+def iter_base64(chunks, block_size=BASE64_BLOCK_SIZE):
+    """Base64 encode the concatenation of chunks of bytes, yielding the encoded text block by block."""
+    carry = b""
+    for chunk in chunks:
+        view = memoryview(chunk)
+        if carry:
+            # complete the bytes left over from the previous chunks to a group of 3
+            head = 3 - len(carry)
+            carry += view[:head].tobytes()
+            view = view[head:]
+            if len(carry) < 3:
+                continue
+            yield base64.b64encode(carry).decode('ascii')
+            carry = b""
+
+        end = len(view) - len(view) % 3
+        for start in range(0, end, block_size):
+            yield base64.b64encode(view[start:min(start + block_size, end)]).decode('ascii')
+        carry = view[end:].tobytes()
+
+    if carry:
+        yield base64.b64encode(carry).decode('ascii')
@@ -228,7 +228,7 @@ def __compress_primitive(primitive, dll, export_settings):
 
     # Add attributes to mesh compressor, remembering each attribute's Draco id.
 
-    position_id = dll.add_positions_f32(compressor, count, positions.buffer_view.data)
+    position_id = dll.add_positions_f32(compressor, count, positions.buffer_view.to_bytes())
 
     normal_id = None
     if normals is not None:
@@ -236,7 +236,7 @@ def __compress_primitive(primitive, dll, export_settings):
             print_console('INFO', 'Draco exporter: Mismatching normal count. Skipping.')
             dll.disposeCompressor(compressor)
             return
-        normal_id = dll.add_normals_f32(compressor, normals.count, normals.buffer_view.data)
+        normal_id = dll.add_normals_f32(compressor, normals.count, normals.buffer_view.to_bytes())
 
     uv_ids = []
     for uv in uvs:
@@ -244,7 +244,7 @@ def __compress_primitive(primitive, dll, export_settings):
             print_console('INFO', 'Draco exporter: Mismatching uv count. Skipping.')
             dll.disposeCompressor(compressor)
             return
-        uv_ids.append(dll.add_uvs_f32(compressor, uv.count, uv.buffer_view.data))
+        uv_ids.append(dll.add_uvs_f32(compressor, uv.count, uv.buffer_view.to_bytes()))
 
     weight_ids = []
     for weight in weights:
@@ -252,7 +252,7 @@ def __compress_primitive(primitive, dll, export_settings):
             print_console('INFO', 'Draco exporter: Mismatching weight count. Skipping.')
             dll.disposeCompressor(compressor)
             return
-        weight_ids.append(dll.add_weights_f32(compressor, weight.count, weight.buffer_view.data))
+        weight_ids.append(dll.add_weights_f32(compressor, weight.count, weight.buffer_view.to_bytes()))
 
     joint_ids = []
     for joint in joints:
@@ -260,10 +260,10 @@ def __compress_primitive(primitive, dll, export_settings):
             print_console('INFO', 'Draco exporter: Mismatching joint count. Skipping.')
             dll.disposeCompressor(compressor)
             return
-        joint_ids.append(dll.add_joints_u16(compressor, joint.count, joint.buffer_view.data))
+        joint_ids.append(dll.add_joints_u16(compressor, joint.count, joint.buffer_view.to_bytes()))
 
     # Add face indices to mesh compressor.
-    dll.set_faces(compressor, indices.count, component_type_byte_length[indices.component_type.name], indices.buffer_view.data)
+    dll.set_faces(compressor, indices.count, component_type_byte_length[indices.component_type.name], indices.buffer_view.to_bytes())
 
     # Set compression parameters.
     dll.set_compression_level(compressor, export_settings['gltf_draco_mesh_compression_level'])
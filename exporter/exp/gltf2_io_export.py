@@ -16,9 +16,12 @@
 # Imports
 #
 
-import json
 import struct
 
+from . import gltf2_blender_export_keys
+from . import gltf2_io_async_writer
+from . import gltf2_io_json_writer
+
 #
 # Globals
 #
@@ -26,49 +29,62 @@ import struct
 #
 # Functions
 #
-from collections import OrderedDict
 
+def save_gltf(gltf, export_settings, encoder, glb_buffer, writer=None):
+    """
+    Write a glTF, either as .gltf or as .glb.
+
+    The JSON is written while the glTF properties are converted, and the binary chunk of a .glb is written from
+    the chunks of the buffer, so that neither is held in memory as a whole. The lengths in the header and the JSON
+    chunk are patched in at the end.
 
-def save_gltf(gltf, export_settings, encoder, glb_buffer):
-    indent = None
-    separators = (',', ':')
+    If an AsyncWriter is given, the file is written in the background. The JSON is then converted first and kept
+    in memory, since the properties may be changed by the export before the file is written. Streamed strings are
+    kept as they are, and expanded in the background.
+
+    Unless the validation setting is 'VALIDATED', the properties are written without being checked. With 'DEBUG',
+    the whole glTF is checked once afterwards, and the invalid properties are reported.
+    """
+    validation = export_settings[gltf2_blender_export_keys.JSON_VALIDATION]
+    trusted = validation != 'VALIDATED'
 
     if export_settings['gltf_format'] != 'GLB':
         indent = 4
         # The comma is typically followed by a newline, so no trailing whitespace is needed on it.
         separators = (',', ' : ')
-
-    sort_order = [
-        "asset",
-        "extensionsUsed",
-        "extensionsRequired",
-        "extensions",
-        "extras",
-        "scene",
-        "scenes",
-        "nodes",
-        "cameras",
-        "animations",
-        "materials",
-        "meshes",
-        "textures",
-        "images",
-        "skins",
-        "accessors",
-        "bufferViews",
-        "samplers",
-        "buffers"
-    ]
-    gltf_ordered = OrderedDict(sorted(gltf.items(), key=lambda item: sort_order.index(item[0])))
-    gltf_encoded = json.dumps(gltf_ordered, indent=indent, separators=separators, cls=encoder, allow_nan=False)
-
-    #
+    else:
+        indent = None
+        separators = (',', ':')
+
+    if writer is None:
+        def write_json(write):
+            json_writer = gltf2_io_json_writer.JSONWriter(write, indent, separators, encoder(allow_nan=False),
+                                                          trusted)
+            json_writer.write_gltf(gltf)
+            return json_writer.byte_length
+    else:
+        # Streamed strings, such as the data URI of an embedded buffer, are kept as they are, and only expanded by
+        # the writer.
+        pieces = []
+        json_writer = gltf2_io_json_writer.JSONWriter(pieces.append, indent, separators, encoder(allow_nan=False),
+                                                      trusted, defer_streamed_strings=True)
+        json_writer.write_gltf(gltf)
+
+        def write_json(write):
+            byte_length = 0
+            for piece in pieces:
+                if isinstance(piece, gltf2_io_json_writer.StreamedString):
+                    texts = gltf2_io_json_writer.iter_streamed_string(piece)
+                else:
+                    texts = (piece,)
+                for text in texts:
+                    write(text)
+                    byte_length += len(text)
+            return byte_length
 
     if export_settings['gltf_format'] != 'GLB':
-        file = open(export_settings['gltf_filepath'], "w", encoding="utf8", newline="\n")
-        file.write(gltf_encoded)
-        file.write("\n")
-        file.close()
+        gltf2_io_async_writer.write_file(export_settings['gltf_filepath'],
+                                         lambda file: __write_gltf_file(file, write_json), writer)
 
         binary = export_settings['gltf_binary']
         if len(binary) > 0 and not export_settings['gltf_embed_buffers']:
@@ -77,41 +93,46 @@ def save_gltf(gltf, export_settings, encoder, glb_buffer):
             file.close()
 
     else:
-        file = open(export_settings['gltf_filepath'], "wb")
-
-        gltf_data = gltf_encoded.encode()
-        binary = glb_buffer
-
-        length_gltf = len(gltf_data)
-        spaces_gltf = (4 - (length_gltf & 3)) & 3
-        length_gltf += spaces_gltf
-
-        length_bin = len(binary)
-        zeros_bin = (4 - (length_bin & 3)) & 3
-        length_bin += zeros_bin
-
-        length = 12 + 8 + length_gltf
-        if length_bin > 0:
-            length += 8 + length_bin
-
-        # Header (Version 2)
-        file.write('glTF'.encode())
-        file.write(struct.pack("I", 2))
-        file.write(struct.pack("I", length))
-
-        # Chunk 0 (JSON)
-        file.write(struct.pack("I", length_gltf))
-        file.write('JSON'.encode())
-        file.write(gltf_data)
-        file.write(b' ' * spaces_gltf)
-
-        # Chunk 1 (BIN)
-        if length_bin > 0:
-            file.write(struct.pack("I", length_bin))
-            file.write('BIN\0'.encode())
-            file.write(binary)
-            file.write(b'\0' * zeros_bin)
+        gltf2_io_async_writer.write_file(export_settings['gltf_filepath'],
+                                         lambda file: __write_glb_file(file, write_json, glb_buffer), writer)
 
-        file.close()
+    if validation == 'DEBUG':
+        gltf2_io_json_writer.report_invalid_properties(gltf)
 
     return True
+
+
+def __write_gltf_file(file, write_json):
+    write_json(lambda text: file.write(text.encode()))
+    file.write(b"\n")
+
+
+def __write_glb_file(file, write_json, glb_buffer):
+    # Header (Version 2) and chunk 0 (JSON), with the lengths filled in once the JSON is written
+    file.write(struct.pack("4sII", 'glTF'.encode(), 2, 0))
+    file.write(struct.pack("I4s", 0, 'JSON'.encode()))
+
+    length_gltf = write_json(lambda text: file.write(text.encode()))
+    spaces_gltf = (4 - (length_gltf & 3)) & 3
+    length_gltf += spaces_gltf
+    file.write(b' ' * spaces_gltf)
+
+    length_bin = glb_buffer.byte_length if glb_buffer is not None else 0
+    zeros_bin = (4 - (length_bin & 3)) & 3
+    length_bin += zeros_bin
+
+    length = 12 + 8 + length_gltf
+    if length_bin > 0:
+        length += 8 + length_bin
+
+    # Chunk 1 (BIN)
+    if length_bin > 0:
+        file.write(struct.pack("I", length_bin))
+        file.write('BIN\0'.encode())
+        glb_buffer.write_to(file)
+        file.write(b'\0' * zeros_bin)
+
+    file.seek(8)
+    file.write(struct.pack("I", length))
+    file.seek(12)
+    file.write(struct.pack("I", length_gltf))
@@ -0,0 +1,423 @@
+# Copyright 2018-2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import copy
+import re
+from json.encoder import encode_basestring_ascii
+
+from ..com import gltf2_io
+from ..com.gltf2_io_debug import print_console
+
+#
+# Globals
+#
+
+# Members of the root glTF object in the order they are written, with the attribute holding them and, for arrays of
+# properties, the class of the properties.
+ROOT_MEMBERS = [
+    ("asset", "asset", None),
+    ("extensionsUsed", "extensions_used", None),
+    ("extensionsRequired", "extensions_required", None),
+    ("extensions", "extensions", None),
+    ("extras", "extras", None),
+    ("scene", "scene", None),
+    ("scenes", "scenes", gltf2_io.Scene),
+    ("nodes", "nodes", gltf2_io.Node),
+    ("cameras", "cameras", gltf2_io.Camera),
+    ("animations", "animations", gltf2_io.Animation),
+    ("materials", "materials", gltf2_io.Material),
+    ("meshes", "meshes", gltf2_io.Mesh),
+    ("textures", "textures", gltf2_io.Texture),
+    ("images", "images", gltf2_io.Image),
+    ("skins", "skins", gltf2_io.Skin),
+    ("accessors", "accessors", gltf2_io.Accessor),
+    ("bufferViews", "buffer_views", gltf2_io.BufferView),
+    ("samplers", "samplers", gltf2_io.Sampler),
+    ("buffers", "buffers", gltf2_io.Buffer)
+]
+
+# Members of each property class as (key, attribute) pairs, in the order to_dict() writes them. The keys are the
+# attribute names in camel case.
+PROPERTY_MEMBERS = {
+    property_type: tuple((re.sub(r'_([a-z])', lambda match: match.group(1).upper(), attribute), attribute)
+                         for attribute in property_type.__slots__)
+    for property_type in gltf2_io.CHILD_FIELDS
+}
+
+# Members holding extension data, which can contain objects with their own to_dict() or to_list().
+EXTENSION_MEMBERS = ('extensions', 'extras')
+
+# Empty collections are omitted, except for these keys, where the presence of the empty collection matters.
+ALLOWED_EMPTY_COLLECTIONS = ["KHR_materials_unlit"]
+
+# Size of the text collected before it is written to the file.
+WRITE_SIZE = 1 << 16
+
+
+#
+# Classes
+#
+
+class JSONWriter:
+    """
+    Write JSON to a file while walking the data, instead of building the whole document as one string first.
+
+    The output is the same as json.dumps() with the given indent, separators and encoder, and allow_nan=False, of
+    the data after the glTF clean up: members that are None or empty collections are omitted, and floats with
+    integral values are written as integers. Only ASCII is written, so the length in characters is the length in
+    bytes.
+
+    By default, properties are converted with their to_dict(), which validates every value. Trusted writing skips
+    the conversion and writes the members of the properties as they are, which is much faster, but writes invalid
+    values, such as a string where a number is expected, without notice.
+
+    With defer_streamed_strings, a StreamedString is not expanded, but passed to write as it is, after the text
+    before it, so that it can be expanded later with iter_streamed_string(). byte_length then leaves it out.
+    """
+
+    def __init__(self, write, indent=None, separators=(',', ':'), encoder=None, trusted=False,
+                 defer_streamed_strings=False):
+        self.__write = write
+        self.__trusted = trusted
+        self.__defer_streamed_strings = defer_streamed_strings
+        self.__indent = ' ' * indent if isinstance(indent, int) else indent
+        self.__item_separator, self.__key_separator = separators
+        self.__encoder = encoder
+        self.__pending = []
+        self.__pending_length = 0
+        self.byte_length = 0
+
+    def write_gltf(self, gltf: gltf2_io.Gltf):
+        """Write a glTF, converting its root level properties one by one."""
+        if not self.__trusted:
+            # The members that are not arrays of properties are small: convert them all at once.
+            members = gltf2_io.Gltf(**{attribute: None if property_type is not None else getattr(gltf, attribute)
+                                       for _, attribute, property_type in ROOT_MEMBERS}).to_dict()
+
+        items = []
+        for key, attribute, property_type in ROOT_MEMBERS:
+            if property_type is None:
+                if self.__trusted:
+                    value = self.__member_value(gltf, attribute)
+                else:
+                    value = members[key]
+                if self.__should_include(key, value):
+                    items.append((key, value))
+            else:
+                value = getattr(gltf, attribute)
+                if value is None:
+                    continue
+                assert isinstance(value, list)
+                if len(value) > 0:
+                    items.append((key, _PropertyArray(value, property_type)))
+
+        self.__write_dict(items, 0)
+        self.flush()
+
+    def write_value(self, value):
+        """Write any JSON value, applying the glTF clean up."""
+        self.__write_value(value, 0, True)
+        self.flush()
+
+    def flush(self):
+        if self.__pending:
+            self.__write(''.join(self.__pending))
+            self.__pending = []
+            self.__pending_length = 0
+
+    def __emit(self, text):
+        self.__pending.append(text)
+        self.__pending_length += len(text)
+        self.byte_length += len(text)
+        if self.__pending_length >= WRITE_SIZE:
+            self.flush()
+
+    @staticmethod
+    def __should_include(key, value):
+        if value is None:
+            return False
+        if isinstance(value, (dict, list)) and len(value) == 0 and key not in ALLOWED_EMPTY_COLLECTIONS:
+            return False
+        return True
+
+    def __write_value(self, value, level, fix):
+        # The order of the checks follows json.JSONEncoder, so that subclasses are written the same way.
+        if isinstance(value, StreamedString):
+            self.__write_streamed_string(value)
+        elif isinstance(value, str):
+            self.__emit(encode_basestring_ascii(value))
+        elif value is None:
+            self.__emit('null')
+        elif value is True:
+            self.__emit('true')
+        elif value is False:
+            self.__emit('false')
+        elif isinstance(value, int):
+            self.__emit(int.__repr__(value))
+        elif isinstance(value, float):
+            # force floats to int, if they are integers (prevent INTEGER_WRITTEN_AS_FLOAT validator warnings)
+            if fix and int(value) == value:
+                self.__emit(int.__repr__(int(value)))
+            else:
+                self.__emit(self.__float_repr(value))
+        elif isinstance(value, _PropertyArray):
+            if self.__trusted:
+                self.__write_list(value.items, level, True)
+            else:
+                self.__write_list((_property_to_dict(value.property_type, item) for item in value.items), level,
+                                  True)
+        elif isinstance(value, list):
+            self.__write_list(value, level, fix)
+        elif isinstance(value, tuple):
+            # tuples are written as lists, but are left as they are by the clean up
+            self.__write_list(value, level, False)
+        elif isinstance(value, dict):
+            if fix:
+                items = [(key, item) for key, item in value.items() if self.__should_include(key, item)]
+            else:
+                items = list(value.items())
+            self.__write_dict(items, level, fix)
+        elif type(value) in PROPERTY_MEMBERS:
+            # only reached when trusted, otherwise properties are converted to dicts already
+            items = []
+            for key, attribute in PROPERTY_MEMBERS[type(value)]:
+                item = self.__member_value(value, attribute)
+                if self.__should_include(key, item):
+                    items.append((key, item))
+            self.__write_dict(items, level, fix)
+        elif self.__encoder is not None:
+            self.__write_value(self.__encoder.default(value), level, False)
+        else:
+            raise TypeError('Object of type {} is not JSON serializable'.format(value.__class__.__name__))
+
+    @staticmethod
+    def __member_value(obj, attribute):
+        value = getattr(obj, attribute)
+        if attribute in EXTENSION_MEMBERS:
+            return gltf2_io.extension_to_dict(value)
+        return value
+
+    def __write_streamed_string(self, value):
+        if self.__defer_streamed_strings:
+            self.flush()
+            self.__write(value)
+        else:
+            for text in iter_streamed_string(value):
+                self.__emit(text)
+
+    def __write_list(self, items, level, fix):
+        items = iter(items)
+        first = next(items, _END)
+        if first is _END:
+            self.__emit('[]')
+            return
+
+        if self.__indent is None:
+            separator = self.__item_separator
+            self.__emit('[')
+        else:
+            separator = self.__item_separator + '\n' + self.__indent * (level + 1)
+            self.__emit('[\n' + self.__indent * (level + 1))
+
+        self.__write_value(first, level + 1, fix)
+        for item in items:
+            self.__emit(separator)
+            self.__write_value(item, level + 1, fix)
+
+        if self.__indent is None:
+            self.__emit(']')
+        else:
+            self.__emit('\n' + self.__indent * level + ']')
+
+    def __write_dict(self, items, level, fix=True):
+        if not items:
+            self.__emit('{}')
+            return
+
+        if self.__indent is None:
+            separator = self.__item_separator
+            self.__emit('{')
+        else:
+            separator = self.__item_separator + '\n' + self.__indent * (level + 1)
+            self.__emit('{\n' + self.__indent * (level + 1))
+
+        for index, (key, item) in enumerate(items):
+            if index > 0:
+                self.__emit(separator)
+            self.__emit(self.__key_repr(key))
+            self.__emit(self.__key_separator)
+            self.__write_value(item, level + 1, fix)
+
+        if self.__indent is None:
+            self.__emit('}')
+        else:
+            self.__emit('\n' + self.__indent * level + '}')
+
+    @classmethod
+    def __key_repr(cls, key):
+        if isinstance(key, str):
+            return encode_basestring_ascii(key)
+        if isinstance(key, float):
+            return encode_basestring_ascii(cls.__float_repr(key))
+        if key is True:
+            return '"true"'
+        if key is False:
+            return '"false"'
+        if key is None:
+            return '"null"'
+        if isinstance(key, int):
+            return encode_basestring_ascii(int.__repr__(key))
+        raise TypeError('keys must be str, int, float, bool or None, not {}'.format(key.__class__.__name__))
+
+    @staticmethod
+    def __float_repr(value):
+        if value != value or value in (float('inf'), float('-inf')):
+            raise ValueError("Out of range float values are not JSON compliant: " + repr(value))
+        return float.__repr__(value)
+
+
+class StreamedString:
+    """
+    A long string, such as a data URI, that is written in pieces instead of being built as a whole.
+
+    The string is made of start, and of the pieces produced by calling pieces(), each time the string is written.
+    It is not a str: only JSONWriter and iter_streamed_string() write it. Anything else fails on it instead of
+    seeing a part of it, such as to_dict() with an AssertionError, and json.dumps() or str() with a TypeError.
+    JSONWriter validates the properties holding it with start in its place.
+    """
+
+    __slots__ = ('start', 'pieces')
+
+    def __init__(self, start, pieces):
+        self.start = start
+        self.pieces = pieces
+
+    def __str__(self):
+        raise TypeError('A StreamedString can only be written by JSONWriter')
+
+    def __repr__(self):
+        return '<StreamedString {!r}...>'.format(self.start)
+
+
+class _PropertyArray:
+    """An array of properties of the root glTF object, converted one by one while it is written."""
+
+    def __init__(self, items, property_type):
+        self.items = items
+        self.property_type = property_type
+
+
+# Marks the end of an iteration.
+_END = object()
+
+
+#
+# Functions
+#
+
+def iter_streamed_string(value):
+    """Yield the JSON text of a StreamedString piece by piece."""
+    # the closing quote of the start is left out, and added after the pieces
+    yield encode_basestring_ascii(value.start)[:-1]
+    for piece in value.pieces():
+        yield encode_basestring_ascii(piece)[1:-1]
+    yield '"'
+
+
+def _property_to_dict(property_type, obj):
+    """
+    Convert a property with its to_dict(), as gltf2_io.to_class() does.
+
+    Members holding a StreamedString are validated with its start as value, and hold the StreamedString itself in
+    the result.
+    """
+    assert isinstance(obj, property_type)
+    streamed = [(key, attribute, getattr(obj, attribute))
+                for key, attribute in PROPERTY_MEMBERS.get(property_type, ())
+                if isinstance(getattr(obj, attribute), StreamedString)]
+    if not streamed:
+        return obj.to_dict()
+
+    stand_in = copy.copy(obj)
+    for _, attribute, value in streamed:
+        setattr(stand_in, attribute, value.start)
+    result = stand_in.to_dict()
+    for key, _, value in streamed:
+        result[key] = value
+    return result
+
+
+def find_invalid_properties(gltf: gltf2_io.Gltf):
+    """
+    Validate a glTF as its to_dict() does, and locate the properties that fail.
+
+    :return: the paths of the failing properties, such as 'meshes[2].primitives[0]', as deep as they can be located
+    """
+    paths = []
+    try:
+        gltf2_io.Gltf(**{attribute: None if property_type is not None else getattr(gltf, attribute)
+                         for _, attribute, property_type in ROOT_MEMBERS}).to_dict()
+    except AssertionError:
+        paths.append('glTF')
+
+    for key, attribute, property_type in ROOT_MEMBERS:
+        if property_type is None:
+            continue
+        value = getattr(gltf, attribute)
+        if not isinstance(value, list):
+            if value is not None:
+                paths.append(key)
+            continue
+        for index, obj in enumerate(value):
+            __find_invalid_property(obj, '{}[{}]'.format(key, index), paths)
+
+    return paths
+
+
+def report_invalid_properties(gltf: gltf2_io.Gltf):
+    """Validate a glTF once, after it has been written without validation, and print the failing properties."""
+    paths = find_invalid_properties(gltf)
+    for path in paths:
+        print_console('ERROR', 'Invalid glTF property: ' + path)
+    if not paths:
+        print_console('INFO', 'glTF validation passed.')
+    return paths
+
+
+def __find_invalid_property(obj, path, paths):
+    if type(obj) not in PROPERTY_MEMBERS:
+        paths.append(path)
+        return
+    try:
+        _property_to_dict(type(obj), obj)
+        return
+    except AssertionError:
+        pass
+
+    # Report the failing child properties if there are any, as they locate the error better.
+    child_count = len(paths)
+    for key, attribute in PROPERTY_MEMBERS[type(obj)]:
+        value = getattr(obj, attribute)
+        if type(value) in PROPERTY_MEMBERS:
+            __find_invalid_property(value, path + '.' + key, paths)
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                if type(item) in PROPERTY_MEMBERS:
+                    __find_invalid_property(item, '{}.{}[{}]'.format(path, key, index), paths)
+    if len(paths) == child_count:
+        paths.append(path)
@@ -0,0 +1,225 @@
+# Copyright 2018-2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from .gltf2_io_binary_data import BinaryData
+from ..com.gltf2_io_constants import ComponentType
+from ..com.gltf2_io_debug import print_console
+
+
+def quantize_scene_primitives(scenes, animations, export_settings):
+    """
+    Handles KHR_mesh_quantization.
+    Invoked after data has been gathered, but before scenes get traversed.
+    Stores positions as normalized shorts, normals and tangents as normalized bytes, texture coordinates as
+    normalized unsigned shorts where they are in [0, 1], and colors as normalized unsigned bytes.
+
+    The dequantization of positions is folded into the transform of the nodes using the mesh. Meshes of nodes
+    where that is not possible (children, skins, animated translation, rotation or scale) keep float positions.
+    """
+
+    # Nodes whose translation, rotation or scale is animated cannot hold the dequantization transform.
+    animated_nodes = set()
+    for animation in animations:
+        for channel in animation.channels:
+            if channel.target.path in ('translation', 'rotation', 'scale'):
+                animated_nodes.add(id(channel.target.node))
+
+    # Group the nodes by mesh, since meshes are shared by instances.
+    mesh_nodes = {}
+    for scene in scenes:
+        for node in scene.nodes:
+            __traverse_node(node, lambda node: __collect_mesh_node(node, mesh_nodes))
+
+    quantized_accessors = set()
+    for meshes, nodes in __group_meshes(mesh_nodes):
+        print_console('INFO', 'Mesh quantization: Quantizing mesh "%s".' % nodes[0].name)
+
+        primitives = [primitive for mesh in meshes for primitive in mesh.primitives]
+        foldable = all(not node.children and node.skin is None and id(node) not in animated_nodes
+                       for node in nodes) \
+            and all(primitive.attributes['POSITION'].component_type == ComponentType.Float
+                    for primitive in primitives)
+        if foldable:
+            offset, scale = __quantize_positions(primitives, quantized_accessors)
+            for node in nodes:
+                __fold_dequantization(node, offset, scale)
+
+        for primitive in primitives:
+            __quantize_primitive(primitive, quantized_accessors)
+
+
+def __collect_mesh_node(node, mesh_nodes):
+    if not (node.mesh is None):
+        mesh_nodes.setdefault(id(node.mesh), (node.mesh, []))[1].append(node)
+
+
+def __group_meshes(mesh_nodes):
+    """
+    Group the meshes that share position accessors, with all nodes using them.
+
+    One Blender mesh can become several glTF meshes with the same accessors, such as when its objects override its
+    materials. The positions of such meshes are quantized once, into a common box, and only if all their nodes can
+    hold the dequantization.
+    """
+    parents = {mesh_id: mesh_id for mesh_id in mesh_nodes}
+    owners = {}
+    for mesh_id, (mesh, _) in mesh_nodes.items():
+        for accessor in __position_accessors(mesh.primitives):
+            owner = owners.setdefault(id(accessor), mesh_id)
+            parents[__find_root(parents, owner)] = __find_root(parents, mesh_id)
+
+    groups = {}
+    for mesh_id, (mesh, nodes) in mesh_nodes.items():
+        meshes, group_nodes = groups.setdefault(__find_root(parents, mesh_id), ([], []))
+        meshes.append(mesh)
+        group_nodes.extend(nodes)
+    return list(groups.values())
+
+
+def __find_root(parents, key):
+    while parents[key] != key:
+        parents[key] = parents[parents[key]]
+        key = parents[key]
+    return key
+
+
+def __position_accessors(primitives):
+    """The position accessors of primitives and of their morph targets."""
+    for primitive in primitives:
+        yield primitive.attributes['POSITION']
+        for target in primitive.targets or []:
+            if target.get('POSITION') is not None:
+                yield target['POSITION']
+
+
+def __traverse_node(node, f):
+    """Calls f for each node and all child nodes, recursively."""
+    f(node)
+    if not (node.children is None):
+        for child in node.children:
+            __traverse_node(child, f)
+
+
+def __quantize_positions(primitives, quantized_accessors):
+    """
+    Store the positions of primitives as normalized shorts, in a box shared by the primitives.
+
+    :return: the center and the half size of the box, which dequantize the positions
+    """
+    positions = list({id(primitive.attributes['POSITION']): primitive.attributes['POSITION']
+                      for primitive in primitives}.values())
+    low = np.min([accessor.min for accessor in positions], axis=0)
+    high = np.max([accessor.max for accessor in positions], axis=0)
+    offset = (low + high) / 2.0
+    scale = float(np.max(high - low)) / 2.0
+    if scale == 0.0:
+        scale = 1.0
+
+    for accessor in positions:
+        if id(accessor) in quantized_accessors:
+            continue
+        quantized_accessors.add(id(accessor))
+
+        values = __float_values(accessor, 3)
+        # Elements must be aligned to 4 bytes, so the 6 bytes of a position are padded.
+        quantized = np.zeros((len(values), 4), dtype='<i2')
+        quantized[:, :3] = np.clip(np.round((values - offset) / scale * 32767.0), -32767, 32767)
+        __set_values(accessor, quantized, ComponentType.Short, byte_stride=8)
+        accessor.min, accessor.max = accessor.buffer_view.min_max()
+
+    # Morph target displacements are not offset, but are scaled into the same box.
+    for primitive in primitives:
+        for target in primitive.targets or []:
+            accessor = target.get('POSITION')
+            if accessor is None or id(accessor) in quantized_accessors:
+                continue
+            quantized_accessors.add(id(accessor))
+            __scale_float_accessor(accessor, 1.0 / scale)
+
+    return offset, scale
+
+
+def __fold_dequantization(node, offset, scale):
+    """Prepend the translation by offset and the uniform scale to the transform of a node."""
+    node_scale = np.array(node.scale if node.scale is not None else [1.0, 1.0, 1.0])
+    node_rotation = node.rotation if node.rotation is not None else [0.0, 0.0, 0.0, 1.0]
+    node_translation = np.array(node.translation if node.translation is not None else [0.0, 0.0, 0.0])
+
+    node.translation = (node_translation + __rotate(node_rotation, node_scale * offset)).tolist()
+    node.scale = (node_scale * scale).tolist()
+
+
+def __rotate(quaternion, vector):
+    """Rotate a vector by a glTF (x, y, z, w) quaternion."""
+    axis = np.array(quaternion[:3])
+    w = quaternion[3]
+    t = 2.0 * np.cross(axis, vector)
+    return vector + w * t + np.cross(axis, t)
+
+
+def __quantize_primitive(primitive, quantized_accessors):
+    """Quantize the normals, tangents, texture coordinates and colors of a primitive."""
+    for name, accessor in primitive.attributes.items():
+        if id(accessor) in quantized_accessors or accessor.component_type != ComponentType.Float:
+            continue
+
+        if name == 'NORMAL':
+            values = __float_values(accessor, 3)
+            # Elements must be aligned to 4 bytes, so the 3 bytes of a normal are padded.
+            quantized = np.zeros((len(values), 4), dtype=np.int8)
+            quantized[:, :3] = np.clip(np.round(values * 127.0), -127, 127)
+            __set_values(accessor, quantized, ComponentType.Byte, byte_stride=4)
+        elif name == 'TANGENT':
+            values = __float_values(accessor, 4)
+            quantized = np.clip(np.round(values * 127.0), -127, 127).astype(np.int8)
+            __set_values(accessor, quantized, ComponentType.Byte)
+        elif name.startswith('TEXCOORD_'):
+            values = __float_values(accessor, 2)
+            if values.min(initial=0.0) < 0.0 or values.max(initial=0.0) > 1.0:
+                continue
+            quantized = np.round(values * 65535.0).astype('<u2')
+            __set_values(accessor, quantized, ComponentType.UnsignedShort)
+        elif name.startswith('COLOR_'):
+            values = __float_values(accessor, 4)
+            quantized = np.round(np.clip(values, 0.0, 1.0) * 255.0).astype(np.uint8)
+            __set_values(accessor, quantized, ComponentType.UnsignedByte)
+        else:
+            continue
+
+        quantized_accessors.add(id(accessor))
+
+
+def __float_values(accessor, components):
+    return np.frombuffer(accessor.buffer_view.data, dtype='<f4').reshape(-1, components)
+
+
+def __set_values(accessor, values, component_type, byte_stride=None):
+    accessor.buffer_view = BinaryData.from_array(values, component_type, accessor.type, byte_stride)
+    accessor.component_type = component_type
+    accessor.normalized = True
+
+
+def __scale_float_accessor(accessor, factor):
+    """Scale the values of a dense or sparse float accessor."""
+    if accessor.buffer_view is not None:
+        values = __float_values(accessor, 3) * factor
+        accessor.buffer_view = BinaryData.from_array(values, ComponentType.Float, accessor.type)
+    if accessor.sparse is not None:
+        values = __float_values(accessor.sparse.values, 3) * factor
+        accessor.sparse.values.buffer_view = BinaryData.from_array(values, ComponentType.Float, accessor.type)
+    if accessor.min is not None:
+        accessor.min = [value * factor for value in accessor.min]
+        accessor.max = [value * factor for value in accessor.max]
@@ -0,0 +1,200 @@
+# Copyright 2018-2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from ..com.gltf2_io_debug import print_console
+
+#
+# Globals
+#
+
+# Version of the format of the entries, and of the primitives stored in them. Must be increased whenever the
+# extraction of primitives changes its results, so that entries written before are not used anymore.
+FORMAT_VERSION = 1
+
+# Name of the default cache directory, which is created next to the .blend file.
+DIRECTORY_NAME = '.gltf_primitive_cache'
+
+# File of an entry describing its primitives. An entry is a directory holding this file and one .npy file per array.
+INDEX_FILE = 'index.json'
+
+
+#
+# Functions
+#
+
+def load(directory, key):
+    """
+    Load the primitives stored under key.
+
+    The arrays are memory mapped and returned as read only arrays. The buffer views gathered from them reference the
+    mapped data, as it is stored in the component types of the accessors already. A successful load marks the entry
+    as recently used.
+
+    :return: the primitives, or None if there is no valid entry
+    """
+    path = os.path.join(directory, key)
+    try:
+        with open(os.path.join(path, INDEX_FILE), 'r') as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print_console('WARNING', 'Ignoring primitive cache entry {}: {}'.format(key, e))
+        __remove_entry(path)
+        return None
+
+    if index.get('version') != FORMAT_VERSION:
+        return None
+
+    try:
+        primitives = []
+        for stored_primitive in index['primitives']:
+            primitives.append({
+                'material': stored_primitive['material'],
+                'indices': __load_array(path, stored_primitive['indices']),
+                'attributes': {name: __load_array(path, file_name)
+                               for name, file_name in stored_primitive['attributes'].items()}
+            })
+        os.utime(path)
+    except (OSError, ValueError, KeyError) as e:
+        print_console('WARNING', 'Ignoring primitive cache entry {}: {}'.format(key, e))
+        __remove_entry(path)
+        return None
+
+    return primitives
+
+
+def store(directory, key, primitives):
+    """
+    Store primitives, in the format returned by extract_primitives, under key.
+
+    The entry is written to a temporary directory first, which is then renamed, so that a load never sees a
+    partial entry. Failing to store is not an error of the export: it is only reported.
+    """
+    try:
+        os.makedirs(directory, exist_ok=True)
+        temporary_path = tempfile.mkdtemp(prefix=key + '.', suffix='.tmp', dir=directory)
+    except OSError as e:
+        print_console('WARNING', 'Cannot write to the primitive cache {}: {}'.format(directory, e))
+        return
+
+    try:
+        stored_primitives = []
+        for primitive_index, primitive in enumerate(primitives):
+            stored_primitive = {
+                'material': primitive['material'],
+                'indices': __store_array(temporary_path, '{}_indices.npy'.format(primitive_index),
+                                         primitive['indices']),
+                'attributes': {}
+            }
+            for attribute_index, (name, values) in enumerate(primitive['attributes'].items()):
+                # attribute names are not used in file names, as they may contain any character
+                stored_primitive['attributes'][name] = __store_array(
+                    temporary_path, '{}_{}.npy'.format(primitive_index, attribute_index), values)
+            stored_primitives.append(stored_primitive)
+
+        with open(os.path.join(temporary_path, INDEX_FILE), 'w') as f:
+            json.dump({'version': FORMAT_VERSION, 'primitives': stored_primitives}, f)
+
+        os.rename(temporary_path, os.path.join(directory, key))
+    except OSError as e:
+        # the entry may also have been stored by another export in the meantime
+        if not os.path.isdir(os.path.join(directory, key)):
+            print_console('WARNING', 'Cannot write to the primitive cache {}: {}'.format(directory, e))
+        __remove_entry(temporary_path)
+
+
+def prune(directory, max_bytes):
+    """
+    Remove the least recently used entries, until the entries left take at most max_bytes.
+
+    Temporary directories of entries that were never completed are removed as well.
+
+    :return: the number of entries removed and the bytes they took
+    """
+    if not os.path.isdir(directory):
+        return 0, 0
+
+    entries = []
+    removed_count = 0
+    removed_bytes = 0
+    for entry in os.scandir(directory):
+        if not entry.is_dir(follow_symlinks=False):
+            continue
+        size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file(follow_symlinks=False))
+        if entry.name.endswith('.tmp'):
+            # an export writing this entry right now renames it well before it gets old
+            if __is_stale(entry):
+                __remove_entry(entry.path)
+                removed_bytes += size
+            continue
+        entries.append((entry.stat().st_mtime, size, entry.path))
+
+    total_bytes = sum(size for _, size, _ in entries)
+    entries.sort()
+    for _, size, path in entries:
+        if total_bytes <= max_bytes:
+            break
+        __remove_entry(path)
+        total_bytes -= size
+        removed_count += 1
+        removed_bytes += size
+
+    if removed_count > 0:
+        print_console('INFO', 'Primitive cache: removed {} entries, {} bytes.'.format(removed_count, removed_bytes))
+    return removed_count, removed_bytes
+
+
+def __store_array(path, file_name, values):
+    if len(values) == 0:
+        # empty files cannot be memory mapped
+        return None
+    array = np.asarray(values)
+    # Arrays of the NumPy extraction are stored as they are. Lists of the legacy extraction convert to 64 bit
+    # arrays, which are narrowed to 32 bit when that holds their values exactly.
+    if array.dtype == np.float64:
+        narrow_array = array.astype(np.float32)
+        if np.array_equal(narrow_array, array):
+            array = narrow_array
+    elif array.dtype == np.int64 and array.min() >= 0 and array.max() <= np.iinfo(np.uint32).max:
+        array = array.astype(np.uint32)
+    np.save(os.path.join(path, file_name), array, allow_pickle=False)
+    return file_name
+
+
+def __load_array(path, file_name):
+    if file_name is None:
+        return np.empty(0, dtype=np.float32)
+    return np.load(os.path.join(path, file_name), mmap_mode='r', allow_pickle=False)
+
+
+def __is_stale(entry):
+    # older than a day
+    return entry.stat().st_mtime < time.time() - 24 * 60 * 60
+
+
+def __remove_entry(path):
+    shutil.rmtree(path, ignore_errors=True)
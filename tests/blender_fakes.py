@@ -0,0 +1,233 @@
+# Copyright 2018-2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Stand-ins for the bpy and mathutils modules, so that the exporter modules can be imported and run outside of
+Blender, and a builder for meshes with the attributes the extraction reads.
+
+Only what the tested code uses is provided. Vector components are rounded to float32 like those of mathutils.
+"""
+
+#
+# Imports
+#
+
+import importlib
+import math
+import os
+import sys
+import types
+
+import numpy as np
+
+#
+# Globals
+#
+
+# Name of the add-on package the exporter is imported as.
+PACKAGE = 'blender2msfs'
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+#
+# Classes
+#
+
+class Vector(list):
+    def __init__(self, values):
+        super().__init__(float(np.float32(value)) for value in values)
+
+    x = property(lambda self: self[0])
+    y = property(lambda self: self[1])
+    z = property(lambda self: self[2])
+
+    def __iadd__(self, other):
+        for i in range(len(self)):
+            self[i] = float(np.float32(self[i] + other[i]))
+        return self
+
+    def __isub__(self, other):
+        for i in range(len(self)):
+            self[i] = float(np.float32(self[i] - other[i]))
+        return self
+
+    def __sub__(self, other):
+        return Vector([a - b for a, b in zip(self, other)])
+
+    def normalize(self):
+        length = math.sqrt(sum(a * a for a in self))
+        if length:
+            for i in range(len(self)):
+                self[i] = float(np.float32(self[i] / length))
+
+    def cross(self, other):
+        return Vector(np.cross(self, other))
+
+    def dot(self, other):
+        return sum(a * b for a, b in zip(self, other))
+
+    def rotation_difference(self, other):
+        # kept as the pair of directions, which rotate() turns by the shortest arc
+        return Vector(self), Vector(other)
+
+    def rotate(self, rotation):
+        a = np.array(rotation[0], dtype=np.float64)
+        b = np.array(rotation[1], dtype=np.float64)
+        if not a.any() or not b.any():
+            return
+        a /= np.linalg.norm(a)
+        b /= np.linalg.norm(b)
+        v = np.array(self, dtype=np.float64)
+        axis = np.cross(a, b)
+        cos_angle = a.dot(b)
+        sin_angle_sq = axis.dot(axis)
+        if sin_angle_sq <= 1e-12:
+            if cos_angle >= 0.0:
+                return
+            factor = 0.0
+        else:
+            factor = (1.0 - cos_angle) / sin_angle_sq
+        rotated = v * cos_angle + np.cross(axis, v) + axis * axis.dot(v) * factor
+        for i in range(3):
+            self[i] = float(np.float32(rotated[i]))
+
+
+class Matrix:
+    @staticmethod
+    def Identity(size):
+        return Matrix()
+
+
+class Quaternion(list):
+    pass
+
+
+class _Types(types.ModuleType):
+    """bpy.types, with a new class for any type that is looked up."""
+
+    def __getattr__(self, name):
+        blender_type = type(name, (), {})
+        setattr(self, name, blender_type)
+        return blender_type
+
+
+class Mesh(types.SimpleNamespace):
+    """A mesh, which is compared by identity like Blender data, so that it can be a key of the gather caches."""
+
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+
+class Collection(list):
+    """A bpy_prop_collection of items with attributes."""
+
+    def foreach_get(self, name, out):
+        out[:] = np.array([getattr(item, name) for item in self], dtype=out.dtype).reshape(-1)
+
+
+#
+# Functions
+#
+
+def install():
+    """Register the fake Blender modules, and the add-on package without running its registration code."""
+    if PACKAGE in sys.modules:
+        return
+
+    mathutils = types.ModuleType('mathutils')
+    mathutils.Vector = Vector
+    mathutils.Matrix = Matrix
+    mathutils.Quaternion = Quaternion
+    mathutils.Euler = object
+    geometry = types.ModuleType('mathutils.geometry')
+    geometry.tessellate_polygon = lambda polygons: [(0, i, i + 1) for i in range(1, len(polygons[0]) - 1)]
+    mathutils.geometry = geometry
+    sys.modules['mathutils'] = mathutils
+    sys.modules['mathutils.geometry'] = geometry
+
+    bpy = types.ModuleType('bpy')
+    bpy.types = _Types('bpy.types')
+    bpy.context = types.SimpleNamespace()
+    bpy.data = types.SimpleNamespace(materials={})
+    bpy.app = types.SimpleNamespace(version=(2, 93, 0), binary_path='')
+    sys.modules['bpy'] = bpy
+
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [ROOT]
+    package.get_version_string = lambda: '0.0.0'
+    sys.modules[PACKAGE] = package
+    exporter = types.ModuleType(PACKAGE + '.exporter')
+    exporter.__path__ = [os.path.join(ROOT, 'exporter')]
+    sys.modules[PACKAGE + '.exporter'] = exporter
+
+
+def import_exporter_module(name):
+    """Import a module of the exporter, such as 'exp.gltf2_blender_extract'."""
+    install()
+    return importlib.import_module(PACKAGE + '.exporter.' + name)
+
+
+def make_mesh(vertex_count, polygons, smooth, material_indices, seed=0, vertex_groups=None, positions=None):
+    """
+    Build a mesh with random positions, normals, tangents and one UV layer.
+
+    UVs are rounded to quarters, so that many corners share their values and are welded.
+
+    :param polygons: the vertex indices of each polygon
+    :param vertex_groups: for each vertex, a list of (group index, weight)
+    :param positions: the vertex positions, random if not given
+    """
+    rng = np.random.default_rng(seed)
+    if positions is None:
+        positions = rng.random((vertex_count, 3)).astype(np.float32)
+    vertex_normals = rng.random((vertex_count, 3)).astype(np.float32)
+    vertices = []
+    for i in range(vertex_count):
+        groups = [types.SimpleNamespace(group=group, weight=weight)
+                  for group, weight in (vertex_groups[i] if vertex_groups else [])]
+        vertices.append(types.SimpleNamespace(co=Vector(positions[i]), normal=Vector(vertex_normals[i]), groups=groups))
+
+    loops = []
+    blender_polygons = []
+    for index, (polygon, use_smooth, material_index) in enumerate(zip(polygons, smooth, material_indices)):
+        loop_start = len(loops)
+        for vertex_index in polygon:
+            loops.append(types.SimpleNamespace(vertex_index=vertex_index, normal=Vector(rng.random(3)),
+                                               tangent=Vector(rng.random(3) - 0.5),
+                                               bitangent=Vector(rng.random(3) - 0.5)))
+        blender_polygons.append(types.SimpleNamespace(
+            index=index, loop_start=loop_start, loop_total=len(polygon),
+            loop_indices=list(range(loop_start, loop_start + len(polygon))), material_index=material_index,
+            use_smooth=use_smooth, normal=Vector(rng.random(3))))
+
+    uvs = np.round(rng.random((len(loops), 2)) * 4) / 4
+    uv_layer = types.SimpleNamespace(data=Collection(types.SimpleNamespace(uv=Vector(uv)) for uv in uvs))
+    uv_layers = Collection([uv_layer])
+    uv_layers.active = uv_layer
+    uv_layers.active_index = 0
+
+    triangles = []
+    for polygon in blender_polygons:
+        for i in range(1, polygon.loop_total - 1):
+            triangles.append(types.SimpleNamespace(
+                loops=(polygon.loop_start, polygon.loop_start + i, polygon.loop_start + i + 1),
+                polygon_index=polygon.index))
+
+    return Mesh(
+        name='mesh', vertices=Collection(vertices), loops=Collection(loops), polygons=Collection(blender_polygons),
+        loop_triangles=Collection(triangles), uv_layers=uv_layers, vertex_colors=Collection(),
+        materials=[None] * (max(material_indices) + 1), has_custom_normals=False, use_auto_smooth=False,
+        auto_smooth_angle=math.pi, shape_keys=None, calc_loop_triangles=lambda: None,
+        calc_normals_split=lambda: None, calc_tangents=lambda: None)
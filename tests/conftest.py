@@ -0,0 +1,3 @@
+import blender_fakes
+
+blender_fakes.install()
@@ -0,0 +1,125 @@
+"""The NumPy extraction engine gives the same primitives as the legacy one."""
+
+import random
+import types
+
+import numpy as np
+import pytest
+
+import blender_fakes
+
+extract = blender_fakes.import_exporter_module('exp.gltf2_blender_extract')
+extract_numpy = blender_fakes.import_exporter_module('exp.gltf2_blender_extract_numpy')
+gather_skins = blender_fakes.import_exporter_module('exp.gltf2_blender_gather_skins')
+
+BONE_NAMES = ['bone{}'.format(i) for i in range(8)]
+
+
+def export_settings(tangents=True, skins=False):
+    return {
+        'gltf_weld_epsilon': 0.0,
+        'gltf_tangents': tangents,
+        'gltf_yup': True,
+        'gltf_texcoords': True,
+        'gltf_colors': True,
+        'gltf_skins': skins,
+        'gltf_morph': False,
+        'gltf_materials': True,
+        'gltf_all_vertex_influences': False
+    }
+
+
+def random_mesh(seed, vertex_groups=None):
+    rng = random.Random(seed)
+    vertex_count = 40
+    polygons = [rng.sample(range(vertex_count), rng.choice([3, 3, 4, 5])) for _ in range(80)]
+    smooth = [rng.random() < 0.5 for _ in polygons]
+    material_indices = [rng.choice([0, 1, 2]) for _ in polygons]
+    if vertex_groups is not None:
+        # up to 7 influences, with zero and repeated weights, and a group that is not a bone
+        vertex_groups = [[(rng.randrange(len(BONE_NAMES) + 1), rng.choice([0.0, 0.1, 0.2, 0.5, 0.7]))
+                          for _ in range(rng.randrange(8))] for _ in range(vertex_count)]
+    return blender_fakes.make_mesh(vertex_count, polygons, smooth, material_indices, seed, vertex_groups)
+
+
+def extract_both(mesh, settings, vertex_groups=None, modifiers=None):
+    legacy = extract.extract_primitives(None, mesh, None, None, vertex_groups, modifiers, settings)
+    vectorized = extract_numpy.extract_primitives(None, mesh, None, None, vertex_groups, modifiers, settings)
+    assert [p['material'] for p in legacy] == [p['material'] for p in vectorized]
+    return legacy, vectorized
+
+
+def attribute(primitive, name):
+    values = np.array(primitive['attributes'][name], dtype=np.float32)
+    vertex_count = len(primitive['attributes']['POSITION']) // 3
+    return values.reshape(vertex_count, -1)
+
+
+def corners(primitive, name):
+    """The values of an attribute at every corner of the triangles, independent of the vertex numbering."""
+    return attribute(primitive, name)[np.array(primitive['indices'])]
+
+
+@pytest.fixture
+def skinned(monkeypatch):
+    """A skin with its joints in another order than the vertex groups, and the modifier that binds it."""
+    joints = [types.SimpleNamespace(name=name) for name in reversed(BONE_NAMES)]
+    monkeypatch.setattr(gather_skins, 'gather_skin', lambda armature, settings: types.SimpleNamespace(joints=joints))
+    vertex_groups = [types.SimpleNamespace(name=name) for name in BONE_NAMES + ['other']]
+    modifiers = [types.SimpleNamespace(type='ARMATURE', object=object())]
+    return vertex_groups, modifiers
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_same_primitives_with_tangents(seed):
+    legacy, vectorized = extract_both(random_mesh(seed), export_settings(tangents=True))
+
+    for a, b in zip(legacy, vectorized):
+        assert np.array_equal(a['indices'], b['indices'])
+        assert set(a['attributes']) == set(b['attributes'])
+        assert 'TANGENT' in b['attributes']
+        for name in b['attributes']:
+            np.testing.assert_allclose(attribute(a, name), attribute(b, name), atol=1e-6)
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_welding_without_tangents(seed):
+    # The legacy engine also splits vertices on the tangents it does not export, so only the welded triangles
+    # are compared, and the NumPy engine may merge more.
+    legacy, vectorized = extract_both(random_mesh(seed), export_settings(tangents=False))
+
+    for a, b in zip(legacy, vectorized):
+        assert 'TANGENT' not in b['attributes']
+        assert len(b['attributes']['POSITION']) <= len(a['attributes']['POSITION'])
+        for name in b['attributes']:
+            np.testing.assert_allclose(corners(a, name), corners(b, name), atol=1e-6)
+
+        # every vertex left is unique
+        records = np.hstack([attribute(b, name) for name in sorted(b['attributes'])])
+        assert len(np.unique(records, axis=0)) == len(records)
+
+
+def test_skin_keeps_top_four_influences(skinned):
+    vertex_groups, modifiers = skinned
+    mesh = random_mesh(4, vertex_groups=True)
+    legacy, vectorized = extract_both(mesh, export_settings(skins=True), vertex_groups, modifiers)
+
+    for a, b in zip(legacy, vectorized):
+        assert np.array_equal(a['indices'], b['indices'])
+        assert 'JOINTS_1' not in b['attributes'] and 'WEIGHTS_1' not in b['attributes']
+        for name in ('JOINTS_0', 'WEIGHTS_0'):
+            np.testing.assert_allclose(attribute(a, name), attribute(b, name), atol=1e-6)
+
+
+def test_skin_weights_are_normalized(skinned):
+    vertex_groups, modifiers = skinned
+    mesh = random_mesh(5, vertex_groups=True)
+    _, vectorized = extract_both(mesh, export_settings(skins=True), vertex_groups, modifiers)
+
+    checked = 0
+    for primitive in vectorized:
+        weights = attribute(primitive, 'WEIGHTS_0')
+        influenced = weights.sum(axis=1) > 0.0
+        np.testing.assert_allclose(weights[influenced].sum(axis=1), 1.0, atol=1e-6)
+        checked += influenced.sum()
+    assert checked > 0
@@ -0,0 +1,122 @@
+"""Gather caches of export sessions, and the results kept across the lods of a batch export."""
+
+import blender_fakes
+
+gather_cache = blender_fakes.import_exporter_module('exp.gltf2_blender_gather_cache')
+gltf2_io = blender_fakes.import_exporter_module('com.gltf2_io')
+
+gathered = []
+
+
+def node(name, children=None):
+    return gltf2_io.Node(camera=None, children=children or [], extensions=None, extras=None, matrix=None, mesh=None,
+                         name=name, rotation=None, scale=None, skin=None, translation=None, weights=None)
+
+
+@gather_cache.cached_across_lods
+def gather_joint(bone, export_settings):
+    gathered.append(bone)
+    children = [gather_joint(child, export_settings) for child in BONES[bone]]
+    return node(bone, children)
+
+
+@gather_cache.cached_across_lods
+def gather_skin(armature, export_settings):
+    gathered.append(armature)
+    root = gather_joint('root', export_settings)
+    return gltf2_io.Skin(extensions=None, extras=None, inverse_bind_matrices=None,
+                         joints=[root] + root.children, name=armature, skeleton=None)
+
+
+BONES = {'root': ['hand'], 'hand': []}
+
+
+def export_settings():
+    return {'gltf_cache_report': 'NONE', 'gltf_primitive_cache': None, 'gltf_filepath': 'model_LOD0.gltf',
+            'gltf_current_collection': 'x00', 'gltf_lod_ratio': 1.0, 'gltf_yup': True}
+
+
+def gather_lod(settings, lod, skin_first=False):
+    """Gather the armature of a lod, with a node parented to the hand bone, the way gather_node does."""
+    if skin_first:
+        skin = gather_skin('armature', settings)
+    root = gather_joint('root', settings)
+    hand = root.children[0]
+    hand.children.append(node('sword_LOD{}'.format(lod)))
+    if not skin_first:
+        skin = gather_skin('armature', settings)
+    return root, hand, skin
+
+
+def next_lod(session, settings, lod):
+    settings['gltf_filepath'] = 'model_LOD{}.gltf'.format(lod)
+    settings['gltf_current_collection'] = 'x0{}'.format(lod)
+    session.new_generation(settings)
+
+
+def test_skin_across_lods_leaves_out_bone_children():
+    settings = export_settings()
+    del gathered[:]
+    with gather_cache.ExportSession(settings, across_lods=True) as session:
+        gather_lod(settings, 0)
+        for lod in (1, 2):
+            next_lod(session, settings, lod)
+            root, hand, skin = gather_lod(settings, lod)
+
+            # the skin references the joints of this lod, which have the child of this lod only
+            assert skin.joints[0] is root and skin.joints[1] is hand
+            assert [child.name for child in hand.children] == ['sword_LOD{}'.format(lod)]
+
+    assert gathered == ['root', 'hand', 'armature']
+
+
+def test_skin_gathered_in_a_later_lod():
+    settings = export_settings()
+    with gather_cache.ExportSession(settings, across_lods=True) as session:
+        gather_joint('root', settings)
+        gather_joint('root', settings).children[0].children.append(node('sword_LOD0'))
+
+        # the skin is first gathered from the copies of the joints, with the child of lod 1
+        next_lod(session, settings, 1)
+        gather_lod(settings, 1)
+
+        next_lod(session, settings, 2)
+        root, hand, skin = gather_lod(settings, 2, skin_first=True)
+        assert skin.joints[0] is root and skin.joints[1] is hand
+        assert [child.name for child in hand.children] == ['sword_LOD2']
+
+
+def test_no_snapshots_for_a_single_lod():
+    settings = export_settings()
+    del gathered[:]
+    with gather_cache.ExportSession(settings) as session:
+        gather_lod(settings, 0)
+        assert session.snapshots(gather_joint) == {} and session.snapshots(gather_skin) == {}
+
+        # without snapshots, a new generation gathers again
+        next_lod(session, settings, 1)
+        gather_lod(settings, 1)
+
+    assert gathered == ['root', 'hand', 'armature'] * 2
+
+
+@gather_cache.skdrivervalues
+def driver_values(blender_object, frame, fcurves, export_settings):
+    gathered.append((blender_object.name, frame))
+    return (float(frame),)
+
+
+def test_driver_values_are_kept_by_the_session():
+    settings = export_settings()
+    shape = node('shape')
+    del gathered[:]
+    with gather_cache.ExportSession(settings) as session:
+        assert driver_values(shape, 1, (), settings) == driver_values(shape, 1, (), settings) == (1.0,)
+        session.drop_cache(driver_values)
+        driver_values(shape, 1, (), settings)
+        driver_values(shape, 2, (), settings)
+
+    with gather_cache.ExportSession(settings):
+        driver_values(shape, 2, (), settings)
+
+    assert gathered == [('shape', 1), ('shape', 1), ('shape', 2), ('shape', 2)]
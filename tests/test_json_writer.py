@@ -0,0 +1,64 @@
+"""Writing the data URI of an embedded buffer as a streamed string."""
+
+import base64
+import json
+
+import numpy as np
+import pytest
+
+import blender_fakes
+
+gltf2_io = blender_fakes.import_exporter_module('com.gltf2_io')
+constants = blender_fakes.import_exporter_module('com.gltf2_io_constants')
+binary_data = blender_fakes.import_exporter_module('exp.gltf2_io_binary_data')
+gltf2_io_buffer = blender_fakes.import_exporter_module('exp.gltf2_io_buffer')
+json_writer = blender_fakes.import_exporter_module('exp.gltf2_io_json_writer')
+
+DATA = np.arange(100000, dtype=np.float32)
+
+
+def embedded_gltf():
+    buffer = gltf2_io_buffer.Buffer()
+    buffer.add_and_get_view(binary_data.BinaryData.from_array(DATA, constants.ComponentType.Float, 'SCALAR'))
+    gltf_buffer = gltf2_io.Buffer(buffer.byte_length, None, None, None, buffer.to_embed_string())
+    asset = gltf2_io.Asset(None, None, None, None, None, '2.0')
+    gltf = gltf2_io.Gltf(None, None, asset, [gltf_buffer], None, None, None, None, None, None, None, None, None,
+                         None, None, None, None, None, None)
+    return gltf, gltf_buffer
+
+
+def written_uri(text):
+    return json.loads(text)['buffers'][0]['uri']
+
+
+@pytest.mark.parametrize('trusted', [False, True])
+def test_writes_whole_uri(trusted):
+    gltf, _ = embedded_gltf()
+    texts = []
+    writer = json_writer.JSONWriter(texts.append, trusted=trusted)
+    writer.write_gltf(gltf)
+
+    text = ''.join(texts)
+    assert written_uri(text) == gltf2_io_buffer.EMBED_PREFIX + base64.b64encode(DATA.tobytes()).decode()
+    assert writer.byte_length == len(text)
+    assert json_writer.find_invalid_properties(gltf) == []
+
+
+def test_deferred_uri_is_expanded_later():
+    gltf, _ = embedded_gltf()
+    pieces = []
+    json_writer.JSONWriter(pieces.append, defer_streamed_strings=True).write_gltf(gltf)
+
+    text = ''.join(''.join(json_writer.iter_streamed_string(piece))
+                   if isinstance(piece, json_writer.StreamedString) else piece for piece in pieces)
+    assert written_uri(text) == gltf2_io_buffer.EMBED_PREFIX + base64.b64encode(DATA.tobytes()).decode()
+
+
+def test_other_consumers_fail():
+    _, gltf_buffer = embedded_gltf()
+    with pytest.raises(AssertionError):
+        gltf_buffer.to_dict()
+    with pytest.raises(TypeError):
+        json.dumps({'uri': gltf_buffer.uri})
+    with pytest.raises(TypeError):
+        str(gltf_buffer.uri)
@@ -0,0 +1,63 @@
+"""Quantization of positions shared by several meshes."""
+
+import types
+
+import numpy as np
+
+import blender_fakes
+
+gltf2_io = blender_fakes.import_exporter_module('com.gltf2_io')
+constants = blender_fakes.import_exporter_module('com.gltf2_io_constants')
+binary_data = blender_fakes.import_exporter_module('exp.gltf2_io_binary_data')
+quantization = blender_fakes.import_exporter_module('exp.gltf2_io_mesh_quantization_extension')
+
+POSITIONS = np.array([[0.0, 0.0, 0.0], [4.0, 0.0, 0.0], [4.0, 2.0, 1.0]], dtype=np.float32)
+
+
+def position_accessor():
+    buffer_view = binary_data.BinaryData.from_array(POSITIONS, constants.ComponentType.Float, 'VEC3')
+    minimum, maximum = buffer_view.min_max()
+    return gltf2_io.Accessor(buffer_view, None, constants.ComponentType.Float, len(POSITIONS), None, None, maximum,
+                             minimum, None, None, None, 'VEC3')
+
+
+def mesh(accessor):
+    primitive = gltf2_io.MeshPrimitive({'POSITION': accessor}, None, None, None, None, None, None)
+    return gltf2_io.Mesh(None, None, None, [primitive], None)
+
+
+def node(name, mesh, children=None):
+    return gltf2_io.Node(None, children, None, None, None, mesh, name, None, None, None, None, None)
+
+
+def world_positions(node):
+    """The positions of the mesh of a node, dequantized by the node transform."""
+    accessor = node.mesh.primitives[0].attributes['POSITION']
+    values = accessor.buffer_view.to_array()[:, :3].astype(np.float64)
+    if accessor.component_type == constants.ComponentType.Short:
+        values /= 32767.0
+    return values * (node.scale or [1.0] * 3) + (node.translation or [0.0] * 3)
+
+
+def test_meshes_sharing_positions_use_one_box():
+    # one Blender mesh with two sets of object materials, which gives two glTF meshes on the same accessor
+    accessor = position_accessor()
+    nodes = [node('a', mesh(accessor)), node('b', mesh(accessor))]
+    quantization.quantize_scene_primitives([gltf2_io.Scene(None, None, None, nodes)], [], {})
+
+    assert accessor.component_type == constants.ComponentType.Short
+    for quantized_node in nodes:
+        assert quantized_node.scale is not None
+        np.testing.assert_allclose(world_positions(quantized_node), POSITIONS, atol=1e-3)
+
+
+def test_positions_shared_with_an_unfoldable_node_stay_float():
+    accessor = position_accessor()
+    child = node('child', None)
+    nodes = [node('a', mesh(accessor)), node('b', mesh(accessor), children=[child])]
+    quantization.quantize_scene_primitives([gltf2_io.Scene(None, None, None, nodes)], [], {})
+
+    assert accessor.component_type == constants.ComponentType.Float
+    for unchanged_node in nodes:
+        assert unchanged_node.scale is None
+        np.testing.assert_allclose(world_positions(unchanged_node), POSITIONS)
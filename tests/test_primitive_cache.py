@@ -0,0 +1,62 @@
+"""Keys and entries of the persistent primitive cache."""
+
+import types
+
+import numpy as np
+
+import blender_fakes
+
+primitive_cache = blender_fakes.import_exporter_module('exp.gltf2_blender_primitive_cache')
+io_primitive_cache = blender_fakes.import_exporter_module('exp.gltf2_io_primitive_cache')
+
+
+def export_settings():
+    settings = {name: False for name in primitive_cache.PRIMITIVE_SETTINGS}
+    settings.update({'gltf_skins': True, 'gltf_extract_engine': 'NUMPY', 'gltf_weld_epsilon': 0.0,
+                     'gltf_lod_ratio': 1.0})
+    return settings
+
+
+def skinned_mesh():
+    vertex_groups = [[(0, 0.5), (1, 0.5)], [(1, 1.0)], [], [(0, 0.25)]]
+    return blender_fakes.make_mesh(4, [[0, 1, 2, 3]], [True], [0], vertex_groups=vertex_groups)
+
+
+def cache_key(mesh):
+    vertex_groups = [types.SimpleNamespace(name='bone0'), types.SimpleNamespace(name='bone1')]
+    return primitive_cache.primitive_cache_key(mesh, None, vertex_groups, None, export_settings())
+
+
+def test_key_follows_vertex_weights():
+    mesh = skinned_mesh()
+    key = cache_key(mesh)
+    assert cache_key(skinned_mesh()) == key
+
+    mesh.vertices[3].groups[0].weight = 0.75
+    assert cache_key(mesh) != key
+
+    # the same elements on other vertices
+    mesh = skinned_mesh()
+    mesh.vertices[2].groups, mesh.vertices[3].groups = mesh.vertices[3].groups, mesh.vertices[2].groups
+    assert cache_key(mesh) != key
+
+
+def test_entries_load_as_mapped_arrays(tmp_path):
+    primitive = {
+        'material': 1,
+        'indices': np.array([0, 1, 2, 2, 1, 3], dtype=np.uint32),
+        'attributes': {
+            'POSITION': np.arange(12, dtype=np.float32),
+            'JOINTS_0': np.array([0, 1, 0, 0] * 4, dtype=np.uint16),
+            'TEXCOORD_0': np.empty(0, dtype=np.float32)
+        }
+    }
+    io_primitive_cache.store(str(tmp_path), 'key', [primitive])
+
+    loaded = io_primitive_cache.load(str(tmp_path), 'key')[0]
+    assert loaded['material'] == 1
+    assert isinstance(loaded['indices'], np.memmap)
+    assert np.array_equal(loaded['indices'], primitive['indices'])
+    for name, values in primitive['attributes'].items():
+        assert np.array_equal(loaded['attributes'][name], values)
+    assert loaded['attributes']['JOINTS_0'].dtype == np.uint16
@@ -0,0 +1,147 @@
+"""Mesh simplification, and the lods generated with it."""
+
+import numpy as np
+
+import blender_fakes
+
+simplify = blender_fakes.import_exporter_module('exp.gltf2_blender_simplify')
+gather_cache = blender_fakes.import_exporter_module('exp.gltf2_blender_gather_cache')
+gather_primitives = blender_fakes.import_exporter_module('exp.gltf2_blender_gather_primitives')
+
+
+def height(x, y):
+    return 0.1 * np.sin(3.0 * x) * np.cos(2.0 * y)
+
+
+def grid(size):
+    """The vertex positions and quads of a curved grid."""
+    x, y = np.meshgrid(np.linspace(0.0, 1.0, size), np.linspace(0.0, 1.0, size), indexing='ij')
+    positions = np.stack((x, y, height(x, y)), axis=-1).reshape(-1, 3)
+    rows, columns = np.meshgrid(np.arange(size - 1), np.arange(size - 1), indexing='ij')
+    corners = (rows * size + columns).reshape(-1)
+    quads = np.stack((corners, corners + size, corners + size + 1, corners + 1), axis=1)
+    return positions, quads
+
+
+def seamed_primitive(size):
+    """A smooth grid with a UV seam down its middle, where the vertices have a copy for each side."""
+    positions, quads = grid(size)
+    triangles = np.concatenate((quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]))
+    gradient = np.stack((-0.3 * np.cos(3.0 * positions[:, 0]) * np.cos(2.0 * positions[:, 1]),
+                         0.2 * np.sin(3.0 * positions[:, 0]) * np.sin(2.0 * positions[:, 1]),
+                         np.ones(len(positions))), axis=1)
+    normals = gradient / np.linalg.norm(gradient, axis=1, keepdims=True)
+
+    # the right side is mapped to its own UV island, with copies of the vertices on the seam
+    seam = size // 2
+    column = np.arange(len(positions)) // size
+    right_vertices = np.flatnonzero(column >= seam)
+    copies = np.arange(len(positions))
+    copies[right_vertices] = len(positions) + np.arange(len(right_vertices))
+    right_triangles = np.all(column[triangles] >= seam, axis=1)
+    triangles[right_triangles] = copies[triangles[right_triangles]]
+
+    all_positions = np.concatenate((positions, positions[right_vertices]))
+    uvs = np.concatenate((positions[:, :2], positions[right_vertices, :2] + [2.0, 0.0]))
+    return {
+        'material': 0,
+        'indices': triangles.reshape(-1).tolist(),
+        'attributes': {
+            'POSITION': all_positions.reshape(-1).tolist(),
+            'NORMAL': np.concatenate((normals, normals[right_vertices])).reshape(-1).tolist(),
+            'TEXCOORD_0': uvs.reshape(-1).tolist()
+        }
+    }
+
+
+def flat_shaded_primitive(size):
+    """A grid with its own vertices for every quad, as extracted from a flat shaded mesh."""
+    positions, quads = grid(size)
+    corners = positions[quads].reshape(-1, 3)
+    quad_starts = 4 * np.arange(len(quads))[:, np.newaxis]
+    triangles = np.concatenate((quad_starts + [0, 1, 2], quad_starts + [0, 2, 3]))
+    normals = np.repeat(np.cross(corners[1::4] - corners[0::4], corners[2::4] - corners[0::4]), 4, axis=0)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    return {
+        'material': 0,
+        'indices': triangles.reshape(-1).tolist(),
+        'attributes': {
+            'POSITION': corners.reshape(-1).tolist(),
+            'NORMAL': normals.reshape(-1).tolist(),
+            'TEXCOORD_0': np.tile([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]], (len(quads), 1)).reshape(-1).tolist()
+        }
+    }
+
+
+def test_simplify_keeps_seams():
+    primitive = seamed_primitive(20)
+    triangle_count = len(primitive['indices']) // 3
+
+    simplified = simplify.simplify_primitives([primitive], 0.25)[0]
+
+    assert len(simplified['indices']) // 3 <= triangle_count // 4
+    positions = np.reshape(simplified['attributes']['POSITION'], (-1, 3))
+    assert np.abs(positions[:, 2] - height(positions[:, 0], positions[:, 1])).max() < 1e-9
+
+    # every vertex keeps the UVs of its position on its side, and no triangle spans both sides
+    uvs = np.reshape(simplified['attributes']['TEXCOORD_0'], (-1, 2))
+    right = uvs[:, 0] >= 2.0
+    np.testing.assert_allclose(uvs - np.outer(right, [2.0, 0.0]), positions[:, :2])
+    sides = right[np.reshape(simplified['indices'], (-1, 3))]
+    assert np.all(sides.all(axis=1) | ~sides.any(axis=1))
+
+    # the open border is kept
+    def border(positions):
+        positions = np.reshape(positions, (-1, 3))
+        on_border = np.any((positions[:, :2] == 0.0) | (positions[:, :2] == 1.0), axis=1)
+        return {tuple(position) for position in positions[on_border]}
+    assert border(simplified['attributes']['POSITION']) == border(primitive['attributes']['POSITION'])
+
+    # no triangle is flipped
+    triangles = positions[np.reshape(simplified['indices'], (-1, 3))]
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    assert np.all(normals[:, 2] > 0.0)
+
+
+def test_split_vertices_are_not_collapsed_across_seams():
+    # on a flat shaded curved grid, every vertex has a copy for each quad around it
+    primitive = flat_shaded_primitive(12)
+
+    simplified = simplify.simplify_primitives([primitive], 0.25)[0]
+
+    assert np.array_equal(simplified['indices'], primitive['indices'])
+
+
+def test_generated_lod_has_fewer_triangles():
+    size = 16
+    positions, quads = grid(size)
+    mesh = blender_fakes.make_mesh(size * size, quads.tolist(), [True] * len(quads), [0] * len(quads),
+                                   positions=positions.astype(np.float32))
+    # smooth normals and continuous UVs, so that the vertices are not split
+    for loop, uv in zip(mesh.loops, mesh.uv_layers.active.data):
+        loop.normal = mesh.vertices[loop.vertex_index].normal
+        uv.uv = blender_fakes.Vector(positions[loop.vertex_index, :2])
+    export_settings = {
+        'gltf_extract_engine': 'NUMPY', 'gltf_weld_epsilon': 0.0, 'gltf_optimize_vertex_cache': False,
+        'gltf_lod_ratio': 1.0, 'gltf_primitive_cache': None, 'gltf_primitive_cache_size': 0,
+        'gltf_cache_report': 'NONE', 'gltf_filepath': 'model_LOD0.gltf', 'gltf_yup': True, 'gltf_normals': True,
+        'gltf_tangents': False, 'gltf_texcoords': True, 'gltf_colors': False, 'gltf_skins': False,
+        'gltf_morph': False, 'gltf_materials': True, 'gltf_all_vertex_influences': False,
+        'gltf_mesh_quantization': False
+    }
+
+    def triangle_count():
+        primitives = gather_primitives.gather_primitives(mesh, None, None, None, None, (), export_settings)
+        return sum(primitive.indices.count for primitive in primitives) // 3
+
+    with gather_cache.ExportSession(export_settings) as session:
+        lod0_count = triangle_count()
+
+        # as the batch export does, the settings of the lod are changed in place
+        export_settings['gltf_filepath'] = 'model_LOD1.gltf'
+        export_settings['gltf_lod_ratio'] = 0.25
+        session.new_generation(export_settings)
+        lod1_count = triangle_count()
+
+    assert lod0_count == 2 * len(quads)
+    assert 0 < lod1_count < lod0_count